@@ -1,39 +1,32 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firestore_writer import get_writer
 
-cred = credentials.Certificate("C:/Users/user/Desktop/dentary/dentary-fb288-firebase-adminsdk-fbsvc-45613b4bdc.json")
-firebase_admin.initialize_app(cred)
+# 컬렉션별 임시 문서 1개씩 추가 (버퍼에 모아 배치 1번으로 커밋)
+writer = get_writer()
 
-db = firestore.client()
+# User 컬렉션
+writer.put_user(
+    "user001",
+    name="홍길동",
+    email="user@exmaple.com",
+    role="patient",  # "patient" | "consultant" | "admin"
+    sex="male",
+    age="28",
+)
 
-# User 컬렉션 생성 및 임시 문서 1개 추가
-db.collection("users").document("user001").set({
-    "name" : "홍길동",
-    "email" : "user@exmaple.com",
-    "role" : "patient", # "patient" | "consultant" | "admin"
-    "sex" : "male",
-    "age" : "28",
-})
+# recordings 컬렉션
+writer.put_recording("rec001", user_id="user001", file_url="https://...", transcript_id="script001")
 
-# recordings 컬렉션 생성 임시 문서 1개 추가
-db.collection("recordings").document("rec001").set({
-    "userId" : "user001",
-    "fileUrl" : "https://...",
-    "createdAt": firestore.SERVER_TIMESTAMP,
-    "type" : "original",
-    "transcriptId" : "script001"
-})
+# scripts 컬렉션
+writer.put_script(
+    "script001",
+    recording_id="rec001",
+    user_type="patient",
+    summary="오른쪽 어금니 신경치료 및 크라운 치료 요망",  # 해당 음성 파일을 분석한 뒤, NLP를 통해 생성된 상담 요약 텍스트
+)
 
-# scripts 컬렉션 생성 임시 문서 1개 추가
-db.collection("scripts").document("script001").set({
-    "scriptId" : "script001",
-    "recordingId" : "rec001",
-    "userType" : "patient",
-    "summary" : "오른쪽 어금니 신경치료 및 크라운 치료 요망", # 	해당 음성 파일을 분석한 뒤, NLP를 통해 생성된 상담 요약 텍스트
-    "createdAt" : firestore.SERVER_TIMESTAMP
-})
+# transcriptions 컬렉션
+writer.put_transcription("txt001", user_id="user001", text="")
 
-db.collection("transcriptions").document("txt001").set({
-    "UserId" : "user001",
-    "Text" : ""
-})
\ No newline at end of file
+writer.flush()
+writer.close()
+print(f"✅ 컬렉션 생성 완료: {writer.stats()}")
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+
+from parsing import extract_fields_from_transcript
+
+# ====== 배치 파싱 설정 ======
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+PARSE_CHUNKSIZE = int(os.getenv("PARSE_CHUNKSIZE", "64"))
+
+# 입력 소스 → (id, transcript, error) 스트림
+# - 디렉터리: *.json 파일 1개 = 전사 결과 1개 ([{"speaker", "text"}, ...])
+# - .jsonl: 한 줄에 전사 결과 1개 (리스트 또는 {"id": ..., "transcript": [...]})
+# 읽기 / JSON 오류가 난 항목은 transcript 없이 error 메시지로 넘겨 결과 파일에 기록 (나머지는 계속 처리)
+def iter_transcripts(source):
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(source, name), "r", encoding="utf-8") as f:
+                    yield name, json.load(f), None
+            except (OSError, ValueError) as e:
+                yield name, None, f"{type(e).__name__}: {e}"
+        return
+
+    with open(source, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    yield record.get("id", line_no), record["transcript"], None
+                else:
+                    yield line_no, record, None
+            except (ValueError, KeyError) as e:
+                yield line_no, None, f"{type(e).__name__}: {e}"
+
+def parse_one(item):
+    transcript_id, transcript, error = item
+    if error is not None:
+        return {"id": transcript_id, "error": error}
+    try:
+        return {"id": transcript_id, "input_text": extract_fields_from_transcript(transcript)}
+    except Exception as e:
+        return {"id": transcript_id, "error": f"{type(e).__name__}: {e}"}
+
+def parse_batch(source, output_path, workers=PARSE_WORKERS, chunksize=PARSE_CHUNKSIZE):
+    """전사 결과를 프로세스 풀로 파싱하여 입력 순서대로 JSONL 로 저장하고 처리 통계를 반환."""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    count = 0
+    errors = 0
+    start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as out:
+        if workers <= 1:
+            results = map(parse_one, iter_transcripts(source))
+            for result in results:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                count += 1
+                errors += "error" in result
+        else:
+            with Pool(workers) as pool:
+                for result in pool.imap(parse_one, iter_transcripts(source), chunksize=chunksize):
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    count += 1
+                    errors += "error" in result
+    elapsed = time.perf_counter() - start
+
+    return {
+        "transcripts": count,
+        "errors": errors,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "transcripts_per_sec": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="전사 결과 일괄 파싱 (디렉터리 또는 JSONL → JSONL)")
+    parser.add_argument("source", help="전사 JSON 디렉터리 또는 JSONL 파일")
+    parser.add_argument("output", help="결과 JSONL 경로")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS)
+    parser.add_argument("--chunksize", type=int, default=PARSE_CHUNKSIZE)
+    args = parser.parse_args()
+
+    stats = parse_batch(args.source, args.output, args.workers, args.chunksize)
+    print(f"✅ {stats['transcripts']}건 처리 완료 (에러 {stats['errors']}건)")
+    print(f"⏱️ {stats['seconds']}초, {stats['transcripts_per_sec']} transcripts/sec")
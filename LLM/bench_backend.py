@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import time
+
+import torch
+
+# 측정용 입력 (extract_fields_from_transcript 결과 형식)
+SAMPLE_INPUTS = [
+    "위치: #16, 문제: 통증, 처치: 신경치료, 예상기간: 2주",
+    "위치: #36, 문제: 충치, 처치: 레진, 예상기간: 1일",
+    "위치: #46, 문제: 치아 파절, 처치: 금, 예상기간: 미확인",
+    "위치: 미확인, 문제: 잇몸 출혈, 처치: 스케일링, 예상기간: 미확인",
+]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EEVE 추론 백엔드 벤치마크 (tokens/sec)")
+    parser.add_argument("--device", choices=["auto", "cuda", "cpu"], default="cpu")
+    parser.add_argument("--threads", type=int, help="CPU 스레드 수 (LLM_CPU_THREADS)")
+    parser.add_argument("--no-quantize", action="store_true", help="CPU 동적 int8 양자화 끄기")
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (생략 시 출력만)")
+    args = parser.parse_args()
+
+    # inference 는 import 시점에 설정을 읽으므로 먼저 환경 변수로 전달 (결과 캐시는 측정에서 제외)
+    os.environ["LLM_DEVICE"] = args.device
+    os.environ["LLM_RESULT_CACHE"] = "0"
+    if args.threads:
+        os.environ["LLM_CPU_THREADS"] = str(args.threads)
+    if args.no_quantize:
+        os.environ["LLM_CPU_QUANTIZE"] = "0"
+
+    import inference
+    from generation_service import GenerationService
+    from common import model_registry
+
+    inference.get_model()
+    service = GenerationService(
+        max_batch_size=args.batch_size,
+        generation_config={"max_new_tokens": args.max_new_tokens},
+    )
+    inputs = [SAMPLE_INPUTS[i % len(SAMPLE_INPUTS)] for i in range(args.requests)]
+
+    start = time.perf_counter()
+    service.generate_batch(inputs)
+    elapsed = time.perf_counter() - start
+
+    stats = service.stats()
+    report = {
+        "device": inference.device,
+        "threads": torch.get_num_threads(),
+        "quantized": inference.device == "cpu" and inference.LLM_CPU_QUANTIZE,
+        "load": {**model_registry.load_timings(), **inference.load_timings},
+        "requests": len(inputs),
+        "batch_size": args.batch_size,
+        "seconds": round(elapsed, 3),
+        "generated_tokens": stats["generated_tokens"],
+        "tokens_per_sec": stats["tokens_per_sec"],
+        "seconds_per_request": round(elapsed / len(inputs), 3),
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
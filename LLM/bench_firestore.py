@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import time
+import uuid
+
+# Firestore 쓰기 벤치마크 (로컬 에뮬레이터 전용)
+# 예) firebase emulators:start --only firestore  →  FIRESTORE_EMULATOR_HOST=localhost:8080 python bench_firestore.py
+
+def make_documents(count, run_id):
+    """실시간 윈도우 결과처럼 transcriptions / scripts 문서를 번갈아 생성."""
+    documents = []
+    for i in range(count):
+        if i % 10 == 9:
+            documents.append(("scripts", f"{run_id}-script{i:06d}", {
+                "scriptId": f"{run_id}-script{i:06d}",
+                "recordingId": f"{run_id}-rec{i // 10:05d}",
+                "userType": "patient",
+                "summary": "오른쪽 어금니 신경치료 및 크라운 치료 요망",
+            }))
+        else:
+            documents.append(("transcriptions", f"{run_id}-txt{i:06d}", {
+                "UserId": f"user{i % 50:03d}",
+                "Text": "오른쪽 위 어금니가 좀 아파요. 찬물 마시면 이가 시려요.",
+                "window": i,
+            }))
+    return documents
+
+# 기존 DB_Table_create.py 방식: 문서마다 .set() 1번 (왕복 1회씩)
+def bench_sequential(client, documents):
+    start = time.perf_counter()
+    for collection, document_id, data in documents:
+        client.collection(collection).document(document_id).set(data)
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), "docs_per_sec": round(len(documents) / elapsed, 1)}
+
+def bench_buffered(client, documents, mode, batch_size, flush_seconds):
+    from firestore_writer import FirestoreWriter
+
+    writer = FirestoreWriter(client=client, mode=mode, batch_size=batch_size, flush_seconds=flush_seconds)
+    start = time.perf_counter()
+    enqueue_seconds = []
+    futures = []
+    for collection, document_id, data in documents:
+        enqueue_start = time.perf_counter()
+        futures.append(writer.set(collection, document_id, data))
+        enqueue_seconds.append(time.perf_counter() - enqueue_start)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    writer.close()
+
+    failed = sum(1 for f in futures if f.exception() is not None)
+    enqueue_seconds.sort()
+    return {
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(len(documents) / elapsed, 1),
+        "failed": failed,
+        # 호출한 쪽(요청 처리 경로)이 set() 에서 기다린 시간
+        "enqueue_p50_us": round(enqueue_seconds[len(enqueue_seconds) // 2] * 1e6, 1),
+        "enqueue_p99_us": round(enqueue_seconds[int(len(enqueue_seconds) * 0.99)] * 1e6, 1),
+        "writer": writer.stats(),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Firestore 버퍼 쓰기 벤치마크 (docs/sec, 에뮬레이터 전용)")
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--modes", nargs="+", choices=["sequential", "batch", "bulk"], default=["sequential", "batch", "bulk"])
+    parser.add_argument("--sequential-documents", type=int, default=500, help="sequential 모드는 느리므로 따로 개수 지정")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-seconds", type=float, default=1.0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (생략 시 출력만)")
+    args = parser.parse_args()
+
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        raise SystemExit("❌ FIRESTORE_EMULATOR_HOST 가 없습니다. 운영 DB 에 쓰지 않도록 에뮬레이터에서만 실행하세요.")
+
+    from firestore_writer import get_client
+
+    client = get_client()
+    run_id = uuid.uuid4().hex[:8]
+    report = {"emulator": os.getenv("FIRESTORE_EMULATOR_HOST"), "documents": args.documents, "batch_size": args.batch_size}
+    for mode in args.modes:
+        if mode == "sequential":
+            documents = make_documents(args.sequential_documents, f"{run_id}-{mode}")
+            report[mode] = {"documents": len(documents), **bench_sequential(client, documents)}
+        else:
+            documents = make_documents(args.documents, f"{run_id}-{mode}")
+            report[mode] = {"documents": len(documents), **bench_buffered(client, documents, mode, args.batch_size, args.flush_seconds)}
+        print(f"📊 {mode}: {report[mode]['docs_per_sec']} docs/sec")
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from parsing import extract_fields_from_transcript
+from batch_parsing import parse_batch
+
+# ====== 합성 상담 문장 ======
+PATIENT_LINES = [
+    "오른쪽 위 어금니가 좀 아파요",
+    "찬물 마시면 이가 시려요",
+    "어제 딱딱한 걸 먹다가 앞니가 깨졌어요",
+    "잇몸에서 피가 나요",
+    "왼쪽 아래가 부었어요",
+    "별로 불편한 건 없어요",
+    "치료 기간은 얼마나 걸리나요",
+]
+CONSULTANT_LINES = [
+    "신경치료가 필요해 보이고 약 2주 정도 걸립니다",
+    "레진으로 때우시면 1일이면 끝나요",
+    "금으로 씌우시는 걸 권해드려요",
+    "스케일링 먼저 하시고 잇몸치료 진행하겠습니다",
+    "임플란트 1차수술 후 5~6개월 기다리셔야 해요",
+    "엑스레이 먼저 찍어볼게요",
+    "다음 주에 다시 오세요",
+]
+
+def make_transcript(num_turns, rng):
+    transcript = []
+    for i in range(num_turns):
+        if i % 2 == 0:
+            transcript.append({"speaker": "SPEAKER_00", "text": rng.choice(PATIENT_LINES)})
+        else:
+            transcript.append({"speaker": "SPEAKER_01", "text": rng.choice(CONSULTANT_LINES)})
+    return transcript
+
+# 길이별 단일 프로세스 파싱 지연 (transcript 1건당 ms)
+def bench_latency(lengths, repeat, rng):
+    results = {}
+    for num_turns in lengths:
+        transcripts = [make_transcript(num_turns, rng) for _ in range(repeat)]
+        start = time.perf_counter()
+        for transcript in transcripts:
+            extract_fields_from_transcript(transcript)
+        elapsed = time.perf_counter() - start
+        results[str(num_turns)] = {
+            "ms_per_transcript": round(elapsed / repeat * 1000, 4),
+            "transcripts_per_sec": round(repeat / elapsed, 1),
+        }
+    return results
+
+# JSONL 배치 처리량 (프로세스 풀)
+def bench_batch(count, num_turns, workers, rng):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "transcripts.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            for i in range(count):
+                record = {"id": i, "transcript": make_transcript(num_turns, rng)}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return parse_batch(source, os.path.join(tmp, "parsed.jsonl"), workers=workers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="transcript 파서 벤치마크")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[4, 40, 400])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--batch-count", type=int, default=5000)
+    parser.add_argument("--batch-turns", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (생략 시 출력만)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    report = {
+        "latency": bench_latency(args.lengths, args.repeat, rng),
+        "batch": bench_batch(args.batch_count, args.batch_turns, args.workers, rng),
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
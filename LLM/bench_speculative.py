@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import random
+import time
+
+# speculative decoding 벤치마크: 일반 greedy 생성과 출력이 같은지 확인하고 속도 / 수락률 비교
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EEVE speculative decoding 벤치마크 (출력 일치 / tokens/sec / 수락률)")
+    parser.add_argument("--modes", nargs="+", choices=["prompt_lookup", "draft"], default=["prompt_lookup"])
+    parser.add_argument("--draft-model", help="draft 모델 경로 (LLM_DRAFT_MODEL_PATH)")
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--transcript-turns", type=int, default=20)
+    parser.add_argument("--max-new-tokens", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (생략 시 출력만)")
+    args = parser.parse_args()
+
+    # inference 는 import 시점에 설정을 읽으므로 먼저 환경 변수로 전달 (결과 캐시는 측정에서 제외)
+    os.environ["LLM_RESULT_CACHE"] = "0"
+    if args.draft_model:
+        os.environ["LLM_DRAFT_MODEL_PATH"] = args.draft_model
+
+    import inference
+    from bench_parsing import make_transcript
+    from parsing import extract_fields_from_transcript
+    from speculative import draft_load_timings, SpeculationStats
+    import speculative
+    from common import model_registry
+
+    rng = random.Random(args.seed)
+    inputs = []
+    while len(inputs) < args.requests:
+        input_text = extract_fields_from_transcript(make_transcript(args.transcript_turns, rng))
+        rules, _ = inference.plan_generation(input_text, inference.JSON_DECODING)
+        # 치료 불필요 / 규칙만으로 채워지는 입력은 모델을 호출하지 않으므로 제외
+        if input_text.strip() != inference.NO_TREATMENT_TEXT and not inference.is_fully_covered(rules):
+            inputs.append(input_text)
+
+    inference.get_model()
+
+    def run(mode):
+        speculative.speculation_stats = SpeculationStats()
+        outputs = []
+        start = time.perf_counter()
+        for input_text in inputs:
+            outputs.append(inference.generate(input_text, max_new_tokens=args.max_new_tokens, speculative=mode))
+        return outputs, time.perf_counter() - start
+
+    baseline, baseline_seconds = run("off")
+    report = {
+        "device": inference.device,
+        "requests": len(inputs),
+        "max_new_tokens": args.max_new_tokens,
+        "off": {"seconds": round(baseline_seconds, 3)},
+    }
+    for mode in args.modes:
+        outputs, seconds = run(mode)
+        mismatches = [i for i, (a, b) in enumerate(zip(baseline, outputs)) if a != b]
+        report[mode] = {
+            "seconds": round(seconds, 3),
+            "speedup": round(baseline_seconds / seconds, 3) if seconds else 0.0,
+            "identical_outputs": len(inputs) - len(mismatches),
+            "mismatched_requests": mismatches,
+            **speculative.speculation_stats.snapshot(),
+        }
+        if mismatches:
+            print(f"⚠️ [{mode}] 일반 생성과 출력이 다른 요청: {mismatches}")
+    if model_registry.is_loaded("llm_draft"):
+        report["draft_load"] = {**model_registry.load_timings()["llm_draft"], **draft_load_timings}
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
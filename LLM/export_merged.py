@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import time
+
+import torch
+from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
+from peft import PeftModel
+
+from inference import base_model_name, lora_model_path, merged_model_path
+from result_cache import checkpoint_identity
+
+# 병합된 체크포인트에 함께 저장하는 메타데이터 (어떤 어댑터로 만들었는지 확인용)
+EXPORT_INFO_FILE = "export_info.json"
+
+# ====== LoRA 어댑터를 Base 가중치에 병합 ======
+# 4bit 가중치에는 병합할 수 없으므로 Base 를 fp16 으로 올려서 병합
+def merge_adapter(base_model_name, lora_model_path):
+    base_model = AutoModelForCausalLM.from_pretrained(
+        base_model_name,
+        torch_dtype=torch.float16,
+        low_cpu_mem_usage=True,
+    )
+    model = PeftModel.from_pretrained(base_model, lora_model_path)
+    return model.merge_and_unload()
+
+def export_merged(output_path=merged_model_path, dtype="fp16", max_shard_size="2GB"):
+    """병합 모델을 safetensors 로 저장 (dtype: "fp16" 또는 사전 양자화된 "nf4")."""
+    os.makedirs(output_path, exist_ok=True)
+    timings = {}
+
+    start = time.perf_counter()
+    model = merge_adapter(base_model_name, lora_model_path)
+    timings["merge_seconds"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    model.save_pretrained(output_path, safe_serialization=True, max_shard_size=max_shard_size)
+    del model
+
+    if dtype == "nf4":
+        # fp16 병합본을 NF4 로 다시 읽어 양자화된 가중치로 덮어씀 (로딩 시 양자화 생략)
+        quantized = AutoModelForCausalLM.from_pretrained(
+            output_path,
+            device_map="auto",
+            quantization_config=BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_use_double_quant=True,
+                bnb_4bit_compute_dtype=torch.float16,
+            ),
+        )
+        for name in os.listdir(output_path):
+            if name.endswith(".safetensors") or name.endswith(".safetensors.index.json"):
+                os.remove(os.path.join(output_path, name))
+        quantized.save_pretrained(output_path, safe_serialization=True, max_shard_size=max_shard_size)
+        del quantized
+
+    AutoTokenizer.from_pretrained(base_model_name, use_fast=True).save_pretrained(output_path)
+    timings["save_seconds"] = round(time.perf_counter() - start, 3)
+
+    with open(os.path.join(output_path, EXPORT_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "base_model": base_model_name,
+                "adapter": checkpoint_identity(lora_model_path),
+                "dtype": dtype,
+            },
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+    return timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LoRA 어댑터를 병합한 추론용 체크포인트 생성")
+    parser.add_argument("--output", default=merged_model_path, help="저장 경로 (inference.py 가 이 경로를 우선 사용)")
+    parser.add_argument("--dtype", choices=["fp16", "nf4"], default="nf4")
+    parser.add_argument("--max-shard-size", default="2GB")
+    args = parser.parse_args()
+
+    print(f"⏳ 병합 중: {base_model_name} + {lora_model_path}")
+    timings = export_merged(args.output, args.dtype, args.max_shard_size)
+    print(f"✅ 저장 완료: {args.output} ({args.dtype})")
+    print(f"⏱️ 병합 {timings['merge_seconds']}초, 저장 {timings['save_seconds']}초")
@@ -0,0 +1,289 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# ====== Firestore 설정 ======
+# FIRESTORE_EMULATOR_HOST(예: localhost:8080) 가 있으면 에뮬레이터에 인증 없이 연결
+FIRESTORE_CREDENTIALS = os.getenv(
+    "FIRESTORE_CREDENTIALS", "C:/Users/user/Desktop/dentary/dentary-fb288-firebase-adminsdk-fbsvc-45613b4bdc.json"
+)
+FIRESTORE_PROJECT = os.getenv("FIRESTORE_PROJECT", "dentary-fb288")
+
+# ====== 쓰기 버퍼 설정 ======
+FIRESTORE_WRITE_MODE = os.getenv("FIRESTORE_WRITE_MODE", "batch")  # "batch"(WriteBatch) / "bulk"(BulkWriter)
+FIRESTORE_BATCH_SIZE = min(int(os.getenv("FIRESTORE_BATCH_SIZE", "500")), 500)  # WriteBatch 1회 최대 500건
+FIRESTORE_FLUSH_SECONDS = float(os.getenv("FIRESTORE_FLUSH_SECONDS", "1.0"))
+FIRESTORE_MAX_BUFFER = int(os.getenv("FIRESTORE_MAX_BUFFER", "10000"))
+FIRESTORE_MAX_RETRIES = int(os.getenv("FIRESTORE_MAX_RETRIES", "5"))
+FIRESTORE_RETRY_BASE_SECONDS = float(os.getenv("FIRESTORE_RETRY_BASE_SECONDS", "0.5"))
+
+COLLECTIONS = ("users", "recordings", "scripts", "transcriptions")
+
+_client = None
+_client_lock = threading.Lock()
+_writer_lock = threading.Lock()
+
+def get_client():
+    """Firestore 클라이언트 지연 생성 (에뮬레이터면 google-cloud-firestore 직접, 아니면 firebase_admin 서비스 계정)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if os.getenv("FIRESTORE_EMULATOR_HOST"):
+                from google.cloud import firestore as gcloud_firestore
+
+                _client = gcloud_firestore.Client(project=FIRESTORE_PROJECT)
+                print(f"🧪 Firestore 에뮬레이터 연결 ({os.getenv('FIRESTORE_EMULATOR_HOST')}, project={FIRESTORE_PROJECT})")
+            else:
+                import firebase_admin
+                from firebase_admin import credentials, firestore
+
+                if not firebase_admin._apps:
+                    firebase_admin.initialize_app(credentials.Certificate(FIRESTORE_CREDENTIALS))
+                _client = firestore.client()
+    return _client
+
+def server_timestamp():
+    from google.cloud.firestore import SERVER_TIMESTAMP
+    return SERVER_TIMESTAMP
+
+# 재시도할 만한 일시적 오류 (권한 / 잘못된 인자 같은 오류는 바로 실패 처리)
+def is_retryable(error):
+    from google.api_core import exceptions
+
+    return isinstance(error, (
+        exceptions.Aborted,
+        exceptions.DeadlineExceeded,
+        exceptions.InternalServerError,
+        exceptions.ResourceExhausted,
+        exceptions.ServiceUnavailable,
+        exceptions.TooManyRequests,
+        ConnectionError,
+        TimeoutError,
+    ))
+
+_FLUSH = object()
+_STOP = object()
+
+class FirestoreWriter:
+    """문서 쓰기를 버퍼에 모았다가 WriteBatch / BulkWriter 로 한꺼번에 커밋하는 백그라운드 writer.
+
+    set() 은 대기열에 넣기만 하고 Future 를 돌려주므로 요청 처리 경로를 막지 않는다.
+    버퍼가 batch_size 건이 되거나 첫 문서가 들어온 뒤 flush_seconds 가 지나면 커밋하고,
+    일시적 오류는 지수 백오프로 max_retries 번까지 다시 시도한다.
+    대기열이 max_buffer 건을 넘으면 set() 을 호출한 쪽이 기다린다 (backpressure).
+    """
+
+    def __init__(self, client=None, mode=FIRESTORE_WRITE_MODE, batch_size=FIRESTORE_BATCH_SIZE,
+                 flush_seconds=FIRESTORE_FLUSH_SECONDS, max_buffer=FIRESTORE_MAX_BUFFER, max_retries=FIRESTORE_MAX_RETRIES):
+        if mode not in ("batch", "bulk"):
+            raise ValueError(f"알 수 없는 쓰기 모드: {mode}")
+        self.client = client
+        self.mode = mode
+        self.batch_size = min(batch_size, 500)
+        self.flush_seconds = flush_seconds
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_buffer)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.written = 0
+        self.failed = 0
+        self.commits = 0
+        self.retries = 0
+        self.busy_seconds = 0.0
+
+    # ====== 쓰기 요청 ======
+    def set(self, collection, document_id, data, merge=False):
+        """문서 쓰기를 예약하고 커밋 결과를 받을 Future 반환."""
+        with self._lock:
+            if self._thread is None:
+                if self.client is None:
+                    self.client = get_client()
+                self._thread = threading.Thread(target=self._loop, name="firestore-writer", daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((collection, document_id, data, merge, future))
+        return future
+
+    def put_user(self, user_id, name, email, role, sex, age):
+        return self.set("users", user_id, {"name": name, "email": email, "role": role, "sex": sex, "age": str(age)})
+
+    def put_recording(self, recording_id, user_id, file_url, transcript_id, recording_type="original"):
+        return self.set("recordings", recording_id, {
+            "userId": user_id,
+            "fileUrl": file_url,
+            "createdAt": server_timestamp(),
+            "type": recording_type,
+            "transcriptId": transcript_id,
+        })
+
+    def put_script(self, script_id, recording_id, user_type, summary):
+        return self.set("scripts", script_id, {
+            "scriptId": script_id,
+            "recordingId": recording_id,
+            "userType": user_type,
+            "summary": summary,
+            "createdAt": server_timestamp(),
+        })
+
+    def put_transcription(self, transcription_id, user_id, text, merge=False):
+        return self.set("transcriptions", transcription_id, {"UserId": user_id, "Text": text}, merge=merge)
+
+    def flush(self, timeout=None):
+        """지금까지 예약된 쓰기가 모두 커밋(또는 실패 처리)될 때까지 대기."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        if self._thread is None:
+            return
+        self._queue.put((_STOP, None))
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ====== 백그라운드 커밋 ======
+    def _loop(self):
+        buffer = []
+        documents = set()  # 버퍼에 있는 (컬렉션, 문서 id)
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or item[0] is _FLUSH or item[0] is _STOP:
+                # 시간 트리거 / flush / 종료 → 모인 문서 커밋
+                self._commit(buffer)
+                buffer, deadline = [], None
+                documents.clear()
+                if item is not None:
+                    if item[0] is _STOP:
+                        return
+                    item[1].set()
+                continue
+
+            # 같은 문서를 한 배치에서 두 번 쓰지 않도록, 중복이면 먼저 커밋 (쓰기 순서 유지)
+            if item[:2] in documents:
+                self._commit(buffer)
+                buffer, deadline = [], None
+                documents.clear()
+            buffer.append(item)
+            documents.add(item[:2])
+            if deadline is None:
+                deadline = time.perf_counter() + self.flush_seconds
+            if len(buffer) >= self.batch_size:
+                self._commit(buffer)
+                buffer, deadline = [], None
+                documents.clear()
+
+    def _commit(self, buffer):
+        if not buffer:
+            return
+        start = time.perf_counter()
+        try:
+            if self.mode == "bulk":
+                self._commit_bulk(buffer)
+            else:
+                self._commit_batch(buffer)
+        except Exception as e:
+            # 문서 데이터 오류 등 예상 못 한 오류도 writer 스레드는 살려 두고 해당 요청만 실패 처리
+            print(f"❌ Firestore 커밋 중 오류 ({len(buffer)}건): {e}")
+            self._finish([item for item in buffer if not item[-1].done()], error=e)
+        with self._lock:
+            self.commits += 1
+            self.busy_seconds += time.perf_counter() - start
+
+    def _commit_batch(self, buffer):
+        for attempt in range(self.max_retries + 1):
+            batch = self.client.batch()
+            for collection, document_id, data, merge, _ in buffer:
+                batch.set(self.client.collection(collection).document(document_id), data, merge=merge)
+            try:
+                batch.commit()
+                break
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    print(f"❌ Firestore 배치 커밋 실패 ({len(buffer)}건): {e}")
+                    self._finish(buffer, error=e)
+                    return
+                with self._lock:
+                    self.retries += 1
+                delay = FIRESTORE_RETRY_BASE_SECONDS * 2 ** attempt
+                print(f"⚠️ Firestore 배치 커밋 재시도 {attempt + 1}/{self.max_retries} ({delay:.1f}초 후): {e}")
+                time.sleep(delay)
+        self._finish(buffer)
+
+    def _commit_bulk(self, buffer):
+        # BulkWriter 는 문서별로 병렬 커밋 + 자체 재시도 → 실패 콜백에서 재시도 여부만 결정
+        bulk = self.client.bulk_writer()
+        failures = {}
+
+        def on_error(failure, _bulk_writer):
+            key = failure.operation.reference.path
+            if failure.attempts <= self.max_retries:
+                with self._lock:
+                    self.retries += 1
+                return True
+            failures[key] = RuntimeError(f"{failure.code}: {failure.message}")
+            return False
+
+        bulk.on_write_error(on_error)
+        references = []
+        for collection, document_id, data, merge, _ in buffer:
+            reference = self.client.collection(collection).document(document_id)
+            references.append(reference.path)
+            bulk.set(reference, data, merge=merge)
+        try:
+            bulk.close()
+        except Exception as e:
+            print(f"❌ Firestore BulkWriter 커밋 실패 ({len(buffer)}건): {e}")
+            self._finish(buffer, error=e)
+            return
+
+        if failures:
+            print(f"❌ Firestore BulkWriter 문서 쓰기 실패 {len(failures)}건")
+        for item, path in zip(buffer, references):
+            self._finish([item], error=failures.get(path))
+
+    def _finish(self, items, error=None):
+        with self._lock:
+            if error is None:
+                self.written += len(items)
+            else:
+                self.failed += len(items)
+        for *_, future in items:
+            if error is None:
+                future.set_result(True)
+            else:
+                future.set_exception(error)
+
+    def stats(self):
+        with self._lock:
+            busy = self.busy_seconds
+            return {
+                "mode": self.mode,
+                "batch_size": self.batch_size,
+                "pending": self._queue.qsize(),
+                "written": self.written,
+                "failed": self.failed,
+                "commits": self.commits,
+                "retries": self.retries,
+                "docs_per_sec": round(self.written / busy, 1) if busy else 0.0,
+            }
+
+# ====== 프로세스 공용 writer ======
+_writer = None
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = FirestoreWriter()
+    return _writer
@@ -0,0 +1,187 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+import torch
+from transformers import StoppingCriteriaList
+
+import inference
+from inference import (
+    build_prompt, extract_generated_text, get_model, get_prefix_cache, get_result_cache, get_tokenizer, plan_generation,
+    result_cache_key, GENERATION_CONFIG, JSON_DECODING, NO_TREATMENT_TEXT,
+)
+from json_decoding import json_generate_kwargs
+from llm_metrics import count_generated_tokens, queue_wait_seconds, record_generation
+from speculative import AcceptanceCounter, speculative_kwargs, SPECULATIVE
+from treatment_rules import is_fully_covered, render_rules
+
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.batching import MicroBatcher
+
+# ====== 배치 생성 설정 ======
+LLM_MAX_BATCH_SIZE = int(os.getenv("LLM_MAX_BATCH_SIZE", "8"))
+LLM_MAX_WAIT_MS = float(os.getenv("LLM_MAX_WAIT_MS", "20"))
+
+class GenerationService:
+    """PeftModel 을 한 번만 로딩해 두고 여러 요청을 왼쪽 패딩 배치로 함께 생성하는 서비스.
+
+    submit() 으로 들어온 요청은 공용 MicroBatcher 스레드가 max_batch_size 개 또는
+    max_wait_ms 까지 모아 generate_batch 로 처리하고, 각 요청의 Future 에 결과를 돌려준다.
+
+    고정 프롬프트 KV 캐시는 배치의 모든 행이 prefix 로 시작할 때(패딩 없는 같은 길이 배치, 단건 배치)만 적용되고,
+    왼쪽 패딩이 들어간 배치는 prefix 위치가 행마다 달라 전체 프롬프트를 prefill 한다.
+    """
+
+    def __init__(self, max_batch_size=LLM_MAX_BATCH_SIZE, max_wait_ms=LLM_MAX_WAIT_MS, generation_config=None, json_mode=JSON_DECODING,
+                 speculative=SPECULATIVE):
+        self.max_batch_size = max_batch_size
+        self.json_mode = json_mode
+        self.speculative = speculative
+        self.generation_config = {**GENERATION_CONFIG, **(generation_config or {})}
+        self._lock = threading.Lock()
+        self._batcher = MicroBatcher(
+            self.generate_batch, max_batch_size, max_wait_ms, name="llm-batcher",
+            on_wait=lambda seconds: queue_wait_seconds.observe("generation_service", seconds),
+        )
+
+        self.requests = 0
+        self.batches = 0
+        self.generated_tokens = 0
+        self.busy_seconds = 0.0
+
+    # ====== 배치 생성 (동기) ======
+    def generate_batch(self, input_texts):
+        """입력 목록을 max_batch_size 단위로 생성하여 입력과 같은 순서의 결과 목록 반환."""
+        results = [None] * len(input_texts)
+
+        # 규칙으로 모두 채워지는 입력 / 결과 캐시에 있는 입력은 생성 대상에서 제외
+        plans = [plan_generation(text, self.json_mode) for text in input_texts]
+        cache = get_result_cache()
+        cache_keys = {}
+        max_new_tokens = self.generation_config["max_new_tokens"]
+        for i, text in enumerate(input_texts):
+            rules, json_mode = plans[i]
+            if is_fully_covered(rules):
+                results[i] = render_rules(rules)
+            elif cache is not None:
+                cache_keys[i] = result_cache_key(text, max_new_tokens, json_mode)
+                results[i] = cache.get(cache_keys[i])
+        pending = [i for i in range(len(input_texts)) if results[i] is None]
+        if not pending:
+            return results
+
+        tokenizer = get_tokenizer()
+        prompts = {i: build_prompt(input_texts[i]) for i in pending}
+
+        # 길이가 비슷한 요청끼리 묶어 패딩 낭비를 줄이고, 결과는 원래 순서로 복원
+        order = sorted(pending, key=lambda i: len(prompts[i]))
+        for start in range(0, len(order), self.max_batch_size):
+            indices = order[start:start + self.max_batch_size]
+            texts = self._generate([prompts[i] for i in indices], tokenizer, [plans[i] for i in indices])
+            for i, text in zip(indices, texts):
+                results[i] = text
+                if cache is not None:
+                    cache.put(cache_keys[i], text)
+        return results
+
+    def _generate(self, prompts, tokenizer, plans):
+        model = get_model()
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(inference.device)
+
+        # 규칙 값이 있는 행이 하나라도 있으면 배치 전체를 스키마 모드로 (규칙 없는 행은 키만 강제)
+        modes = {json_mode for _, json_mode in plans}
+        json_mode = "schema" if "schema" in modes else self.json_mode
+        fixed_values = [rules for rules, _ in plans]
+
+        generate_kwargs = json_generate_kwargs(tokenizer, json_mode, inputs["input_ids"].shape[1], fixed_values=fixed_values)
+        if inference.PREFIX_CACHE:
+            prefix_cache = get_prefix_cache(inputs["input_ids"])
+            if prefix_cache is not None:
+                generate_kwargs["past_key_values"] = prefix_cache
+        # assisted decoding 은 배치 크기 1 에서만 가능 → speculative_kwargs 가 그 외에는 빈 dict 반환
+        counter = None
+        spec_kwargs = speculative_kwargs(tokenizer, self.speculative, batch_size=len(prompts))
+        if spec_kwargs:
+            generate_kwargs.update(spec_kwargs)
+            counter = AcceptanceCounter(model, inputs["input_ids"].shape[1])
+            generate_kwargs["stopping_criteria"] = StoppingCriteriaList([*generate_kwargs.get("stopping_criteria", []), counter])
+
+        start = time.perf_counter()
+        with torch.no_grad(), counter or contextlib.nullcontext():
+            outputs = model.generate(
+                **inputs,
+                **self.generation_config,
+                **generate_kwargs,
+                eos_token_id=tokenizer.eos_token_id,
+                pad_token_id=tokenizer.pad_token_id,
+            )
+        elapsed = time.perf_counter() - start
+
+        new_tokens = outputs[:, inputs["input_ids"].shape[1]:]
+        token_count = count_generated_tokens(new_tokens, tokenizer.eos_token_id)
+        record_generation("generate_batch", elapsed, token_count)
+        if counter is not None:
+            counter.record(self.speculative, token_count)
+        with self._lock:
+            self.requests += len(prompts)
+            self.batches += 1
+            self.generated_tokens += token_count
+            self.busy_seconds += elapsed
+
+        return [
+            extract_generated_text(tokenizer.decode(output, skip_special_tokens=True), json_mode)
+            for output in outputs
+        ]
+
+    # ====== 요청 단위 제출 (비동기 배치) ======
+    def submit(self, input_text):
+        return self._batcher.submit(input_text)
+
+    def close(self):
+        self._batcher.close()
+
+    def stats(self):
+        with self._lock:
+            busy = self.busy_seconds
+            return {
+                "max_batch_size": self.max_batch_size,
+                "pending": self._batcher.pending(),
+                "requests": self.requests,
+                "batches": self.batches,
+                "generated_tokens": self.generated_tokens,
+                "requests_per_sec": round(self.requests / busy, 2) if busy else 0.0,
+                "tokens_per_sec": round(self.generated_tokens / busy, 1) if busy else 0.0,
+            }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="추출된 입력(JSONL) 일괄 생성")
+    parser.add_argument("source", help="batch_parsing.py 결과 JSONL ({\"id\", \"input_text\"})")
+    parser.add_argument("output", help="생성 결과 JSONL 경로")
+    parser.add_argument("--batch-size", type=int, default=LLM_MAX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with open(args.source, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    # 치료 불필요 / 파싱 실패 케이스는 모델 호출 생략
+    targets = [
+        i for i, r in enumerate(records)
+        if r.get("input_text") and r["input_text"].strip() != NO_TREATMENT_TEXT
+    ]
+
+    service = GenerationService(max_batch_size=args.batch_size)
+    texts = service.generate_batch([records[i]["input_text"] for i in targets])
+    for i, text in zip(targets, texts):
+        records[i]["generated_text"] = text
+
+    with open(args.output, "w", encoding="utf-8") as out:
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    print(f"✅ {len(targets)}건 생성 완료: {service.stats()}")
+    if get_result_cache() is not None:
+        print(f"🗂️ 결과 캐시: {get_result_cache().stats()}")
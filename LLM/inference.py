@@ -1,55 +1,173 @@
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoTokenizer, AutoModelForCausalLM, DynamicCache, StoppingCriteriaList
 from parsing import extract_fields_from_transcript
+from json_decoding import json_generate_kwargs, trim_json_tail
+from result_cache import ResultCache, checkpoint_identity, make_key, RESULT_CACHE_ENABLED
+from llm_metrics import count_generated_tokens, record_generation
+from treatment_rules import apply_rules, is_fully_covered, render_rules, RULES_VERSION, TOOTH_MAP
+from speculative import AcceptanceCounter, speculative_kwargs, SPECULATIVE
 from peft import PeftModel
+import sys
+import threading
+import time
+import contextlib
+import copy
 import ast
 import json
+import os
 import re
 
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import model_registry
+
 # ====== [1] 모델 경로 설정 ======
 base_model_name = "yanolja/EEVE-Korean-Instruct-10.8B-v1.0"
 lora_model_path = "C:/Users/user/Desktop/dentary/eeve_lora/checkpoint-468"
+# export_merged.py 로 만든 병합 체크포인트 (있으면 Base + LoRA 대신 사용)
+merged_model_path = os.getenv("LLM_MERGED_MODEL_PATH", "C:/Users/user/Desktop/dentary/eeve_lora/merged-468")
+USE_MERGED = os.getenv("LLM_USE_MERGED", "1") == "1"
 
 # ====== [2] 디바이스 설정 ======
-device = "cuda" if torch.cuda.is_available() else "cpu"
-
-# ====== [3] Tokenizer 로딩 ======
-tokenizer = AutoTokenizer.from_pretrained(base_model_name, use_fast=True)
-tokenizer.pad_token = tokenizer.eos_token
-
-# ====== [4] Base + LoRA 모델 로딩 ======
-base_model = AutoModelForCausalLM.from_pretrained(
-    base_model_name,
-    device_map="auto",
-    load_in_4bit=True,
-    bnb_4bit_quant_type="nf4",
-    bnb_4bit_use_double_quant=True,
-    bnb_4bit_compute_dtype=torch.float16,
-)
-model = PeftModel.from_pretrained(base_model, lora_model_path)
-model.eval()
-
-# ====== [5] 프롬프트 입력 ======
-instruction = "아래 키워드를 바탕으로 환자 상태를 설명하고, 상담자 입장에서 적절한 진료 권장 대사를 작성하세요."
+# "auto"(CUDA 있으면 사용) / "cuda" / "cpu"
+LLM_DEVICE = os.getenv("LLM_DEVICE", "auto")
+if LLM_DEVICE == "auto":
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+else:
+    device = LLM_DEVICE
+
+# CPU 백엔드: bitsandbytes 4bit 대신 Linear 동적 int8 양자화 + SDPA, 스레드 수 (0 이면 torch 기본값)
+LLM_CPU_THREADS = int(os.getenv("LLM_CPU_THREADS", "0"))
+LLM_CPU_QUANTIZE = os.getenv("LLM_CPU_QUANTIZE", "1") == "1"
+
+# 모델 로딩 직후 짧은 생성 1회로 워밍업할지 여부
+WARMUP_ON_LOAD = os.getenv("LLM_WARMUP", "0") == "1"
+
+# 생성 설정 (단건 / 배치 생성 공통)
+GENERATION_CONFIG = {
+    "max_new_tokens": 512,
+    "do_sample": False,
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "repetition_penalty": 1.1,
+}
+
+# JSON 디코딩 모드: "stop"(닫는 중괄호에서 종료) / "schema"(+ 고정 키 강제) / "off"
+JSON_DECODING = os.getenv("LLM_JSON_DECODING", "stop")
+
+# 테이블로 결정되는 필드(치식, 치료기간, 수가표 항목 등)를 생성 전에 규칙으로 채울지 여부
+RULE_ENGINE = os.getenv("LLM_RULE_ENGINE", "1") == "1"
+
+# 고정 프롬프트(지시문 + few-shot) 의 KV 캐시를 재사용할지 여부
+PREFIX_CACHE = os.getenv("LLM_PREFIX_CACHE", "1") == "1"
+
+def merged_checkpoint_available():
+    if not USE_MERGED or not os.path.isfile(os.path.join(merged_model_path, "config.json")):
+        return False
+    if device == "cpu":
+        # bitsandbytes NF4 로 저장된 병합본은 CPU 에서 읽을 수 없음
+        try:
+            with open(os.path.join(merged_model_path, "export_info.json"), "r", encoding="utf-8") as f:
+                return json.load(f).get("dtype") != "nf4"
+        except FileNotFoundError:
+            return False
+    return True
+
+# ====== [3] Tokenizer / Base + LoRA 모델 지연 로딩 ======
+# import 시점에는 로더만 model_registry 에 등록하고, 첫 사용 시 1회만 로딩하여 프로세스 내에서 공유
+# (STT 모델과 같은 레지스트리 → /models 표시, model_registry.warmup() 대상)
+_load_lock = threading.Lock()
+load_timings = {}
+
+def load_tokenizer():
+    tokenizer = AutoTokenizer.from_pretrained(base_model_name, use_fast=True)
+    tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"  # 배치 생성 시 왼쪽 패딩
+    return tokenizer
+
+def load_model():
+    if device == "cpu":
+        model = load_cpu_model()
+        load_timings["model_source"] = "cpu"
+    elif merged_checkpoint_available():
+        # 병합 체크포인트: safetensors 를 mmap 으로 바로 읽고, 어댑터 연산 없음
+        # (nf4 로 저장된 경우 config 의 quantization_config 로 양자화 상태 그대로 로딩)
+        print(f"⏳ 병합 모델 로딩 중... ({merged_model_path})")
+        model = AutoModelForCausalLM.from_pretrained(
+            merged_model_path,
+            device_map="auto",
+            torch_dtype=torch.float16,
+            low_cpu_mem_usage=True,
+            use_safetensors=True,
+        )
+        load_timings["model_source"] = "merged"
+    else:
+        print("⏳ Base + LoRA 모델 로딩 중...")
+        base_model = AutoModelForCausalLM.from_pretrained(
+            base_model_name,
+            device_map="auto",
+            load_in_4bit=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_use_double_quant=True,
+            bnb_4bit_compute_dtype=torch.float16,
+        )
+        model = PeftModel.from_pretrained(base_model, lora_model_path)
+        load_timings["model_source"] = "lora"
+    model.eval()
+    return model
 
-with open("C:/Users/user/Desktop/dentary/input/transcription_002.json", "r", encoding="utf-8") as f:
-    transcript_data = json.load(f)
+# 짧은 생성 1회로 CUDA 커널 / 메모리 할당을 미리 수행
+def warmup_model(model):
+    warmup_inputs = get_tokenizer()("Instruction:", return_tensors="pt").to(device)
+    with torch.no_grad():
+        model.generate(**warmup_inputs, max_new_tokens=1, do_sample=False)
 
-input_text = extract_fields_from_transcript(transcript_data)
+model_registry.register("llm_tokenizer", load_tokenizer)
+model_registry.register("llm_model", load_model, warmup=warmup_model)
 
-# ====== 치료 불필요 예외 처리 ======
-if input_text.strip() == "해당 환자는 치료가 필요없습니다.":
-    print("\n=== 치료 불필요 케이스입니다. 모델 호출을 생략합니다. ===")
-    exit()
+def get_tokenizer():
+    return model_registry.get("llm_tokenizer")
 
-print("=== LLM 입력 ===")
-print("Instruction:")
-print(instruction)
-print("Input Text:")
-print(input_text)
+def get_model():
+    if WARMUP_ON_LOAD and not model_registry.is_loaded("llm_model"):
+        model_registry.warmup(["llm_model"])
+    return model_registry.get("llm_model")
 
-# ====== [6] Few-shot 예시 포함 프롬프트 구성 ======
-prompt = f"""Instruction: {instruction}
+# CPU 로딩: fp32 로 읽고 LoRA 는 병합한 뒤 Linear 를 동적 int8 양자화
+def load_cpu_model(threads=LLM_CPU_THREADS, quantize=LLM_CPU_QUANTIZE):
+    if threads > 0:
+        torch.set_num_threads(threads)
+
+    if merged_checkpoint_available():
+        print(f"⏳ 병합 모델 CPU 로딩 중... ({merged_model_path})")
+        model = AutoModelForCausalLM.from_pretrained(
+            merged_model_path,
+            torch_dtype=torch.float32,
+            attn_implementation="sdpa",
+            low_cpu_mem_usage=True,
+            use_safetensors=True,
+        )
+    else:
+        print("⏳ Base + LoRA 모델 CPU 로딩 중...")
+        base_model = AutoModelForCausalLM.from_pretrained(
+            base_model_name,
+            torch_dtype=torch.float32,
+            attn_implementation="sdpa",
+            low_cpu_mem_usage=True,
+        )
+        model = PeftModel.from_pretrained(base_model, lora_model_path).merge_and_unload()
+
+    if quantize:
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+# ====== [4] 프롬프트 구성 ======
+instruction = "아래 키워드를 바탕으로 환자 상태를 설명하고, 상담자 입장에서 적절한 진료 권장 대사를 작성하세요."
+
+NO_TREATMENT_TEXT = "해당 환자는 치료가 필요없습니다."
+
+# Few-shot 예시 (모든 요청에서 동일)
+FEW_SHOT_EXAMPLES = f"""Instruction: {instruction}
 Input: 위치: 치식번호 11, 문제: 치아 파절, 처치: 신경치료, 예상기간: 4주
 Output:
 {{
@@ -89,76 +207,208 @@ Output:
   "메모(메시지)": "보철비용은 병원마다 상이할 수 있음"
 }}
 
-Instruction: {instruction}
-Input: {input_text}
+"""
+
+# 요청마다 바뀌지 않는 프롬프트 앞부분 → KV 캐시 재사용 대상
+PROMPT_PREFIX = f"""{FEW_SHOT_EXAMPLES}Instruction: {instruction}
+"""
+
+# Few-shot 예시 포함 프롬프트
+def build_prompt(input_text):
+    return f"""{PROMPT_PREFIX}Input: {input_text}
 Output:
 """
 
-# ====== [7] 토크나이징 및 생성 ======
-inputs = tokenizer(prompt, return_tensors="pt").to(device)
-
-with torch.no_grad():
-    outputs = model.generate(
-        **inputs,
-        max_new_tokens=512,
-        do_sample=False,
-        temperature=0.7,
-        top_p=0.9,
-        repetition_penalty=1.1,
-        eos_token_id=tokenizer.eos_token_id,
-    )
-
-# ====== [8] 출력 처리 ======
-response = tokenizer.decode(outputs[0], skip_special_tokens=True)
-generated_text = response.split("Output:")[-1].strip()
-
-print("\n=== 모델 원본 출력 ===")
-print(generated_text)
-
-# ====== [9] JSON 후처리 및 치식 보정 ======
-TOOTH_MAP = {
-    "11": "#11(오른쪽위첫번째앞니)", "12": "#12(오른쪽위두번째앞니)", "13": "#13(오른쪽위송곳니)",
-    "14": "#14(오른쪽위첫째작은어금니)", "15": "#15(오른쪽위둘째작은어금니)", "16": "#16(오른쪽위첫째큰어금니)",
-    "17": "#17(오른쪽위둘째큰어금니)", "18": "#18(오른쪽위사랑니)",
-    "21": "#21(왼쪽위첫번째앞니)", "22": "#22(왼쪽위두번째앞니)", "23": "#23(왼쪽위송곳니)",
-    "24": "#24(왼쪽위첫째작은어금니)", "25": "#25(왼쪽위둘째작은어금니)", "26": "#26(왼쪽위첫째큰어금니)",
-    "27": "#27(왼쪽위둘째큰어금니)", "28": "#28(왼쪽위사랑니)",
-    "31": "#31(왼쪽아래첫번째앞니)", "32": "#32(왼쪽아래두번째앞니)", "33": "#33(왼쪽아래송곳니)",
-    "34": "#34(왼쪽아래첫째작은어금니)", "35": "#35(왼쪽아래둘째작은어금니)", "36": "#36(왼쪽아래첫째큰어금니)",
-    "37": "#37(왼쪽아래둘째큰어금니)", "38": "#38(왼쪽아래사랑니)",
-    "41": "#41(오른쪽아래첫번째앞니)", "42": "#42(오른쪽아래두번째앞니)", "43": "#43(오른쪽아래송곳니)",
-    "44": "#44(오른쪽아래첫째작은어금니)", "45": "#45(오른쪽아래둘째작은어금니)", "46": "#46(오른쪽아래첫째큰어금니)",
-    "47": "#47(오른쪽아래둘째큰어금니)", "48": "#48(오른쪽아래사랑니)"
-}
+# ====== 고정 프롬프트 KV 캐시 ======
+# 로딩된 모델마다 1회만 prefill 하고, 요청마다 복사본을 generate 에 넘겨 나머지(Input 이후)만 prefill
+# 배치는 모든 행이 prefix 로 시작할 때만(왼쪽 패딩이 없는 같은 길이 배치) 행 수만큼 복제해서 사용
+_prefix = None
+
+def get_prefix_cache(input_ids):
+    global _prefix
+    model = get_model()
+    # 토크나이저 / 모델 로딩은 model_registry 가 따로 잠그므로 _load_lock 밖에서 가져옴
+    tokenizer = get_tokenizer()
+    with _load_lock:
+        if _prefix is None or _prefix["model"] is not model:
+            start = time.perf_counter()
+            prefix_ids = tokenizer(PROMPT_PREFIX, return_tensors="pt").input_ids.to(device)
+            cache = DynamicCache()
+            with torch.no_grad():
+                model(input_ids=prefix_ids, past_key_values=cache, use_cache=True)
+            _prefix = {"model": model, "input_ids": prefix_ids, "cache": cache}
+            load_timings["prefix_cache_seconds"] = round(time.perf_counter() - start, 3)
 
-try:
+    # 전체 프롬프트의 토큰 앞부분이 캐시된 prefix 와 정확히 같을 때만 사용
+    prefix_ids = _prefix["input_ids"]
+    batch_size, length = input_ids.shape[0], prefix_ids.shape[1]
+    if input_ids.shape[1] <= length or not torch.equal(input_ids[:, :length], prefix_ids.expand(batch_size, -1)):
+        return None
+    cache = copy.deepcopy(_prefix["cache"])
+    if batch_size > 1:
+        cache.batch_repeat_interleave(batch_size)
+    return cache
+
+# ====== 생성 결과 캐시 ======
+# 키: 정규화된 입력 + 모델(베이스 + LoRA 체크포인트) 식별자 + 생성 설정
+_result_cache = None
+_model_identity = None
+
+def get_result_cache():
+    global _result_cache
+    with _load_lock:
+        if _result_cache is None and RESULT_CACHE_ENABLED:
+            _result_cache = ResultCache()
+    return _result_cache
+
+def result_cache_key(input_text, max_new_tokens, json_mode):
+    global _model_identity
+    if _model_identity is None:
+        if merged_checkpoint_available():
+            _model_identity = f"merged|{checkpoint_identity(merged_model_path)}"
+        else:
+            _model_identity = f"{base_model_name}|{checkpoint_identity(lora_model_path)}"
+    config = {**GENERATION_CONFIG, "max_new_tokens": max_new_tokens, "json_mode": json_mode}
+    if RULE_ENGINE:
+        config["rules"] = RULES_VERSION
+    if device == "cpu":
+        # int8 양자화 결과는 GPU(NF4) 결과와 다를 수 있으므로 따로 캐시
+        config["backend"] = "cpu-int8" if LLM_CPU_QUANTIZE else "cpu-fp32"
+    return make_key(input_text, _model_identity, config)
+
+# 규칙으로 채울 필드와 실제 사용할 JSON 모드
+# 규칙 값은 스키마 모드의 고정 조각으로 넣어 모델이 나머지 필드만 생성하게 함
+def plan_generation(input_text, json_mode):
+    rules = apply_rules(input_text) if RULE_ENGINE else {}
+    if rules and json_mode != "off":
+        json_mode = "schema"
+    return rules, json_mode
+
+# ====== [5] 토크나이징 및 생성 ======
+def generate(input_text, max_new_tokens=GENERATION_CONFIG["max_new_tokens"], json_mode=JSON_DECODING, speculative=SPECULATIVE):
+    # 규칙으로 모든 필드가 결정되면 모델 호출 생략
+    rules, json_mode = plan_generation(input_text, json_mode)
+    if is_fully_covered(rules):
+        return render_rules(rules)
+
+    # 캐시 적중 시 모델 로딩 / 생성 모두 생략
+    cache = get_result_cache()
+    if cache is not None:
+        cache_key = result_cache_key(input_text, max_new_tokens, json_mode)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    tokenizer = get_tokenizer()
+    model = get_model()
+    inputs = tokenizer(build_prompt(input_text), return_tensors="pt").to(device)
+
+    generate_kwargs = json_generate_kwargs(tokenizer, json_mode, inputs["input_ids"].shape[1], fixed_values=[rules])
+    if PREFIX_CACHE:
+        prefix_cache = get_prefix_cache(inputs["input_ids"])
+        if prefix_cache is not None:
+            generate_kwargs["past_key_values"] = prefix_cache
+
+    # speculative decoding: 후보 토큰을 본 모델이 검증 (prefix 캐시와 함께 써도 greedy 결과는 동일), 수락률은 step 수로 집계
+    counter = None
+    if speculative != "off":
+        generate_kwargs.update(speculative_kwargs(tokenizer, speculative))
+        counter = AcceptanceCounter(model, inputs["input_ids"].shape[1])
+        generate_kwargs["stopping_criteria"] = StoppingCriteriaList([*generate_kwargs.get("stopping_criteria", []), counter])
+
+    start = time.perf_counter()
+    with torch.no_grad(), counter or contextlib.nullcontext():
+        outputs = model.generate(
+            **inputs,
+            **generate_kwargs,
+            **{**GENERATION_CONFIG, "max_new_tokens": max_new_tokens},
+            eos_token_id=tokenizer.eos_token_id,
+        )
+    new_tokens = outputs[:, inputs["input_ids"].shape[1]:]
+    token_count = count_generated_tokens(new_tokens, tokenizer.eos_token_id)
+    record_generation("generate", time.perf_counter() - start, token_count)
+    if counter is not None:
+        counter.record(speculative, token_count)
+
+    generated_text = extract_generated_text(tokenizer.decode(outputs[0], skip_special_tokens=True), json_mode)
+    if cache is not None:
+        cache.put(cache_key, generated_text)
+    return generated_text
+
+# 디코딩된 전체 응답(프롬프트 포함) → 마지막 "Output:" 이후 생성 부분
+# JSON 모드에서는 닫는 중괄호 뒤에 같은 토큰으로 붙어 나온 꼬리도 제거
+def extract_generated_text(response, json_mode=JSON_DECODING):
+    generated_text = response.split("Output:")[-1].strip()
+    if json_mode in ("stop", "schema"):
+        generated_text = trim_json_tail(generated_text)
+    return generated_text
+
+# ====== [6] JSON 후처리 및 치식 보정 ======
+# 성공 시 dict, 실패 시 ValueError/SyntaxError 등 예외 발생
+def postprocess(generated_text, input_text):
     if generated_text.startswith('"') and generated_text.endswith('"'):
-        cleaned = {"응답": ast.literal_eval(generated_text)}
-        print("\n=== 문자열 출력 대응 결과 ===")
-        print(json.dumps(cleaned, ensure_ascii=False, indent=2))
-    else:
-        parsed = ast.literal_eval(generated_text)
-
-        # ✅ [1] 여러 치식번호 추출
-        tooth_nums = re.findall(r"#(\d{2})", input_text)
-        corrected_teeth = [TOOTH_MAP.get(num, f"#{num}(Unknown)") for num in tooth_nums]
-
-        # ✅ [2] 치식 필드 보정
-        if corrected_teeth:
-            if len(corrected_teeth) == 1:
-                parsed["치식"] = corrected_teeth[0]
-            else:
-                parsed["치식"] = corrected_teeth
-
-        # ✅ [3] 치료기간 → 예상기간 필드명 보정
-        if "치료기간" in parsed and "예상기간" not in parsed:
-            parsed["예상기간"] = parsed.pop("치료기간")
-        elif "기간" in parsed and "예상기간" not in parsed:
-            parsed["예상기간"] = parsed.pop("기간")
-
-        print("\n=== JSON 파싱 및 치식 보정 성공 ===")
+        return {"응답": ast.literal_eval(generated_text)}
+
+    parsed = ast.literal_eval(generated_text)
+
+    # ✅ [1] 여러 치식번호 추출
+    tooth_nums = re.findall(r"#(\d{2})", input_text)
+    corrected_teeth = [TOOTH_MAP.get(num, f"#{num}(Unknown)") for num in tooth_nums]
+
+    # ✅ [2] 치식 필드 보정
+    if corrected_teeth:
+        if len(corrected_teeth) == 1:
+            parsed["치식"] = corrected_teeth[0]
+        else:
+            parsed["치식"] = corrected_teeth
+
+    # ✅ [3] 테이블로 결정되는 필드는 규칙 값으로 고정 (스키마를 벗어난 출력 대비)
+    if RULE_ENGINE and isinstance(parsed, dict):
+        for key, value in apply_rules(input_text).items():
+            if key != "치식":
+                parsed[key] = value
+
+    # ✅ [4] 치료기간 → 예상기간 필드명 보정
+    if "치료기간" in parsed and "예상기간" not in parsed:
+        parsed["예상기간"] = parsed.pop("치료기간")
+    elif "기간" in parsed and "예상기간" not in parsed:
+        parsed["예상기간"] = parsed.pop("기간")
+
+    return parsed
+
+def main(transcript_path):
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        transcript_data = json.load(f)
+
+    input_text = extract_fields_from_transcript(transcript_data)
+
+    # ====== 치료 불필요 예외 처리 ======
+    if input_text.strip() == NO_TREATMENT_TEXT:
+        print("\n=== 치료 불필요 케이스입니다. 모델 호출을 생략합니다. ===")
+        return
+
+    print("=== LLM 입력 ===")
+    print("Instruction:")
+    print(instruction)
+    print("Input Text:")
+    print(input_text)
+
+    generated_text = generate(input_text)
+
+    print("\n=== 모델 원본 출력 ===")
+    print(generated_text)
+
+    try:
+        parsed = postprocess(generated_text, input_text)
+        if "응답" in parsed:
+            print("\n=== 문자열 출력 대응 결과 ===")
+        else:
+            print("\n=== JSON 파싱 및 치식 보정 성공 ===")
         print(json.dumps(parsed, ensure_ascii=False, indent=2))
-except Exception as e:
-    print("\n⚠️ JSON 파싱 실패:", e)
-    print("⚠️ 원본 출력 그대로 사용:")
-    print(generated_text)
\ No newline at end of file
+    except Exception as e:
+        print("\n⚠️ JSON 파싱 실패:", e)
+        print("⚠️ 원본 출력 그대로 사용:")
+        print(generated_text)
+
+if __name__ == "__main__":
+    main("C:/Users/user/Desktop/dentary/input/transcription_002.json")
@@ -0,0 +1,255 @@
+import json
+import torch
+from transformers import LogitsProcessor, LogitsProcessorList, StoppingCriteria, StoppingCriteriaList
+
+# 치료 계획 JSON 의 고정 키 (few-shot 예시와 같은 순서)
+SCHEMA_KEYS = [
+    "치식",
+    "치료분류",
+    "치료항목",
+    "치료항목1",
+    "치료항목2",
+    "치료항목3",
+    "치료기간",
+    "건강보험",
+    "관련수가코드",
+    "총진료비수가",
+    "본인부담금(30%/급여)",
+    "비급여비용",
+    "총부담비용",
+    "메모(메시지)",
+]
+
+class JsonTracker:
+    """문자 단위로 JSON 중괄호 깊이를 추적 (문자열 안의 중괄호 / 이스케이프는 무시)."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.closed = False
+
+    # text 를 소비하고, 최상위 객체가 닫히면 닫힌 위치 다음 인덱스를 반환
+    def feed(self, text):
+        for i, ch in enumerate(text):
+            if self.closed:
+                return None
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = self.started
+            elif ch == "{":
+                self.depth += 1
+                self.started = True
+            elif ch == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.closed = True
+                    return i + 1
+        return None
+
+# 최상위 JSON 객체가 닫힌 뒤의 꼬리 텍스트 제거 (닫히지 않았으면 그대로)
+def trim_json_tail(text):
+    end = JsonTracker().feed(text)
+    return text[:end] if end is not None else text
+
+class JsonStoppingCriteria(StoppingCriteria):
+    """생성된 최상위 JSON 객체의 닫는 중괄호에서 행 단위로 생성 종료.
+
+    assisted decoding 처럼 한 step 에 여러 토큰이 붙는 경우도 있으므로 (첫 step 포함)
+    프롬프트 길이부터 시작해 지난 호출 이후의 토큰을 모두 읽는다.
+    """
+
+    def __init__(self, tokenizer, prompt_length):
+        self.tokenizer = tokenizer
+        self.trackers = None
+        self.length = prompt_length
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.trackers is None:
+            self.trackers = [JsonTracker() for _ in range(input_ids.shape[0])]
+        new_tokens = input_ids[:, self.length:].tolist()
+        self.length = input_ids.shape[1]
+        for tracker, token_ids in zip(self.trackers, new_tokens):
+            for token_id in token_ids:
+                if tracker.closed:
+                    break
+                tracker.feed(self.tokenizer.decode([token_id]))
+        return torch.tensor([t.closed for t in self.trackers], dtype=torch.bool, device=input_ids.device)
+
+# 텍스트 조각의 토큰 id (문장 시작 처리 영향을 받지 않도록 줄바꿈 앵커 뒤에서 인코딩)
+def encode_fragment(tokenizer, text):
+    if not text:
+        return []
+    anchor = tokenizer.encode("\n", add_special_tokens=False)
+    ids = tokenizer.encode("\n" + text, add_special_tokens=False)
+    fragment = ids[len(anchor):]
+    if ids[:len(anchor)] != anchor or tokenizer.decode(fragment, clean_up_tokenization_spaces=False) != text:
+        raise ValueError(f"토큰 경계가 맞지 않는 조각: {text!r}")
+    return fragment
+
+# 키 사이의 고정 텍스트. segments[0] 은 '{' 부터 첫 생성 값의 여는 따옴표까지,
+# segments[k] 는 k번째 생성 값의 닫는 따옴표부터 다음 생성 값의 여는 따옴표까지 (마지막은 '}' 까지)
+# fixed_values 에 있는 키는 값까지 고정 텍스트에 포함되어 모델이 생성하지 않음
+def build_schema_segments(keys=SCHEMA_KEYS, fixed_values=None):
+    fixed_values = fixed_values or {}
+    segments = []
+    current = "{\n"
+    for i, key in enumerate(keys):
+        separator = ",\n" if i else ""
+        if key in fixed_values:
+            value = json.dumps(str(fixed_values[key]), ensure_ascii=False)
+            current += f'{separator}  "{key}": {value}'
+        else:
+            segments.append(f'{current}{separator}  "{key}": "')
+            current = '"'
+    segments.append(current + "\n}")
+    return segments
+
+# 토크나이저별로 따옴표 / 줄바꿈 / 역슬래시가 들어간 토큰 목록 (vocab 전체 디코딩은 1회만)
+_special_tokens_cache = {}
+
+def special_value_tokens(tokenizer):
+    key = id(tokenizer)
+    if key not in _special_tokens_cache:
+        special = []
+        for token_id in range(len(tokenizer)):
+            text = tokenizer.decode([token_id])
+            if '"' in text or "\n" in text or "\\" in text:
+                special.append((token_id, text))
+        _special_tokens_cache[key] = special
+    return _special_tokens_cache[key]
+
+class JsonSchemaLogitsProcessor(LogitsProcessor):
+    """키와 구분자는 강제로 채우고 모델은 값(문자열)만 생성하도록 토큰을 제한.
+
+    값 생성 중에는 줄바꿈 / 역슬래시 / EOS 와, 다음 고정 조각과 이어지지 않는 닫는 따옴표 토큰을 막고,
+    닫는 따옴표가 나오면 다음 고정 조각을 토큰 단위로 강제한다.
+    fixed_values (행별 dict 목록) 로 값이 정해진 키는 고정 조각에 포함되어 생성 단계 없이 채워진다.
+    그래도 스키마와 어긋나는 행은 그 시점부터 제한을 풀고 자유 생성으로 둔다.
+
+    assisted decoding 에서는 draft 후보 위치마다 호출되고 거절된 후보는 되돌려지므로,
+    행마다 생성 토큰별 상태를 남겨 두고 호출된 시퀀스와 공통인 지점부터 상태를 다시 계산한다.
+    """
+
+    def __init__(self, tokenizer, prompt_length, keys=SCHEMA_KEYS, fixed_values=None):
+        self.tokenizer = tokenizer
+        self.keys = keys
+        self.fixed_values = fixed_values
+        self._fragments = {}
+        self._blocked = {}
+        self.rows = None
+        self.start = prompt_length
+        self.history = None  # 행별 [(토큰 id, 그 토큰까지 반영한 상태)]
+
+    def _encode(self, text):
+        if text not in self._fragments:
+            self._fragments[text] = encode_fragment(self.tokenizer, text)
+        return self._fragments[text]
+
+    # 다음 고정 조각 앞의 값 생성 단계에서 막을 토큰 id
+    def _blocked_ids(self, segment):
+        if segment not in self._blocked:
+            blocked = [self.tokenizer.eos_token_id]
+            for token_id, text in special_value_tokens(self.tokenizer):
+                value_part, quote, rest = text.partition('"')
+                if "\n" in value_part or "\\" in value_part or (quote and not segment.startswith(quote + rest)):
+                    blocked.append(token_id)
+            self._blocked[segment] = blocked
+        return self._blocked[segment]
+
+    def _init_row(self, fixed_values):
+        segments = build_schema_segments(self.keys, fixed_values)
+        state = {"segments": segments, "segment": 1, "forced": [], "escape": False, "free": False}
+        try:
+            state["forced"] = list(self._encode(segments[0]))
+        except ValueError:
+            state["free"] = True
+        return state
+
+    def _close_value(self, state, token_text):
+        # 값 안에서 이스케이프되지 않은 닫는 따옴표를 찾고, 같은 토큰에 붙어 나온 뒷부분을 확인
+        for i, ch in enumerate(token_text):
+            if state["escape"]:
+                state["escape"] = False
+            elif ch == "\\":
+                state["escape"] = True
+            elif ch == '"':
+                segment = state["segments"][state["segment"]]
+                emitted = token_text[i:]
+                if not segment.startswith(emitted):
+                    state["free"] = True
+                    return
+                try:
+                    state["forced"] = list(self._encode(segment[len(emitted):]))
+                except ValueError:
+                    state["free"] = True
+                    return
+                state["segment"] += 1
+                return
+
+    def _update(self, state, token_id):
+        if state["free"]:
+            return
+        if state["forced"]:
+            if state["forced"].pop(0) != token_id:
+                state["free"] = True
+            return
+        if state["segment"] < len(state["segments"]):
+            self._close_value(state, self.tokenizer.decode([token_id]))
+
+    # 생성된 토큰 목록에 맞는 행 상태 (이전 호출과 공통인 앞부분까지의 상태는 재사용)
+    def _state_for(self, row, token_ids):
+        history = self.history[row]
+        if [token_id for token_id, _ in history] != token_ids[:len(history)]:
+            common = 0
+            while common < min(len(history), len(token_ids)) and history[common][0] == token_ids[common]:
+                common += 1
+            del history[common:]
+        state = history[-1][1] if history else self.rows[row]
+        for token_id in token_ids[len(history):]:
+            state = {**state, "forced": list(state["forced"])}
+            self._update(state, token_id)
+            history.append((token_id, state))
+        return state
+
+    def __call__(self, input_ids, scores):
+        if self.rows is None:
+            batch_size = input_ids.shape[0]
+            fixed_values = self.fixed_values or [None] * batch_size
+            self.rows = [self._init_row(fixed_values[row]) for row in range(batch_size)]
+            self.history = [[] for _ in range(batch_size)]
+        generated = input_ids[:, self.start:].tolist()
+        states = [self._state_for(row, token_ids) for row, token_ids in enumerate(generated)]
+
+        for row, state in enumerate(states):
+            if state["free"] or state["segment"] >= len(state["segments"]) and not state["forced"]:
+                continue
+            if state["forced"]:
+                forced_id = state["forced"][0]
+                forced_score = scores[row, forced_id].clone()
+                scores[row, :] = -float("inf")
+                scores[row, forced_id] = forced_score if torch.isfinite(forced_score) else 0.0
+            else:
+                scores[row, self._blocked_ids(state["segments"][state["segment"]])] = -float("inf")
+        return scores
+
+# 생성 모드별 generate 인자
+# - "stop": 최상위 JSON 이 닫히면 종료
+# - "schema": 종료 + 고정 키 스키마 강제 (fixed_values: 행별로 미리 채울 값)
+# prompt_length: 패딩 포함 입력 길이 (이 위치부터가 생성 토큰)
+def json_generate_kwargs(tokenizer, mode, prompt_length, fixed_values=None):
+    if mode not in ("stop", "schema"):
+        return {}
+    kwargs = {"stopping_criteria": StoppingCriteriaList([JsonStoppingCriteria(tokenizer, prompt_length)])}
+    if mode == "schema":
+        kwargs["logits_processor"] = LogitsProcessorList([
+            JsonSchemaLogitsProcessor(tokenizer, prompt_length, fixed_values=fixed_values)
+        ])
+    return kwargs
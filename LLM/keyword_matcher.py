@@ -0,0 +1,65 @@
+from collections import deque
+
+class KeywordMatcher:
+    """Aho-Corasick 오토마톤.
+
+    등록한 모든 키워드를 텍스트를 한 번만 순회하면서 (겹치는 경우까지) 찾는다.
+    순회 비용은 텍스트 길이에만 비례하고 키워드 개수와는 무관하다.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        self.always = []  # 빈 키워드: 항상 매칭
+        self.built = False
+
+    def add(self, keyword, value):
+        if not keyword:
+            self.always.append(value)
+            return
+        state = 0
+        for ch in keyword:
+            next_state = self.goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.goto[state][ch] = next_state
+            state = next_state
+        self.outputs[state].append(value)
+        self.built = False
+
+    # 실패 링크 계산 (BFS) 및 출력 병합
+    def build(self):
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                fail = self.fail[state]
+                while fail and ch not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(ch, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+                queue.append(next_state)
+        self.built = True
+        return self
+
+    def step(self, state, ch):
+        while state and ch not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(ch, 0)
+
+    def find_all(self, text):
+        if not self.built:
+            self.build()
+        found = list(self.always)
+        state = 0
+        for ch in text:
+            state = self.step(state, ch)
+            if self.outputs[state]:
+                found.extend(self.outputs[state])
+        return found
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import torch
+
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+# 히스토그램은 공용 레지스트리에 등록되어 STT 서버의 /metrics 에 함께 출력됨
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.prometheus import Histogram
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 4096)
+ACCEPTANCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+STEP_BUCKETS = (1, 1.5, 2, 3, 4, 6, 8, 12)
+
+stage_seconds = Histogram("llm_stage_seconds", "단계별 처리 시간(초)", LATENCY_BUCKETS)
+generated_tokens = Histogram("llm_generated_tokens", "model.generate 1회 생성 토큰 수", TOKEN_BUCKETS)
+tokens_per_second = Histogram("llm_tokens_per_second", "model.generate 생성 처리량 (tokens/sec)", RATE_BUCKETS)
+queue_wait_seconds = Histogram("llm_queue_wait_seconds", "배치 대기열에서 기다린 시간(초)", LATENCY_BUCKETS, label="queue")
+speculative_acceptance = Histogram("llm_speculative_acceptance_rate", "generate 1회의 draft 후보 수락률", ACCEPTANCE_BUCKETS, label="mode")
+speculative_tokens_per_step = Histogram("llm_speculative_tokens_per_step", "본 모델 검증 step 1회당 생성 토큰 수", STEP_BUCKETS, label="mode")
+
+def record_generation(stage, seconds, tokens):
+    stage_seconds.observe(stage, seconds)
+    generated_tokens.observe(stage, tokens)
+    if seconds > 0:
+        tokens_per_second.observe(stage, tokens / seconds)
+
+# 행마다 첫 EOS 까지(포함)의 토큰 수 합계 (이후는 패딩)
+def count_generated_tokens(new_tokens, eos_token_id):
+    is_eos = new_tokens == eos_token_id
+    has_eos = is_eos.any(dim=1)
+    first_eos = is_eos.int().argmax(dim=1)
+    lengths = torch.where(has_eos, first_eos + 1, torch.full_like(first_eos, new_tokens.shape[1]))
+    return int(lengths.sum())
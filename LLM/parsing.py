@@ -2,6 +2,8 @@ import json
 import re
 import os
 
+from keyword_matcher import KeywordMatcher
+
 LOCATION_MAP_PATH = os.path.join(os.path.dirname(__file__), "location_map_refined.json")
 try:
     with open(LOCATION_MAP_PATH, "r", encoding="utf-8") as f:
@@ -41,18 +43,20 @@ def normalize_korean_text(text):
     text = text.replace("작은 어금니", "작은어금니").replace("큰 어금니", "큰어금니")
     return text.replace(" ", "")
 
-def extract_durations(text: str):
-    patterns = [
+DURATION_PATTERNS = [
+    re.compile(pattern) for pattern in [
         r"\d+\s*개월\s*에서\s*\d+\s*개월",
         r"\d+\s*~\s*\d+\s*(일|주|개월)",
         r"(약\s*)?\d+\s*(일|주|개월)",
         r"\d+\s*(일|주|개월)\s*정도",
         r"\d+\s*(일|주|개월)\s*간"
     ]
+]
 
+def extract_durations(text: str):
     matches = []
-    for pattern in patterns:
-        found = re.findall(pattern, text)
+    for pattern in DURATION_PATTERNS:
+        found = pattern.findall(text)
         # 정규식 결과가 튜플일 수 있으므로 처리
         for f in found:
             if isinstance(f, tuple):
@@ -64,12 +68,96 @@ def extract_durations(text: str):
     matches = [m for m in matches if re.search(r"\d+", m)]
     return list(set(matches))
 
+# 문제 키워드 (우선순위 순). 기존 정규식 패턴을 리터럴로 펼친 것
+PROBLEM_KEYWORDS = [
+    ("깨짐", ["깨졌", "깨짐", "깨진", "깨지", "깨질", "깨져", "금가서", "금이나서"]),
+    ("파손", ["부러졌", "부러짐", "부러진", "부러져", "부러질", "부러져서", "파손"]),
+    ("통증", ["아파요", "아파서", "아프다", "아픔", "아팠어", "아팠어요", "아팟어요", "통증"]),
+    ("시림", ["시리다", "시려서", "시림", "시려요"]),
+    ("붓기", ["붓기", "부었", "부어서"]),
+    ("염증", ["염증"]),
+    ("출혈", ["출혈", "피"]),
+    ("잇몸 문제", ["잇몸"]),
+    ("충치", ["충치"]),
+]
+
+# ====== 필드 추출 인덱스 (모듈 로딩 시 1회 생성) ======
+# raw: 원문 그대로 매칭 (문제, 처치) / compact: 공백을 무시하고 매칭 (위치)
+# 값은 (필드, 우선순위, 결과) → 필드별로 우선순위가 가장 높은 매칭을 사용
+def build_field_index(location_map):
+    raw = KeywordMatcher()
+    compact = KeywordMatcher()
+    # 정규식 특수문자(공백 포함)가 있는 위치 키는 기존 패턴과 동일하게 동작하도록 그대로 컴파일
+    # (이 패턴들은 원문에 '\\' 가 있어야만 매칭됨)
+    escaped_locations = []
+
+    for priority, (desc, code) in enumerate(location_map.items()):
+        if re.escape(desc) != desc:
+            pattern = re.sub(r"\s*", r"\\s*", re.escape(desc))
+            escaped_locations.append((priority, re.compile(pattern), code))
+        else:
+            compact.add("".join(ch for ch in desc if not ch.isspace()), ("location", priority, code))
+
+    for priority, (label, keywords) in enumerate(PROBLEM_KEYWORDS):
+        for keyword in keywords:
+            raw.add(keyword, ("problem", priority, label))
+
+    for priority, keyword in enumerate(TREATMENT_DURATION_MAP):
+        raw.add(keyword, ("treatment", priority, keyword))
+
+    return {"raw": raw.build(), "compact": compact.build(), "escaped_locations": escaped_locations}
+
+FIELD_INDEX = build_field_index(location_map)
+
+# 텍스트를 한 번 순회하며 위치 / 문제 / 처치를 모두 찾음
+def scan_fields(text, index=FIELD_INDEX):
+    raw, compact = index["raw"], index["compact"]
+    best = {}
+
+    def collect(values):
+        for field, priority, result in values:
+            if field not in best or priority < best[field][0]:
+                best[field] = (priority, result)
+
+    collect(compact.always)
+    raw_state = compact_state = 0
+    for ch in text:
+        raw_state = raw.step(raw_state, ch)
+        if raw.outputs[raw_state]:
+            collect(raw.outputs[raw_state])
+        if not ch.isspace():
+            compact_state = compact.step(compact_state, ch)
+            if compact.outputs[compact_state]:
+                collect(compact.outputs[compact_state])
+
+    if "\\" in text:
+        for priority, pattern, code in index["escaped_locations"]:
+            if "location" in best and best["location"][0] < priority:
+                break
+            if pattern.search(text):
+                best["location"] = (priority, code)
+                break
+
+    return {field: result for field, (_, result) in best.items()}
+
+# location_map 별 정규화 키 인덱스 캐시
+_normalized_location_index = {}
+
+def build_normalized_location_index(location_map):
+    matcher = KeywordMatcher()
+    for priority, (key, value) in enumerate(location_map.items()):
+        matcher.add(normalize_korean_text(key), (priority, value))
+    return matcher.build()
+
 def extract_location_from_text(text, location_map):
-    norm_text = normalize_korean_text(text)
-    for key, value in location_map.items():
-        norm_key = normalize_korean_text(key)
-        if norm_key in norm_text:
-            return f"치식번호 {value}"
+    cached = _normalized_location_index.get(id(location_map))
+    if cached is None or cached[0] is not location_map:
+        cached = (location_map, build_normalized_location_index(location_map))
+        _normalized_location_index[id(location_map)] = cached
+
+    hits = cached[1].find_all(normalize_korean_text(text))
+    if hits:
+        return f"치식번호 {min(hits, key=lambda hit: hit[0])[1]}"
     match = re.search(r"(치식번호\s*[\d#]+|#\d+)", text)
     if match:
         return match.group(0).replace(" ", "")
@@ -79,39 +167,11 @@ def extract_fields_from_transcript(transcript_json):
     full_text = " ".join([item["text"].strip() for item in transcript_json])
     full_text = full_text.replace("  ", " ").strip()
 
-    # 위치 추출
-    location = None
-    for desc, code in location_map.items():
-        pattern = re.sub(r"\s*", r"\\s*", re.escape(desc))
-        if re.search(pattern, full_text):
-            location = f"#" + code
-            break
-
-    # 문제 추출
-    problem_patterns = {
-        r"깨(졌|짐|진|지|질|져)": "깨짐",
-        r"금(가서|이나서)" : "깨짐",
-        r"부러(졌|짐|진|져|질|져서)" : "파손",
-        r"파손": "파손",
-        r"아(파요|파서|프다|픔|팠어|팠어요|팟어요)" : "통증",
-        r"통증": "통증",
-        r"시(리다|려서|림|려요)" : "시림",
-        r"붓기|부었|부어서": "붓기",
-        r"염증": "염증",
-        r"출혈|피": "출혈",
-        r"잇몸": "잇몸 문제",
-        r"충치": "충치"
-    }
-    
-    problem = None
-    for pattern, label in problem_patterns.items():
-        if re.search(pattern, full_text):
-            problem = label
-            break
-
-    # 처치 추출
-    treatment_keywords = list(TREATMENT_DURATION_MAP.keys())
-    treatment = next((kw for kw in treatment_keywords if kw in full_text), None)
+    # 위치 / 문제 / 처치 추출 (한 번 순회)
+    fields = scan_fields(full_text)
+    location = f"#" + fields["location"] if "location" in fields else None
+    problem = fields.get("problem")
+    treatment = fields.get("treatment")
 
     # 기간 추출
     duration_matches = extract_durations(full_text)
@@ -129,4 +189,4 @@ def extract_fields_from_transcript(transcript_json):
     treatment_str = f"처치: {treatment or '미확인'}"
     duration_str = f"예상기간: {duration or '미확인'}"
 
-    return f"{location_str}, {problem_str}, {treatment_str}, {duration_str}"
\ No newline at end of file
+    return f"{location_str}, {problem_str}, {treatment_str}, {duration_str}"
\ No newline at end of file
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ====== 결과 캐시 설정 ======
+RESULT_CACHE_ENABLED = os.getenv("LLM_RESULT_CACHE", "1") == "1"
+RESULT_CACHE_PATH = os.getenv("LLM_RESULT_CACHE_PATH", "cache/llm_results.sqlite")
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_RESULT_CACHE_MEMORY_ENTRIES", "1024"))
+RESULT_CACHE_DISK_MB = float(os.getenv("LLM_RESULT_CACHE_DISK_MB", "256"))
+
+# 디스크 용량 초과 시 한 번에 살펴볼 오래된 항목 수 (last_access 인덱스 순서로 LIMIT 조회)
+EVICT_SCAN_ROWS = 64
+
+# "위치: #16, 문제: 통증, ..." 형태 입력의 공백 차이를 없앤 캐시용 정규형
+def normalize_input(input_text):
+    text = re.sub(r"\s+", " ", input_text.strip())
+    return re.sub(r"\s*([,:])\s*", r"\1 ", text).strip()
+
+# LoRA 체크포인트 식별자: 경로 + 어댑터 파일들의 크기/수정 시각
+def checkpoint_identity(path):
+    if not os.path.isdir(path):
+        return path
+    parts = [os.path.abspath(path)]
+    for name in sorted(os.listdir(path)):
+        if name.startswith("adapter_") or name.endswith((".safetensors", ".bin")):
+            stat = os.stat(os.path.join(path, name))
+            parts.append(f"{name}:{stat.st_size}:{int(stat.st_mtime)}")
+    return "|".join(parts)
+
+def make_key(input_text, model_identity, generation_config):
+    payload = json.dumps(
+        {"input": normalize_input(input_text), "model": model_identity, "config": generation_config},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """생성 결과 2단 캐시: 프로세스 내 LRU + 디스크(SQLite).
+
+    메모리는 항목 개수, 디스크는 값 크기 합계 기준으로 가장 오래 사용되지 않은 항목부터 제거한다.
+    디스크 크기 합계는 열 때 한 번만 계산하고 이후에는 put / 제거 때마다 갱신한다.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, memory_entries=RESULT_CACHE_MEMORY_ENTRIES, disk_mb=RESULT_CACHE_DISK_MB):
+        self.memory_entries = memory_entries
+        self.disk_bytes = int(disk_mb * 1024 * 1024)
+        self.memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db = None
+        self.disk_used = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results(last_access)")
+            self.db.commit()
+            self.disk_used = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def get(self, key):
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return self.memory[key]
+
+            if self.db is not None:
+                row = self.db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.db.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self.db.commit()
+                    self.disk_hits += 1
+                    self._remember(key, row[0])
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self.db is None:
+                return
+            size = len(value.encode("utf-8"))
+            row = self.db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self.disk_used += size - (row[0] if row else 0)
+            self._evict_disk()
+            self.db.commit()
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    # 디스크 용량 초과 시 오래된 항목부터 제거 (인덱스 순서로 LIMIT 만큼만 읽고, 필요한 키만 한 번에 삭제)
+    def _evict_disk(self):
+        while self.disk_used > self.disk_bytes:
+            rows = self.db.execute(
+                "SELECT key, size FROM results ORDER BY last_access LIMIT ?", (EVICT_SCAN_ROWS,)
+            ).fetchall()
+            if not rows:
+                self.disk_used = 0
+                return
+            keys = []
+            for key, size in rows:
+                if self.disk_used <= self.disk_bytes:
+                    break
+                self.memory.pop(key, None)
+                self.disk_used -= size
+                keys.append(key)
+            self.db.execute(f"DELETE FROM results WHERE key IN ({', '.join('?' * len(keys))})", keys)
+            self.evictions += len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self.memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_bytes": self.disk_used,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,130 @@
+import time
+
+import torch
+from transformers import TrainerCallback
+
+IGNORE_INDEX = -100
+
+# 예제 길이 목록 → 묶음(예제 인덱스 목록) 목록. 긴 예제부터 남는 자리가 있는 첫 묶음에 넣음 (first-fit decreasing)
+def plan_packs(lengths, max_seq_length):
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    packs = []
+    remaining = []
+    for i in order:
+        length = min(lengths[i], max_seq_length)
+        for p, space in enumerate(remaining):
+            if length <= space:
+                packs[p].append(i)
+                remaining[p] -= length
+                break
+        else:
+            packs.append([i])
+            remaining.append(max_seq_length - length)
+    return packs
+
+def pack_examples(batch, max_seq_length):
+    """datasets.map(batched=True) 용: 토큰화된 예제들을 max_seq_length 이하의 긴 시퀀스로 이어 붙임.
+
+    position_ids 는 예제마다 0부터 다시 시작하며, 콜레이터가 이를 경계로 예제 간 어텐션을 막는다.
+    """
+    sequences = [ids[:max_seq_length] for ids in batch["input_ids"]]
+    packed = {"input_ids": [], "position_ids": [], "length": []}
+    for pack in plan_packs([len(ids) for ids in sequences], max_seq_length):
+        input_ids = []
+        position_ids = []
+        for i in pack:
+            input_ids.extend(sequences[i])
+            position_ids.extend(range(len(sequences[i])))
+        packed["input_ids"].append(input_ids)
+        packed["position_ids"].append(position_ids)
+        packed["length"].append(len(input_ids))
+    return packed
+
+class TokenCountingCollator:
+    """패딩 / 라벨 / 어텐션 마스크를 만들고, 실제(패딩 제외) 토큰 수를 누적하는 콜레이터.
+
+    - packed=False: 배치 내 최장 길이로 오른쪽 패딩, 패딩 위치는 라벨 제외
+    - packed=True: position_ids 가 0 인 위치를 예제 시작으로 보고 블록 대각 causal 마스크를 만듦
+      (flash_attention_2 는 position_ids 만으로 경계를 처리하므로 4D 마스크를 만들지 않음)
+    """
+
+    def __init__(self, pad_token_id, packed=False, attn_implementation="sdpa", mask_dtype=torch.float16):
+        self.pad_token_id = pad_token_id
+        self.packed = packed
+        self.build_4d_mask = packed and attn_implementation != "flash_attention_2"
+        self.mask_dtype = mask_dtype
+        self.tokens = 0
+        self.padded_tokens = 0
+
+    def __call__(self, features):
+        max_length = max(len(f["input_ids"]) for f in features)
+        input_ids = torch.full((len(features), max_length), self.pad_token_id, dtype=torch.long)
+        labels = torch.full((len(features), max_length), IGNORE_INDEX, dtype=torch.long)
+        attention_mask = torch.zeros((len(features), max_length), dtype=torch.long)
+        position_ids = torch.zeros((len(features), max_length), dtype=torch.long)
+
+        for row, feature in enumerate(features):
+            ids = torch.tensor(feature["input_ids"], dtype=torch.long)
+            length = ids.shape[0]
+            input_ids[row, :length] = ids
+            labels[row, :length] = ids
+            attention_mask[row, :length] = 1
+            if self.packed:
+                position_ids[row, :length] = torch.tensor(feature["position_ids"], dtype=torch.long)
+            else:
+                position_ids[row, :length] = torch.arange(length)
+
+        if self.packed:
+            # 각 예제의 첫 토큰은 앞 예제에서 예측하지 않도록 라벨 제외 (첫 예제는 원래 예측 대상 아님)
+            labels[(position_ids == 0) & (attention_mask == 1)] = IGNORE_INDEX
+
+        self.tokens += int(attention_mask.sum())
+        self.padded_tokens += input_ids.numel()
+
+        batch = {"input_ids": input_ids, "labels": labels, "position_ids": position_ids}
+        batch["attention_mask"] = self._block_causal_mask(position_ids, attention_mask) if self.build_4d_mask else attention_mask
+        return batch
+
+    # (B, 1, L, L) 더하기 마스크: 같은 예제 안에서 자기 이전 위치만 0, 나머지는 최솟값
+    def _block_causal_mask(self, position_ids, attention_mask):
+        starts = ((position_ids == 0) & (attention_mask == 1)).long()
+        segment_ids = torch.cumsum(starts, dim=1) * attention_mask
+        length = position_ids.shape[1]
+        causal = torch.tril(torch.ones((length, length), dtype=torch.bool))
+        same_segment = segment_ids[:, :, None] == segment_ids[:, None, :]
+        allowed = same_segment & causal[None] & (attention_mask[:, None, :] == 1)
+        # 패딩 위치도 자기 자신은 보게 해서 softmax 가 NaN 이 되지 않도록 함 (라벨은 제외되어 있음)
+        allowed |= torch.eye(length, dtype=torch.bool)[None]
+        mask = torch.full(allowed.shape, torch.finfo(self.mask_dtype).min, dtype=self.mask_dtype)
+        mask.masked_fill_(allowed, 0.0)
+        return mask[:, None]
+
+class TokenThroughputCallback(TrainerCallback):
+    """logging_steps 마다 실제 학습 토큰 기준 tokens/sec 와 패딩 비율을 로그에 추가."""
+
+    def __init__(self, collator):
+        self.collator = collator
+        self.start = None
+        self.last_time = None
+        self.last_tokens = 0
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self.start = self.last_time = time.perf_counter()
+        self.last_tokens = self.collator.tokens
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        if logs is None or self.start is None:
+            return
+        now = time.perf_counter()
+        tokens = self.collator.tokens
+        if now > self.last_time:
+            logs["tokens_per_sec"] = round((tokens - self.last_tokens) / (now - self.last_time), 1)
+        if self.collator.padded_tokens:
+            logs["padding_ratio"] = round(1 - tokens / self.collator.padded_tokens, 3)
+        self.last_time = now
+        self.last_tokens = tokens
+
+    def on_train_end(self, args, state, control, **kwargs):
+        elapsed = time.perf_counter() - self.start
+        tokens = self.collator.tokens
+        print(f"⏱️ 학습 토큰 {tokens}개, {elapsed:.1f}초, 평균 {tokens / elapsed:.1f} tokens/sec")
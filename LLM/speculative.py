@@ -0,0 +1,149 @@
+import os
+import sys
+import threading
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteria
+
+from llm_metrics import speculative_acceptance, speculative_tokens_per_step
+
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import model_registry
+
+# ====== Speculative (assisted) decoding 설정 ======
+# "off" / "prompt_lookup"(프롬프트의 few-shot 예시에서 n-gram 으로 후보 제안) / "draft"(작은 draft 모델이 후보 제안)
+# 후보는 본 모델이 한 번의 forward 로 검증하므로 greedy 출력은 일반 생성과 같다 (배치 크기 1 에서만 사용)
+SPECULATIVE = os.getenv("LLM_SPECULATIVE", "off")
+PROMPT_LOOKUP_TOKENS = int(os.getenv("LLM_PROMPT_LOOKUP_TOKENS", "10"))
+PROMPT_LOOKUP_NGRAM = int(os.getenv("LLM_PROMPT_LOOKUP_NGRAM", "3"))
+DRAFT_MODEL_PATH = os.getenv("LLM_DRAFT_MODEL_PATH", "")
+DRAFT_TOKENS = int(os.getenv("LLM_DRAFT_TOKENS", "5"))
+
+SPECULATIVE_MODES = ("off", "prompt_lookup", "draft")
+
+# ====== draft 모델 지연 로딩 ======
+# 본 모델과 같은 model_registry 에 "llm_draft" 로 등록 (경로가 설정된 경우만 → warmup() 대상)
+draft_load_timings = {}
+
+def load_draft_model():
+    """(draft 모델, draft 토크나이저) 반환. 토크나이저가 본 모델과 같으면 토크나이저는 None."""
+    print(f"⏳ draft 모델 로딩 중... ({DRAFT_MODEL_PATH})")
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = AutoModelForCausalLM.from_pretrained(
+        DRAFT_MODEL_PATH,
+        torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+        low_cpu_mem_usage=True,
+    ).to(device)
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(DRAFT_MODEL_PATH, use_fast=True)
+    # 어휘가 다르면 텍스트를 거쳐 후보를 옮기는 universal assisted decoding 사용
+    same_vocab = tokenizer.get_vocab() == model_registry.get("llm_tokenizer").get_vocab()
+    draft_load_timings["draft_same_vocab"] = same_vocab
+    return model, None if same_vocab else tokenizer
+
+if DRAFT_MODEL_PATH:
+    model_registry.register("llm_draft", load_draft_model)
+
+def get_draft_model():
+    if not DRAFT_MODEL_PATH:
+        raise ValueError("LLM_SPECULATIVE=draft 에는 LLM_DRAFT_MODEL_PATH 가 필요합니다.")
+    return model_registry.get("llm_draft")
+
+# mode 에 맞는 generate 인자 (batch_size > 1 이면 assisted decoding 을 지원하지 않으므로 빈 dict)
+def speculative_kwargs(tokenizer, mode=SPECULATIVE, batch_size=1):
+    if mode not in SPECULATIVE_MODES:
+        raise ValueError(f"알 수 없는 speculative 모드: {mode}")
+    if mode == "off" or batch_size != 1:
+        return {}
+    if mode == "prompt_lookup":
+        return {"prompt_lookup_num_tokens": PROMPT_LOOKUP_TOKENS, "max_matching_ngram_size": PROMPT_LOOKUP_NGRAM}
+
+    draft_model, draft_tokenizer = get_draft_model()
+    kwargs = {"assistant_model": draft_model, "num_assistant_tokens": DRAFT_TOKENS}
+    if draft_tokenizer is not None:
+        kwargs.update(tokenizer=tokenizer, assistant_tokenizer=draft_tokenizer)
+    return kwargs
+
+# ====== 수락률 집계 ======
+class SpeculationStats:
+    """생성 step 수와 draft 후보 / 수락 토큰 수 누적."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.generations = 0
+        self.steps = 0
+        self.drafted = 0
+        self.accepted = 0
+        self.tokens = 0
+
+    def add(self, steps, drafted, accepted, tokens):
+        with self._lock:
+            self.generations += 1
+            self.steps += steps
+            self.drafted += drafted
+            self.accepted += accepted
+            self.tokens += tokens
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "generations": self.generations,
+                "steps": self.steps,
+                "drafted_tokens": self.drafted,
+                "accepted_tokens": self.accepted,
+                "generated_tokens": self.tokens,
+                "acceptance_rate": round(self.accepted / self.drafted, 4) if self.drafted else 0.0,
+                "tokens_per_step": round(self.tokens / self.steps, 3) if self.steps else 0.0,
+            }
+
+speculation_stats = SpeculationStats()
+
+def _forward_module(model):
+    # PeftModel 은 generate 를 베이스 모델에 넘기므로 forward 도 베이스 모델에서 일어남
+    return model.get_base_model() if hasattr(model, "get_base_model") else model
+
+class AcceptanceCounter(StoppingCriteria):
+    """generate 1회 동안 본 모델의 검증 step 과 draft 후보 수를 셈 (항상 생성을 계속하도록 False 반환).
+
+    stopping criteria 는 step 마다 1번, 수락된 토큰이 붙은 뒤 호출되고,
+    본 모델 forward 에 들어가는 토큰은 (캐시되지 않은 검증 완료 토큰 + 이번 step 후보) 이므로
+    forward 입력 길이에서 후보 수를 계산한다.
+    """
+
+    def __init__(self, model, prompt_length):
+        self.model = _forward_module(model)
+        self.prompt_length = prompt_length
+        self.length = prompt_length
+        self.steps = 0
+        self.drafted = 0
+        self._hook = None
+
+    def _count_candidates(self, module, args, kwargs):
+        input_ids = kwargs.get("input_ids")
+        if input_ids is None:
+            return
+        cache = kwargs.get("past_key_values")
+        cached = cache.get_seq_length() if cache is not None else 0
+        self.drafted += max(0, cached + input_ids.shape[1] - self.length)
+
+    def __call__(self, input_ids, scores, **kwargs):
+        self.steps += 1
+        self.length = input_ids.shape[1]
+        return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+    def __enter__(self):
+        self._hook = self.model.register_forward_pre_hook(self._count_candidates, with_kwargs=True)
+        return self
+
+    def __exit__(self, *exc):
+        self._hook.remove()
+
+    # generated_tokens: 실제 결과로 남은 토큰 수 (step 마다 후보 중 수락된 토큰 + 본 모델 토큰 1개)
+    def record(self, mode, generated_tokens):
+        accepted = max(0, generated_tokens - self.steps)
+        speculation_stats.add(self.steps, self.drafted, accepted, generated_tokens)
+        if self.drafted:
+            speculative_acceptance.observe(mode, accepted / self.drafted)
+        if self.steps:
+            speculative_tokens_per_step.observe(mode, generated_tokens / self.steps)
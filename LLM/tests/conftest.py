@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# LLM 폴더의 모듈을 스크립트와 같은 방식(최상위 import)으로 불러옴
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+@pytest.fixture(scope="session")
+def char_tokenizer():
+    """글자 1개 = 토큰 1개인 작은 토크나이저 (JSON 디코딩 테스트용)."""
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    from json_decoding import SCHEMA_KEYS
+
+    chars = sorted(set("".join(SCHEMA_KEYS) + '{}":,\n \\abcdefghijklmnopqrstuvwxyz0123456789#/%()Output'))
+    vocab = {"<s>": 0, "</s>": 1, "<unk>": 2}
+    for ch in chars:
+        vocab.setdefault(ch, len(vocab))
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Split("", "isolated")
+    backend.decoder = decoders.Fuse()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, bos_token="<s>", eos_token="</s>", unk_token="<unk>")
+    tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
@@ -0,0 +1,43 @@
+import json
+
+from batch_parsing import parse_batch
+
+TRANSCRIPT = [{"speaker": "doctor", "text": "오른쪽 위 어금니 충치가 있어서 레진 치료 하겠습니다."}]
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_bad_jsonl_lines_become_error_records(tmp_path):
+    source = tmp_path / "input.jsonl"
+    source.write_text("\n".join([
+        json.dumps({"id": "ok", "transcript": TRANSCRIPT}, ensure_ascii=False),
+        "{not json",
+        json.dumps({"id": "missing"}),
+        json.dumps(TRANSCRIPT, ensure_ascii=False),
+    ]) + "\n", encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+
+    stats = parse_batch(str(source), str(output), workers=1)
+
+    results = _read(output)
+    assert [r["id"] for r in results] == ["ok", 2, 3, 4]
+    assert "input_text" in results[0] and "input_text" in results[3]
+    assert results[1]["error"].startswith("JSONDecodeError")
+    assert results[2]["error"].startswith("KeyError")
+    assert stats["transcripts"] == 4 and stats["errors"] == 2
+
+def test_bad_json_file_in_directory(tmp_path):
+    source = tmp_path / "transcripts"
+    source.mkdir()
+    (source / "a.json").write_text(json.dumps(TRANSCRIPT, ensure_ascii=False), encoding="utf-8")
+    (source / "b.json").write_text("[", encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+
+    stats = parse_batch(str(source), str(output), workers=2, chunksize=1)
+
+    results = _read(output)
+    assert [r["id"] for r in results] == ["a.json", "b.json"]
+    assert "input_text" in results[0]
+    assert "error" in results[1]
+    assert stats["errors"] == 1
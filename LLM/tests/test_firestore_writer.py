@@ -0,0 +1,149 @@
+import os
+import time
+import uuid
+
+import pytest
+
+# 로컬 에뮬레이터 전용 (운영 DB 에 쓰지 않도록 FIRESTORE_EMULATOR_HOST 가 없으면 건너뜀)
+# 예) firebase emulators:start --only firestore  →  FIRESTORE_EMULATOR_HOST=localhost:8080 python -m pytest tests/test_firestore_writer.py
+if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+    pytest.skip("FIRESTORE_EMULATOR_HOST 가 없어 Firestore 에뮬레이터 테스트를 건너뜀", allow_module_level=True)
+
+gcloud_firestore = pytest.importorskip("google.cloud.firestore")
+from google.api_core import exceptions
+
+import firestore_writer
+from firestore_writer import FirestoreWriter
+
+class _Batch:
+    def __init__(self, owner, batch):
+        self.owner = owner
+        self.batch = batch
+        self.size = 0
+
+    def set(self, reference, data, merge=False):
+        self.size += 1
+        self.batch.set(reference, data, merge=merge)
+
+    def commit(self):
+        if self.owner.failures:
+            self.owner.failures -= 1
+            raise exceptions.ServiceUnavailable("테스트용 일시 오류")
+        result = self.batch.commit()
+        self.owner.commits.append(self.size)
+        return result
+
+class RecordingClient:
+    """에뮬레이터 클라이언트를 감싸 커밋된 배치 크기를 기록하고, failures 번만큼 커밋에서 일시적 오류를 냄."""
+
+    def __init__(self, client, failures=0):
+        self.client = client
+        self.failures = failures
+        self.commits = []
+
+    def collection(self, name):
+        return self.client.collection(name)
+
+    def batch(self):
+        return _Batch(self, self.client.batch())
+
+    def bulk_writer(self):
+        return self.client.bulk_writer()
+
+@pytest.fixture(scope="module")
+def emulator_client():
+    return gcloud_firestore.Client(project=firestore_writer.FIRESTORE_PROJECT)
+
+@pytest.fixture
+def collection():
+    # 테스트마다 새 컬렉션 → 이전 실행 결과와 섞이지 않음
+    return f"writer-test-{uuid.uuid4().hex[:8]}"
+
+@pytest.fixture(autouse=True)
+def fast_retry(monkeypatch):
+    monkeypatch.setattr(firestore_writer, "FIRESTORE_RETRY_BASE_SECONDS", 0.01)
+
+def _read(client, collection, document_id):
+    return client.collection(collection).document(document_id).get().to_dict()
+
+def test_size_triggered_flush(emulator_client, collection):
+    client = RecordingClient(emulator_client)
+    writer = FirestoreWriter(client=client, batch_size=10, flush_seconds=60)
+    futures = [writer.set(collection, f"doc{i}", {"i": i}) for i in range(25)]
+
+    # flush 없이도 batch_size 건이 모이면 커밋
+    assert all(f.result(timeout=10) is True for f in futures[:20])
+    assert client.commits == [10, 10]
+    assert not futures[20].done()
+
+    writer.flush()
+    assert client.commits == [10, 10, 5]
+    assert all(f.result() is True for f in futures)
+    assert _read(emulator_client, collection, "doc24") == {"i": 24}
+    assert writer.stats()["written"] == 25
+    writer.close()
+
+def test_time_triggered_flush(emulator_client, collection):
+    client = RecordingClient(emulator_client)
+    writer = FirestoreWriter(client=client, batch_size=500, flush_seconds=0.2)
+    start = time.perf_counter()
+    future = writer.set(collection, "doc", {"text": "안녕하세요"})
+
+    assert future.result(timeout=10) is True
+    assert time.perf_counter() - start >= 0.2
+    assert client.commits == [1]
+    assert _read(emulator_client, collection, "doc") == {"text": "안녕하세요"}
+    writer.close()
+
+def test_duplicate_document_flushes_before_rewrite(emulator_client, collection):
+    client = RecordingClient(emulator_client)
+    writer = FirestoreWriter(client=client, batch_size=500, flush_seconds=60)
+    first = writer.set(collection, "doc", {"version": 1})
+    other = writer.set(collection, "other", {"version": 1})
+    second = writer.set(collection, "doc", {"version": 2})
+    writer.flush()
+
+    # 같은 문서가 다시 들어오면 앞의 배치를 먼저 커밋 → 쓰기 순서 유지
+    assert client.commits == [2, 1]
+    assert first.result() is True and other.result() is True and second.result() is True
+    assert _read(emulator_client, collection, "doc") == {"version": 2}
+    writer.close()
+
+def test_retryable_error_is_retried(emulator_client, collection):
+    client = RecordingClient(emulator_client, failures=2)
+    writer = FirestoreWriter(client=client, batch_size=500, flush_seconds=60, max_retries=3)
+    future = writer.set(collection, "doc", {"ok": True})
+    writer.flush()
+
+    assert future.result() is True
+    assert client.commits == [1]
+    assert writer.stats()["retries"] == 2
+    assert _read(emulator_client, collection, "doc") == {"ok": True}
+    writer.close()
+
+def test_retries_exhausted_fails_future(emulator_client, collection):
+    client = RecordingClient(emulator_client, failures=5)
+    writer = FirestoreWriter(client=client, batch_size=500, flush_seconds=60, max_retries=1)
+    future = writer.set(collection, "doc", {"ok": True})
+    writer.flush()
+
+    assert isinstance(future.exception(), exceptions.ServiceUnavailable)
+    assert writer.stats()["failed"] == 1
+    assert _read(emulator_client, collection, "doc") is None
+
+    # 실패 뒤에도 writer 스레드는 계속 동작
+    client.failures = 0
+    after = writer.set(collection, "after", {"ok": True})
+    writer.flush()
+    assert after.result() is True
+    writer.close()
+
+def test_bulk_mode_resolves_every_future(emulator_client, collection):
+    writer = FirestoreWriter(client=emulator_client, mode="bulk", batch_size=50, flush_seconds=60)
+    futures = [writer.set(collection, f"doc{i}", {"i": i}) for i in range(120)]
+    writer.flush()
+
+    assert [f.result() for f in futures] == [True] * 120
+    assert writer.stats()["written"] == 120
+    assert _read(emulator_client, collection, "doc119") == {"i": 119}
+    writer.close()
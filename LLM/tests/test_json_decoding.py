@@ -0,0 +1,119 @@
+import json
+import random
+
+import pytest
+import torch
+
+from json_decoding import (
+    JsonSchemaLogitsProcessor,
+    JsonStoppingCriteria,
+    JsonTracker,
+    SCHEMA_KEYS,
+    json_generate_kwargs,
+    trim_json_tail,
+)
+
+def _ids(tokenizer, text):
+    return tokenizer.encode(text, add_special_tokens=False)
+
+def _run_steps(criteria, prompt_ids, steps):
+    """steps: 행별 [step마다 붙는 토큰 목록]. step마다 stopping criteria 결과를 반환."""
+    rows = [list(prompt_ids) for _ in steps]
+    results = []
+    for step in zip(*steps):
+        for row, tokens in zip(rows, step):
+            row.extend(tokens)
+        results.append(criteria(torch.tensor(rows), None).tolist())
+    return results
+
+def test_stops_on_closing_brace_single_token_steps(char_tokenizer):
+    prompt = _ids(char_tokenizer, "Output:\n")
+    generated = _ids(char_tokenizer, '{"a": "b"}')
+    criteria = JsonStoppingCriteria(char_tokenizer, len(prompt))
+    results = _run_steps(criteria, prompt, [[[token] for token in generated]])
+    assert results[-1] == [True]
+    assert not any(done for done, in results[:-1])
+
+def test_multi_token_first_step_keeps_opening_brace(char_tokenizer):
+    # assisted decoding 처럼 첫 step 에 '{' 를 포함한 여러 토큰이 한꺼번에 붙는 경우
+    prompt = _ids(char_tokenizer, "Output:\n")
+    criteria = JsonStoppingCriteria(char_tokenizer, len(prompt))
+    steps = [_ids(char_tokenizer, '{"a": '), _ids(char_tokenizer, '{"b": 1}'), _ids(char_tokenizer, ', "c": 2}')]
+    assert _run_steps(criteria, prompt, [steps]) == [[False], [False], [True]]
+
+def test_braces_in_prompt_are_ignored(char_tokenizer):
+    prompt = _ids(char_tokenizer, 'Output:\n{"a": 1}\nOutput:\n')
+    criteria = JsonStoppingCriteria(char_tokenizer, len(prompt))
+    steps = [_ids(char_tokenizer, '{"x": "}'), _ids(char_tokenizer, '"}')]
+    assert _run_steps(criteria, prompt, [steps]) == [[False], [True]]
+
+def test_rows_stop_independently(char_tokenizer):
+    prompt = _ids(char_tokenizer, "Output:\n")
+    criteria = JsonStoppingCriteria(char_tokenizer, len(prompt))
+    first = [_ids(char_tokenizer, '{"a":'), _ids(char_tokenizer, " 1}")]
+    second = [_ids(char_tokenizer, '{"b":'), _ids(char_tokenizer, " {}")]
+    assert _run_steps(criteria, prompt, [first, second]) == [[False, False], [True, False]]
+
+def test_generate_kwargs_use_prompt_length(char_tokenizer):
+    assert json_generate_kwargs(char_tokenizer, "off", 5) == {}
+    kwargs = json_generate_kwargs(char_tokenizer, "schema", 5)
+    assert kwargs["stopping_criteria"][0].length == 5
+    assert kwargs["logits_processor"][0].start == 5
+
+# ====== JsonTracker / JsonSchemaLogitsProcessor ======
+
+def test_tracker_ignores_braces_in_strings_and_escapes():
+    tracker = JsonTracker()
+    assert tracker.feed('x} {"a": "}{\\"}", "b": {"c": 1}') is None
+    assert tracker.depth == 1 and not tracker.closed
+    assert tracker.feed("} tail") == 1
+    assert tracker.closed and tracker.feed("}") is None
+
+def test_trim_json_tail():
+    assert trim_json_tail('{"a": "b"}\n}\nOutput:') == '{"a": "b"}'
+    assert trim_json_tail('{"a": {') == '{"a": {'
+    assert trim_json_tail("no json") == "no json"
+
+def _schema_decode(tokenizer, processor, prompt_ids, rng, max_steps=2000):
+    """무작위 점수(따옴표에 가산점) 로 greedy 생성 → 스키마 제약만으로 JSON 이 만들어지는지 확인."""
+    quote_id = tokenizer.convert_tokens_to_ids('"')
+    ids = list(prompt_ids)
+    tracker = JsonTracker()
+    for _ in range(max_steps):
+        scores = torch.tensor([[rng.random() for _ in range(len(tokenizer))]])
+        scores[0, quote_id] += 0.9
+        scores = processor(torch.tensor([ids]), scores)
+        token_id = int(scores[0].argmax())
+        ids.append(token_id)
+        if tracker.feed(tokenizer.decode([token_id])) is not None:
+            break
+    return tokenizer.decode(ids[len(prompt_ids):])
+
+@pytest.mark.parametrize("seed", range(5))
+def test_schema_processor_forces_keys_and_fixed_values(char_tokenizer, seed):
+    prompt = char_tokenizer.encode("Output:\n", add_special_tokens=False)
+    fixed = {"치식": "#11", "건강보험": "급여"}
+    processor = JsonSchemaLogitsProcessor(char_tokenizer, len(prompt), fixed_values=[fixed])
+
+    text = _schema_decode(char_tokenizer, processor, prompt, random.Random(seed))
+
+    parsed = json.loads(text)
+    assert list(parsed) == SCHEMA_KEYS
+    assert parsed["치식"] == "#11" and parsed["건강보험"] == "급여"
+    assert not any("\n" in value or "\\" in value for value in parsed.values())
+
+def test_schema_processor_recomputes_state_for_rejected_candidates(char_tokenizer):
+    # assisted decoding 처럼 이미 본 시퀀스보다 짧거나 다른 시퀀스로 호출돼도 새 processor 와 같은 제약을 적용
+    prompt = char_tokenizer.encode("Output:\n", add_special_tokens=False)
+    rng = random.Random(0)
+    processor = JsonSchemaLogitsProcessor(char_tokenizer, len(prompt))
+    text = _schema_decode(char_tokenizer, processor, prompt, rng)
+    generated = char_tokenizer.encode(text, add_special_tokens=False)
+
+    cuts = list(range(len(generated)))
+    rng.shuffle(cuts)
+    for cut in cuts[:40]:
+        ids = torch.tensor([prompt + generated[:cut]])
+        scores = torch.zeros(1, len(char_tokenizer))
+        expected = JsonSchemaLogitsProcessor(char_tokenizer, len(prompt))(ids, scores.clone())
+        assert torch.equal(processor(ids, scores.clone()), expected)
@@ -0,0 +1,88 @@
+import random
+import re
+
+import pytest
+
+from bench_parsing import make_transcript
+from parsing import TREATMENT_DURATION_MAP, build_field_index, scan_fields
+
+# 위치 맵 (공백이 들어간 키, 다른 키를 포함하는 키, 정규식 특수문자가 있는 키 포함)
+LOCATION_MAP = {
+    "오른쪽 위 어금니": "16",
+    "위 어금니": "26",
+    "앞니": "11",
+    "왼쪽 아래": "36",
+    "어금니(큰)": "46",
+    "아래": "31",
+}
+
+# user-006 이전 extract_fields_from_transcript 의 정규식 / 순차 탐색 경로
+LEGACY_PROBLEM_PATTERNS = {
+    r"깨(졌|짐|진|지|질|져)": "깨짐",
+    r"금(가서|이나서)": "깨짐",
+    r"부러(졌|짐|진|져|질|져서)": "파손",
+    r"파손": "파손",
+    r"아(파요|파서|프다|픔|팠어|팠어요|팟어요)": "통증",
+    r"통증": "통증",
+    r"시(리다|려서|림|려요)": "시림",
+    r"붓기|부었|부어서": "붓기",
+    r"염증": "염증",
+    r"출혈|피": "출혈",
+    r"잇몸": "잇몸 문제",
+    r"충치": "충치",
+}
+
+def legacy_scan(text, location_map):
+    fields = {}
+    for desc, code in location_map.items():
+        pattern = re.sub(r"\s*", r"\\s*", re.escape(desc))
+        if re.search(pattern, text):
+            fields["location"] = code
+            break
+    for pattern, label in LEGACY_PROBLEM_PATTERNS.items():
+        if re.search(pattern, text):
+            fields["problem"] = label
+            break
+    treatment = next((kw for kw in TREATMENT_DURATION_MAP if kw in text), None)
+    if treatment:
+        fields["treatment"] = treatment
+    return fields
+
+# extract_fields_from_transcript 와 같은 방식으로 합친 전체 텍스트
+def full_text(transcript):
+    return " ".join(item["text"].strip() for item in transcript).replace("  ", " ").strip()
+
+# 띄어쓰기를 무작위로 빼거나 더함 (위치 키의 공백 무시 매칭 확인용)
+def jitter_spaces(text, rng):
+    out = []
+    for ch in text:
+        if ch == " " and rng.random() < 0.3:
+            continue
+        out.append(ch)
+        if rng.random() < 0.05:
+            out.append(" ")
+    return "".join(out)
+
+FIELD_INDEX = build_field_index(LOCATION_MAP)
+
+@pytest.mark.parametrize("num_turns", [1, 2, 6, 20])
+@pytest.mark.parametrize("seed", range(25))
+def test_scan_fields_matches_legacy_regex(seed, num_turns):
+    rng = random.Random(seed * 100 + num_turns)
+    text = full_text(make_transcript(num_turns, rng))
+    assert scan_fields(text, FIELD_INDEX) == legacy_scan(text, LOCATION_MAP)
+
+    spaced = jitter_spaces(text, rng)
+    assert scan_fields(spaced, FIELD_INDEX) == legacy_scan(spaced, LOCATION_MAP)
+
+@pytest.mark.parametrize("text", [
+    "",
+    "특이사항 없습니다",
+    "오른 쪽 위어금니가 아파요",
+    "어금니(큰) 쪽이 시려요",
+    "어금니\\(큰\\) 쪽이 시려요",
+    "임플란트 1차수술 하고 임플란트 보철치료 합니다",
+    "금이나서 금으로 씌웁니다",
+])
+def test_scan_fields_edge_cases(text):
+    assert scan_fields(text, FIELD_INDEX) == legacy_scan(text, LOCATION_MAP)
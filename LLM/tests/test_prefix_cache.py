@@ -0,0 +1,66 @@
+import copy
+
+import pytest
+import torch
+
+pytest.importorskip("peft")  # inference 모듈이 import 시점에 peft 를 사용
+
+import inference
+import speculative
+from common import model_registry
+
+
+def make_tiny_llama(vocab_size, seed):
+    from transformers import LlamaConfig, LlamaForCausalLM
+
+    torch.manual_seed(seed)
+    return LlamaForCausalLM(LlamaConfig(
+        vocab_size=vocab_size, hidden_size=32, intermediate_size=64,
+        num_hidden_layers=2, num_attention_heads=4, num_key_value_heads=4,
+    )).eval()
+
+@pytest.fixture
+def tiny_model(char_tokenizer, monkeypatch):
+    tokenizer = copy.deepcopy(char_tokenizer)
+    tokenizer.padding_side = "left"
+    model = make_tiny_llama(len(tokenizer), seed=0)
+    monkeypatch.setattr(inference, "_prefix", None)
+    monkeypatch.setattr(inference, "device", "cpu")
+    model_registry.register("llm_tokenizer", lambda: tokenizer)
+    model_registry.register("llm_model", lambda: model)
+    yield tokenizer, model
+    model_registry.register("llm_tokenizer", inference.load_tokenizer)
+    model_registry.register("llm_model", inference.load_model, warmup=inference.warmup_model)
+
+def test_batched_prefix_cache_matches_full_prefill(tiny_model):
+    tokenizer, model = tiny_model
+    prompts = [inference.build_prompt(text) for text in ("ab", "cd", "ef")]
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True)
+    config = dict(max_new_tokens=8, do_sample=False, pad_token_id=tokenizer.pad_token_id)
+
+    cache = inference.get_prefix_cache(inputs["input_ids"])
+    assert cache is not None
+    with torch.no_grad():
+        plain = model.generate(**inputs, **config)
+        cached = model.generate(**inputs, past_key_values=cache, **config)
+    assert torch.equal(plain, cached)
+
+def test_left_padded_batch_skips_prefix_cache(tiny_model):
+    tokenizer, _ = tiny_model
+    prompts = [inference.build_prompt("ab"), inference.build_prompt("abcd")]
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True)
+    assert inference.get_prefix_cache(inputs["input_ids"]) is None
+
+@pytest.mark.parametrize("mode", ["prompt_lookup", "draft"])
+def test_speculation_with_prefix_cache_matches_plain_greedy(tiny_model, monkeypatch, mode):
+    tokenizer, _ = tiny_model
+    monkeypatch.setattr(inference, "get_result_cache", lambda: None)
+    monkeypatch.setattr(speculative, "DRAFT_MODEL_PATH", "tiny-draft")
+    model_registry.register("llm_draft", lambda: (make_tiny_llama(len(tokenizer), seed=1), None))
+
+    outputs = {}
+    for prefix_cache, spec in [(False, "off"), (True, "off"), (True, mode)]:
+        monkeypatch.setattr(inference, "PREFIX_CACHE", prefix_cache)
+        outputs[prefix_cache, spec] = inference.generate("ab", max_new_tokens=16, json_mode="off", speculative=spec)
+    assert outputs[True, "off"] == outputs[False, "off"]
+    assert outputs[True, mode] == outputs[False, "off"]
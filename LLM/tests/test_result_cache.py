@@ -0,0 +1,84 @@
+import itertools
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, make_key
+
+@pytest.fixture
+def clock(monkeypatch):
+    # last_access 가 호출 순서대로 증가하도록 시계를 고정
+    ticks = itertools.count(1)
+    monkeypatch.setattr(result_cache.time, "time", lambda: float(next(ticks)))
+
+def test_memory_lru_eviction():
+    cache = ResultCache(path=None, memory_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"  # a 가 최근 사용 → b 가 가장 오래됨
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["memory_entries"] == 2
+
+def test_disk_hit_after_memory_eviction(tmp_path, clock):
+    cache = ResultCache(path=str(tmp_path / "cache.sqlite"), memory_entries=1, disk_mb=1)
+    cache.put("a", "값1")
+    cache.put("b", "값2")
+
+    assert cache.get("a") == "값1"
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 0
+    assert cache.get("a") == "값1"
+    assert cache.stats()["memory_hits"] == 1
+    cache.close()
+
+    reopened = ResultCache(path=str(tmp_path / "cache.sqlite"), memory_entries=1, disk_mb=1)
+    assert reopened.get("b") == "값2"
+    reopened.close()
+
+def test_disk_eviction_removes_least_recently_used(tmp_path, clock):
+    # 값 1개 = 100바이트, 디스크 한도 250바이트 → 2개까지 보관
+    cache = ResultCache(path=str(tmp_path / "cache.sqlite"), memory_entries=10, disk_mb=250 / (1024 * 1024))
+    cache.put("a", "x" * 100)
+    cache.put("b", "y" * 100)
+    cache.memory.clear()
+    assert cache.get("a") == "x" * 100  # 디스크에서 a 의 last_access 갱신
+    cache.put("c", "z" * 100)
+
+    assert cache.stats()["evictions"] == 1
+    cache.memory.clear()
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 100
+    assert cache.get("c") == "z" * 100
+    cache.close()
+
+def test_disk_size_tracked_without_rescanning(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path=path, memory_entries=10, disk_mb=250 / (1024 * 1024))
+    cache.put("a", "x" * 100)
+    cache.put("a", "x" * 50)  # 같은 키 교체는 차이만 반영
+    cache.put("b", "y" * 100)
+    assert cache.stats()["disk_bytes"] == 150
+
+    # 한도를 한참 넘는 값 하나 → 오래된 항목을 한 번에 모두 제거
+    cache.put("c", "z" * 240)
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["disk_bytes"] == 240
+    cache.close()
+
+    reopened = ResultCache(path=path, memory_entries=10, disk_mb=1)
+    assert reopened.stats()["disk_bytes"] == 240
+    plan = reopened.db.execute(
+        "EXPLAIN QUERY PLAN SELECT key, size FROM results ORDER BY last_access LIMIT 1"
+    ).fetchall()
+    assert any("results_last_access" in row[-1] for row in plan)
+    reopened.close()
+
+def test_key_ignores_whitespace_but_not_config():
+    key = make_key("위치: #16, 문제: 통증", "model", {"max_new_tokens": 512})
+    assert make_key("  위치 :#16 ,  문제:   통증 ", "model", {"max_new_tokens": 512}) == key
+    assert make_key("위치: #16, 문제: 통증", "model", {"max_new_tokens": 256}) != key
+    assert make_key("위치: #16, 문제: 통증", "other", {"max_new_tokens": 512}) != key
+    assert make_key("위치: #17, 문제: 통증", "model", {"max_new_tokens": 512}) != key
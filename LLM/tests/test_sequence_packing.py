@@ -0,0 +1,79 @@
+import torch
+
+from sequence_packing import IGNORE_INDEX, TokenCountingCollator, pack_examples, plan_packs
+
+def test_plan_packs_first_fit_decreasing():
+    lengths = [5, 3, 8, 2, 4, 6]
+    packs = plan_packs(lengths, 10)
+    assert packs == [[2, 3], [5, 4], [0, 1]]
+    for pack in packs:
+        assert sum(lengths[i] for i in pack) <= 10
+    assert sorted(i for pack in packs for i in pack) == list(range(len(lengths)))
+
+def test_plan_packs_truncates_long_examples():
+    assert plan_packs([15, 1], 10) == [[0], [1]]
+    assert plan_packs([], 10) == []
+
+def test_pack_examples_restarts_positions():
+    batch = {"input_ids": [[1, 2, 3], [4, 5], [6, 7, 8, 9, 10, 11]]}
+    packed = pack_examples(batch, 6)
+    assert packed["input_ids"] == [[6, 7, 8, 9, 10, 11], [1, 2, 3, 4, 5]]
+    assert packed["position_ids"] == [[0, 1, 2, 3, 4, 5], [0, 1, 2, 0, 1]]
+    assert packed["length"] == [6, 5]
+
+def test_collator_block_causal_mask():
+    collator = TokenCountingCollator(pad_token_id=0, packed=True, mask_dtype=torch.float32)
+    features = [
+        {"input_ids": [1, 2, 3, 4, 5], "position_ids": [0, 1, 2, 0, 1]},
+        {"input_ids": [6, 7], "position_ids": [0, 1]},
+    ]
+    batch = collator(features)
+
+    allowed = batch["attention_mask"][:, 0] == 0
+    assert batch["attention_mask"].shape == (2, 1, 5, 5)
+    expected = torch.tensor([
+        [1, 0, 0, 0, 0],
+        [1, 1, 0, 0, 0],
+        [1, 1, 1, 0, 0],
+        [0, 0, 0, 1, 0],
+        [0, 0, 0, 1, 1],
+    ], dtype=torch.bool)
+    assert torch.equal(allowed[0], expected)
+    # 패딩 위치는 자기 자신만
+    assert torch.equal(allowed[1, 2:], torch.eye(5, dtype=torch.bool)[2:])
+    assert torch.equal(allowed[1, :2, :2], torch.tril(torch.ones(2, 2, dtype=torch.bool)))
+
+    # 예제 첫 토큰 / 패딩은 라벨 제외
+    assert batch["labels"].tolist() == [
+        [IGNORE_INDEX, 2, 3, IGNORE_INDEX, 5],
+        [IGNORE_INDEX, 7, IGNORE_INDEX, IGNORE_INDEX, IGNORE_INDEX],
+    ]
+    assert collator.tokens == 7 and collator.padded_tokens == 10
+
+def test_collator_flash_attention_keeps_2d_mask():
+    collator = TokenCountingCollator(pad_token_id=0, packed=True, attn_implementation="flash_attention_2")
+    batch = collator([{"input_ids": [1, 2, 3], "position_ids": [0, 0, 1]}])
+    assert batch["attention_mask"].tolist() == [[1, 1, 1]]
+    assert batch["position_ids"].tolist() == [[0, 0, 1]]
+
+def test_packed_forward_matches_separate_examples():
+    from transformers import LlamaConfig, LlamaForCausalLM
+
+    torch.manual_seed(0)
+    config = LlamaConfig(vocab_size=32, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+                         num_attention_heads=4, num_key_value_heads=4)
+    model = LlamaForCausalLM(config).eval()
+    examples = [[3, 4, 5, 6], [7, 8, 9]]
+
+    packed = pack_examples({"input_ids": examples}, 16)
+    batch = TokenCountingCollator(pad_token_id=0, packed=True, mask_dtype=torch.float32)(
+        [{"input_ids": packed["input_ids"][0], "position_ids": packed["position_ids"][0]}]
+    )
+    with torch.no_grad():
+        packed_logits = model(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"],
+                              position_ids=batch["position_ids"]).logits[0]
+        offset = 0
+        for ids in examples:
+            separate = model(input_ids=torch.tensor([ids])).logits[0]
+            assert torch.allclose(packed_logits[offset:offset + len(ids)], separate, atol=1e-5)
+            offset += len(ids)
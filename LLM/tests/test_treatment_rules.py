@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+import treatment_rules
+from treatment_rules import apply_rules, check_fee_table, is_fully_covered, render_rules
+
+INPUT = "위치: #16, 문제: 충치, 처치: 레진, 예상기간: 미확인"
+COVERED_INPUT = "위치: #11, 문제: 치아 파절, 처치: 신경치료, 예상기간: 4주"
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(treatment_rules.FEE_TABLE_PATH), "fee_table.example.json")
+
+@pytest.fixture
+def example_fee_table(monkeypatch):
+    with open(EXAMPLE_PATH, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    monkeypatch.setattr(treatment_rules, "fee_table", table)
+    return table
+
+def test_class_and_insurance_left_to_model_without_fee_table(monkeypatch):
+    monkeypatch.setattr(treatment_rules, "fee_table", {})
+    rules = apply_rules(INPUT)
+    assert rules["치료항목"] == "레진"
+    assert "치료분류" not in rules
+    assert "건강보험" not in rules
+    assert not is_fully_covered(rules)
+
+def test_class_and_insurance_from_fee_table(monkeypatch):
+    monkeypatch.setattr(treatment_rules, "fee_table", {"레진": {"치료분류": "보존치료", "건강보험": "비급여", "기타": "x"}})
+    rules = apply_rules(INPUT)
+    assert rules["치료분류"] == "보존치료"
+    assert rules["건강보험"] == "비급여"
+    assert "기타" not in rules
+    assert "치료분류" not in apply_rules(INPUT.replace("레진", "발치"))
+
+def test_example_fee_table_passes_schema_check(example_fee_table):
+    assert check_fee_table(example_fee_table) == []
+    assert check_fee_table({"레진": {"보험": "급여"}}) == ["레진: 알 수 없는 필드 보험"]
+    assert check_fee_table({"레진": {"건강보험": 1}}) == ["레진: 건강보험 값은 문자열이어야 합니다."]
+
+def test_fully_covered_without_memo(example_fee_table):
+    rules = apply_rules(COVERED_INPUT)
+    assert treatment_rules.MEMO_KEY not in rules
+    assert is_fully_covered(rules)
+    rendered = json.loads(render_rules(rules))
+    assert rendered["치식"] == "#11(오른쪽위첫번째앞니)"
+    assert rendered["건강보험"] == "급여"
+    assert rendered[treatment_rules.MEMO_KEY] == ""
+
+    # 수가표 항목에 메모가 있으면 그대로 사용
+    rules = apply_rules(COVERED_INPUT.replace("신경치료", "금"))
+    assert json.loads(render_rules(rules))[treatment_rules.MEMO_KEY] == "보철비용은 병원마다 상이할 수 있음"
+
+def test_fully_covered_input_skips_model(example_fee_table, monkeypatch):
+    inference = pytest.importorskip("inference")  # peft 가 없으면 건너뜀
+
+    def no_model():
+        raise AssertionError("규칙으로 모두 채워진 입력은 모델을 로딩하지 않아야 함")
+
+    monkeypatch.setattr(inference, "RULE_ENGINE", True)
+    monkeypatch.setattr(inference, "get_model", no_model)
+    monkeypatch.setattr(inference, "get_tokenizer", no_model)
+    monkeypatch.setattr(inference, "get_result_cache", lambda: None)
+    output = inference.generate(COVERED_INPUT)
+    assert json.loads(output) == json.loads(render_rules(apply_rules(COVERED_INPUT)))
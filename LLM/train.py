@@ -1,13 +1,31 @@
 import torch
 from transformers import AutoModelForCausalLM, AutoTokenizer
 from peft import prepare_model_for_kbit_training, LoraConfig, get_peft_model
-from datasets import load_dataset
+from datasets import load_dataset, load_from_disk
 from trl import SFTTrainer
 from transformers import TrainingArguments
 import bitsandbytes as bnb
+import hashlib
+import inspect
+import json
+import os
+
+from sequence_packing import pack_examples, TokenCountingCollator, TokenThroughputCallback
 
 print("🚀 bitsandbytes 버전:", bnb.__version__)
 
+# ───────────────────────────────
+# 0. 학습 데이터 처리 설정
+# ───────────────────────────────
+DATA_FILE = "./data/instruct_with_structured_output.json"
+MAX_SEQ_LENGTH = int(os.getenv("TRAIN_MAX_SEQ_LENGTH", "1024"))
+# 1: 짧은 예제들을 MAX_SEQ_LENGTH 시퀀스로 이어 붙임 (예제 간 어텐션은 차단)
+# 0: 예제별 배치 + 길이가 비슷한 예제끼리 묶어서 샘플링
+PACKING = os.getenv("TRAIN_PACKING", "1") == "1"
+# 패킹 시 예제 경계를 4D 마스크로 처리하려면 sdpa / eager, position_ids 로 처리하려면 flash_attention_2
+ATTN_IMPLEMENTATION = os.getenv("TRAIN_ATTN_IMPLEMENTATION", "sdpa")
+TOKENIZED_CACHE_DIR = os.getenv("TRAIN_TOKENIZED_CACHE_DIR", "./data/tokenized_cache")
+
 # ───────────────────────────────
 # 1. 모델 및 토크나이저 로딩
 # ───────────────────────────────
@@ -23,6 +41,7 @@ model = AutoModelForCausalLM.from_pretrained(
     bnb_4bit_quant_type="nf4",
     bnb_4bit_use_double_quant=True,
     bnb_4bit_compute_dtype=torch.float16,
+    attn_implementation=ATTN_IMPLEMENTATION,
 )
 
 print("✅ 모델 로딩 완료. 첫 번째 파라미터 위치:", next(model.parameters()).device)
@@ -47,8 +66,6 @@ print("✅ LoRA 적용 완료")
 # ───────────────────────────────
 # 3. 데이터셋 로딩 및 전처리
 # ───────────────────────────────
-dataset = load_dataset("json", data_files="./data/instruct_with_structured_output.json")
-
 def formatting_func(example):
     ins = example["instruction"]
     inp = example.get("input", "")
@@ -56,10 +73,55 @@ def formatting_func(example):
     prompt = f"{ins}\n\n{inp}\n\n### 답변:" if inp else f"{ins}\n\n### 답변:"
     return {"text": f"{prompt} {out}"}
 
-tokenized_dataset = dataset["train"].map(
-    formatting_func,
-    remove_columns=dataset["train"].column_names,
-)
+def tokenize_func(example):
+    input_ids = tokenizer(formatting_func(example)["text"])["input_ids"][:MAX_SEQ_LENGTH - 1]
+    input_ids.append(tokenizer.eos_token_id)
+    return {"input_ids": input_ids, "length": len(input_ids)}
+
+# 토큰화 결과 캐시 키: 토크나이저 / 포맷 함수 소스 / 데이터 파일 / 길이·패킹 설정이 같으면 재사용
+def tokenized_cache_key():
+    stat = os.stat(DATA_FILE)
+    payload = json.dumps(
+        {
+            "tokenizer": tokenizer.name_or_path,
+            "tokenizer_class": type(tokenizer).__name__,
+            "vocab_size": len(tokenizer),
+            "eos_token_id": tokenizer.eos_token_id,
+            "formatting_func": inspect.getsource(formatting_func),
+            "tokenize_func": inspect.getsource(tokenize_func),
+            "data_file": [os.path.abspath(DATA_FILE), stat.st_size, int(stat.st_mtime)],
+            "max_seq_length": MAX_SEQ_LENGTH,
+            "packing": PACKING,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+cache_path = os.path.join(TOKENIZED_CACHE_DIR, tokenized_cache_key())
+if os.path.isdir(cache_path):
+    tokenized_dataset = load_from_disk(cache_path)
+    print(f"✅ 토큰화 캐시 사용: {cache_path}")
+else:
+    dataset = load_dataset("json", data_files=DATA_FILE)
+    tokenized_dataset = dataset["train"].map(
+        tokenize_func,
+        remove_columns=dataset["train"].column_names,
+    )
+    if PACKING:
+        # 전체를 한 번에 묶어야 first-fit 패킹이 빈 자리를 최대한 채움
+        tokenized_dataset = tokenized_dataset.map(
+            pack_examples,
+            batched=True,
+            batch_size=None,
+            remove_columns=tokenized_dataset.column_names,
+            fn_kwargs={"max_seq_length": MAX_SEQ_LENGTH},
+        )
+    tokenized_dataset.save_to_disk(cache_path)
+    print(f"✅ 토큰화 완료, 캐시 저장: {cache_path}")
+
+print(f"📦 학습 시퀀스 {len(tokenized_dataset)}개 (패킹: {PACKING})")
+collator = TokenCountingCollator(tokenizer.pad_token_id, packed=PACKING, attn_implementation=ATTN_IMPLEMENTATION)
 
 # ───────────────────────────────
 # 4. 학습 설정 및 실행
@@ -74,16 +136,22 @@ training_args = TrainingArguments(
     save_steps=100,
     logging_steps=10,
     save_total_limit=2,
-    optim="paged_adamw_8bit"
+    optim="paged_adamw_8bit",
+    group_by_length=not PACKING,    # 패킹하지 않을 때는 길이가 비슷한 예제끼리 배치
+    length_column_name="length",
+    remove_unused_columns=False,    # position_ids 를 콜레이터까지 전달
 )
 
+# 토큰화 / 패킹은 위에서 직접 처리했으므로 SFTTrainer 의 데이터 전처리는 생략
 trainer = SFTTrainer(
     model=model,
     train_dataset=tokenized_dataset,
     args=training_args,
     tokenizer=tokenizer,
-    packing=False,
-    max_seq_length=1024,
+    data_collator=collator,
+    max_seq_length=MAX_SEQ_LENGTH,
+    dataset_kwargs={"skip_prepare_dataset": True},
+    callbacks=[TokenThroughputCallback(collator)],
 )
 
 trainer.train()
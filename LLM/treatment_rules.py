@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import re
+
+from parsing import TREATMENT_DURATION_MAP
+from json_decoding import SCHEMA_KEYS
+
+# ====== 치식 번호 → 치아 이름 ======
+TOOTH_MAP = {
+    "11": "#11(오른쪽위첫번째앞니)", "12": "#12(오른쪽위두번째앞니)", "13": "#13(오른쪽위송곳니)",
+    "14": "#14(오른쪽위첫째작은어금니)", "15": "#15(오른쪽위둘째작은어금니)", "16": "#16(오른쪽위첫째큰어금니)",
+    "17": "#17(오른쪽위둘째큰어금니)", "18": "#18(오른쪽위사랑니)",
+    "21": "#21(왼쪽위첫번째앞니)", "22": "#22(왼쪽위두번째앞니)", "23": "#23(왼쪽위송곳니)",
+    "24": "#24(왼쪽위첫째작은어금니)", "25": "#25(왼쪽위둘째작은어금니)", "26": "#26(왼쪽위첫째큰어금니)",
+    "27": "#27(왼쪽위둘째큰어금니)", "28": "#28(왼쪽위사랑니)",
+    "31": "#31(왼쪽아래첫번째앞니)", "32": "#32(왼쪽아래두번째앞니)", "33": "#33(왼쪽아래송곳니)",
+    "34": "#34(왼쪽아래첫째작은어금니)", "35": "#35(왼쪽아래둘째작은어금니)", "36": "#36(왼쪽아래첫째큰어금니)",
+    "37": "#37(왼쪽아래둘째큰어금니)", "38": "#38(왼쪽아래사랑니)",
+    "41": "#41(오른쪽아래첫번째앞니)", "42": "#42(오른쪽아래두번째앞니)", "43": "#43(오른쪽아래송곳니)",
+    "44": "#44(오른쪽아래첫째작은어금니)", "45": "#45(오른쪽아래둘째작은어금니)", "46": "#46(오른쪽아래첫째큰어금니)",
+    "47": "#47(오른쪽아래둘째큰어금니)", "48": "#48(오른쪽아래사랑니)"
+}
+
+# 첫 방문 시 공통 항목
+FIRST_VISIT_ITEM = "초진+방사선촬영"
+
+# ====== 처치별 분류 / 보험 / 수가 테이블 ======
+# 처치 → {FEE_KEYS..., (선택) "메모(메시지)"}, 형식은 fee_table.example.json 참고
+# 병원별 수가표는 별도 파일로 관리하며, 수가표에 없는 처치 / 필드는 모델이 생성
+FEE_KEYS = ["치료분류", "건강보험", "관련수가코드", "총진료비수가", "본인부담금(30%/급여)", "비급여비용", "총부담비용"]
+MEMO_KEY = "메모(메시지)"
+
+FEE_TABLE_PATH = os.path.join(os.path.dirname(__file__), "fee_table.json")
+
+def check_fee_table(table):
+    """수가표 형식 오류 목록 반환 (비어 있으면 정상)."""
+    if not isinstance(table, dict):
+        return ["최상위는 {처치: {필드: 값}} 형태의 객체여야 합니다."]
+    problems = []
+    for treatment, entry in table.items():
+        if not isinstance(entry, dict):
+            problems.append(f"{treatment}: 필드 객체가 아닙니다.")
+            continue
+        for key, value in entry.items():
+            if key not in FEE_KEYS and key != MEMO_KEY:
+                problems.append(f"{treatment}: 알 수 없는 필드 {key}")
+            elif not isinstance(value, str):
+                problems.append(f"{treatment}: {key} 값은 문자열이어야 합니다.")
+    return problems
+
+try:
+    with open(FEE_TABLE_PATH, "r", encoding="utf-8") as f:
+        fee_table = json.load(f)
+except FileNotFoundError:
+    print("⚠️ fee_table.json 파일을 찾을 수 없습니다. (fee_table.example.json 참고, 분류 / 보험 / 수가 필드는 모델이 생성)")
+    fee_table = {}
+for problem in check_fee_table(fee_table):
+    print(f"⚠️ fee_table.json 형식 오류 - {problem}")
+
+# 규칙 테이블이 바뀌면 결과 캐시 키도 바뀌도록 하는 버전 해시
+RULES_VERSION = hashlib.sha256(
+    json.dumps([TOOTH_MAP, TREATMENT_DURATION_MAP, fee_table], ensure_ascii=False, sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+
+INPUT_PATTERN = re.compile(r"위치: (?P<위치>.*?), 문제: (?P<문제>.*?), 처치: (?P<처치>.*?), 예상기간: (?P<예상기간>.*)$")
+
+# extract_fields_from_transcript 결과 문자열 → {"위치", "문제", "처치", "예상기간"} ("미확인" 은 제외)
+def parse_input_fields(input_text):
+    match = INPUT_PATTERN.match(input_text.strip())
+    if not match:
+        return {}
+    return {key: value for key, value in match.groupdict().items() if value and value != "미확인"}
+
+def apply_rules(input_text):
+    """입력에서 테이블로 결정되는 필드만 채운 dict 반환 (나머지는 모델이 생성)."""
+    fields = parse_input_fields(input_text)
+    rules = {}
+
+    tooth_nums = re.findall(r"#(\d{2})", input_text)
+    if tooth_nums:
+        rules["치식"] = ", ".join(TOOTH_MAP.get(num, f"#{num}(Unknown)") for num in tooth_nums)
+
+    treatment = fields.get("처치")
+    if treatment:
+        rules["치료항목"] = treatment
+        rules["치료항목1"] = FIRST_VISIT_ITEM
+        rules["치료항목2"] = treatment
+        rules["치료항목3"] = ""
+
+    duration = fields.get("예상기간") or TREATMENT_DURATION_MAP.get(treatment)
+    if duration:
+        rules["치료기간"] = duration if duration.startswith("약") else f"약 {duration}"
+
+    entry = fee_table.get(treatment)
+    if isinstance(entry, dict):
+        for key, value in entry.items():
+            if key in SCHEMA_KEYS:
+                rules[key] = value
+
+    return rules
+
+# 메모(메시지)는 자유 문장이라 규칙으로 만들 수 없으므로 "완전히 채워짐" 판단에서 제외
+# → 나머지 필드가 모두 테이블로 정해지면 모델을 생략하고, 메모는 수가표 항목의 메모(없으면 "")를 사용
+def is_fully_covered(rules):
+    return all(key in rules for key in SCHEMA_KEYS if key != MEMO_KEY)
+
+# 규칙으로 모두 채워진 경우 모델 출력과 같은 형태의 JSON 텍스트 생성
+def render_rules(rules):
+    rules = {MEMO_KEY: "", **rules}
+    lines = [f'  "{key}": {json.dumps(rules[key], ensure_ascii=False)}' for key in SCHEMA_KEYS]
+    return "{\n" + ",\n".join(lines) + "\n}"
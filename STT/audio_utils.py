@@ -1,18 +1,62 @@
 from pydub import AudioSegment
+import numpy as np
+import wave
 import json
+import os
 
-def split_audio_by_speaker(audio_path, diarization_result, output_dir="output_chunks"):
-    os.makedirs(output_dir, exist_ok=True)
+import metrics
+
+SAMPLING_RATE = 16000
+
+# 디버그용: 화자별 구간을 WAV 파일로도 저장할지 여부 (기본값: 저장 안 함)
+EXPORT_CHUNKS = os.getenv("STT_EXPORT_CHUNKS", "0") == "1"
+
+# 16-bit PCM 바이트 → float32 배열 (-1.0 ~ 1.0)
+def pcm16_to_float32(pcm_bytes):
+    return np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+
+# 오디오 파일을 한 번만 디코딩하여 16kHz mono float32 배열로 변환
+def load_audio(audio_path, sampling_rate=SAMPLING_RATE):
     audio = AudioSegment.from_file(audio_path)
+    audio = audio.set_channels(1).set_frame_rate(sampling_rate).set_sample_width(2)
+    return pcm16_to_float32(audio.raw_data)
+
+# 화자 분리 결과 → (화자, 오디오 구간) 목록
+# 구간은 원본 배열의 슬라이스(view)이므로 복사가 일어나지 않음
+def slice_segments(audio, diarization_result, sampling_rate=SAMPLING_RATE):
     speaker_segments = []
+    for segment in diarization_result:
+        start = max(0, int(segment["start"] * sampling_rate))
+        end = min(len(audio), int(segment["end"] * sampling_rate))
+        if end <= start:
+            continue
+        speaker_segments.append((segment["speaker"], audio[start:end]))
+    return speaker_segments
+
+# float32 구간들을 WAV 파일로 저장 (디버그 모드 전용)
+def export_segments(speaker_segments, output_dir="output_chunks", sampling_rate=SAMPLING_RATE):
+    os.makedirs(output_dir, exist_ok=True)
+    filepaths = []
+    with metrics.stage("segment_export", audio=sum(len(c) for _, c in speaker_segments) / sampling_rate):
+        for i, (speaker, chunk) in enumerate(speaker_segments):
+            filename = f"{output_dir}/speaker_{speaker}_segment_{i}.wav"
+            pcm = (np.clip(chunk, -1.0, 1.0) * 32767).astype(np.int16)
+            with wave.open(filename, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(sampling_rate)
+                wf.writeframes(pcm.tobytes())
+            filepaths.append(filename)
+    return filepaths
+
+def split_audio_by_speaker(audio_path, diarization_result, output_dir="output_chunks", export_chunks=EXPORT_CHUNKS):
+    with metrics.stage("split") as stage:
+        audio = load_audio(audio_path)
+        speaker_segments = slice_segments(audio, diarization_result)
+        stage.audio_seconds = len(audio) / SAMPLING_RATE
 
-    for i, segment in enumerate(diarization_result):
-        start_ms = int(segment["start"] * 1000)
-        end_ms = int(segment["end"] * 1000)
-        chunk = audio[start_ms:end_ms]
-        filename = f"{output_dir}/speaker_{segment['speaker']}_segment_{i}.wav"
-        chunk.export(filename, format="wav")
-        speaker_segments.append((segment["speaker"], filename))
+    if export_chunks:
+        export_segments(speaker_segments, output_dir)
 
     return speaker_segments
 
@@ -24,4 +68,4 @@ def save_results(speaker_segments, transcriptions, output_dir="output_results"):
     for (speaker, _), text in zip(speaker_segments, transcriptions):
         json_data.append({"speaker": speaker, "text": text})
     with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(json_data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+        json.dump(json_data, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,159 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from long_audio import audio_duration, transcribe_long_audio, LONG_AUDIO_MIN_SECONDS
+from pipeline import run_pipeline
+
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import model_registry
+
+# ====== 배치 STT 설정 ======
+# 워커마다 화자 분리 + Whisper 모델을 따로 올리므로 GPU 메모리에 맞춰 조정
+STT_BATCH_WORKERS = int(os.getenv("STT_BATCH_WORKERS", "1"))
+STT_BATCH_OUTPUT_DIR = os.getenv("STT_BATCH_OUTPUT_DIR", "output_results/by_hash")
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".webm")
+
+# 입력 소스 → 녹음 파일 경로 목록
+# - 디렉터리: 하위 디렉터리까지 오디오 확장자 파일
+# - .jsonl: 한 줄에 {"path": ...} (상대 경로는 manifest 위치 기준)
+# - 그 외 텍스트 파일: 한 줄에 경로 1개
+def iter_recordings(source):
+    if os.path.isdir(source):
+        for root, _, names in sorted(os.walk(source)):
+            for name in sorted(names):
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    yield os.path.join(root, name)
+        return
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = json.loads(line)["path"] if source.endswith(".jsonl") else line
+            yield path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+# 오디오 내용 해시 (같은 녹음이면 파일명 / 위치가 달라도 같은 결과 파일을 사용)
+def content_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def result_path(output_dir, digest):
+    return os.path.join(output_dir, f"{digest}.json")
+
+# 워커 프로세스 시작 시 모델을 한 번만 로딩 (이후 작업은 로딩된 모델 재사용)
+def init_worker():
+    model_registry.get("diarization")
+    model_registry.get("whisper")
+
+def transcribe_file(audio_path):
+    if audio_duration(audio_path) >= LONG_AUDIO_MIN_SECONDS:
+        return list(transcribe_long_audio(audio_path))
+    (results,), _ = run_pipeline([audio_path])
+    return results
+
+def process_one(job):
+    audio_path, digest, output_dir = job
+    start = time.perf_counter()
+    try:
+        transcript = transcribe_file(audio_path)
+    except Exception as e:
+        return {"path": audio_path, "hash": digest, "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    # 임시 파일에 쓴 뒤 교체 → 중간에 중단돼도 완성된 결과 파일만 남음
+    path = result_path(output_dir, digest)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source": audio_path, "hash": digest, "transcript": transcript}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        # 쓰기 실패(디스크 부족, 직렬화 오류 등) 시 임시 파일을 남기지 않음
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return {"path": audio_path, "hash": digest, "status": "error", "error": f"{type(e).__name__}: {e}"}
+    return {
+        "path": audio_path,
+        "hash": digest,
+        "status": "done",
+        "segments": len(transcript),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+# 처리 결과 1건을 index.jsonl 에 기록하고 출력 (성공 여부 반환)
+def write_result(index, result):
+    index.write(json.dumps(result, ensure_ascii=False) + "\n")
+    index.flush()
+    if result["status"] == "done":
+        print(f"✅ {result['path']} → {result['hash'][:12]} ({result['segments']}개 구간, {result['seconds']}초)")
+        return True
+    print(f"❌ {result['path']}: {result['error']}")
+    return False
+
+def run_batch(source, output_dir=STT_BATCH_OUTPUT_DIR, workers=STT_BATCH_WORKERS):
+    """녹음들을 내용 해시 기준으로 전사하여 output_dir/<해시>.json 에 저장하고 처리 통계를 반환.
+
+    결과 파일이 이미 있는 녹음은 건너뛰므로, 중단된 작업은 같은 명령으로 다시 실행하면 이어서 처리된다.
+    처리 기록은 output_dir/index.jsonl 에 한 줄씩 추가된다.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    seen = set()
+    skipped = 0
+    for audio_path in iter_recordings(source):
+        digest = content_hash(audio_path)
+        if digest in seen or os.path.exists(result_path(output_dir, digest)):
+            skipped += 1
+            continue
+        seen.add(digest)
+        jobs.append((audio_path, digest, output_dir))
+
+    done = 0
+    errors = 0
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, "index.jsonl"), "a", encoding="utf-8") as index:
+        if workers <= 1 or not jobs:
+            if jobs:
+                init_worker()
+            for result in map(process_one, jobs):
+                ok = write_result(index, result)
+                done += ok
+                errors += not ok
+        else:
+            with Pool(workers, initializer=init_worker) as pool:
+                for result in pool.imap_unordered(process_one, jobs):
+                    ok = write_result(index, result)
+                    done += ok
+                    errors += not ok
+    elapsed = time.perf_counter() - start
+
+    return {
+        "recordings": len(jobs) + skipped,
+        "done": done,
+        "skipped": skipped,
+        "errors": errors,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="녹음 일괄 STT (디렉터리 또는 manifest → 내용 해시별 JSON)")
+    parser.add_argument("source", help="녹음 디렉터리, 경로 목록(.txt) 또는 .jsonl manifest")
+    parser.add_argument("--output-dir", default=STT_BATCH_OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=STT_BATCH_WORKERS)
+    args = parser.parse_args()
+
+    stats = run_batch(args.source, args.output_dir, args.workers)
+    print(f"✅ {stats['done']}건 처리, {stats['skipped']}건 건너뜀 (에러 {stats['errors']}건)")
+    print(f"⏱️ {stats['seconds']}초")
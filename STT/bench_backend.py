@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+
+from audio_utils import load_audio, SAMPLING_RATE
+
+# 음성 파일이 없을 때 쓰는 합성 입력 (화음 + 잡음, 전사 품질이 아니라 처리 속도 측정용)
+def synthetic_audio(seconds, sampling_rate=SAMPLING_RATE, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sampling_rate), dtype=np.float32) / sampling_rate
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.2 * np.sin(2 * np.pi * 330 * t)
+    noise = 0.05 * rng.standard_normal(t.shape[0])
+    return (tone + noise).astype(np.float32)
+
+# 구간 길이별 실시간 배율 (RTF = 처리 시간 / 오디오 길이, 1 미만이면 실시간보다 빠름)
+def bench_rtf(audio, segment_seconds, repeat, batch_size):
+    from whisper_stt import transcribe_batch
+
+    results = {}
+    for seconds in segment_seconds:
+        length = int(seconds * SAMPLING_RATE)
+        segments = [audio[i * length:(i + 1) * length] for i in range(repeat)]
+        segments = [s for s in segments if len(s) == length] or [audio[:length]]
+        audio_seconds = sum(len(s) for s in segments) / SAMPLING_RATE
+
+        start = time.perf_counter()
+        transcribe_batch(segments, SAMPLING_RATE, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        results[str(seconds)] = {
+            "segments": len(segments),
+            "audio_seconds": round(audio_seconds, 2),
+            "seconds": round(elapsed, 3),
+            "rtf": round(elapsed / audio_seconds, 4),
+        }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Whisper 추론 백엔드 벤치마크 (RTF)")
+    parser.add_argument("--device", choices=["auto", "cuda", "cpu"], default="cpu")
+    parser.add_argument("--threads", type=int, help="CPU 스레드 수 (STT_CPU_THREADS)")
+    parser.add_argument("--no-quantize", action="store_true", help="CPU 동적 int8 양자화 끄기")
+    parser.add_argument("--audio", help="측정에 쓸 음성 파일 (생략 시 합성 입력)")
+    parser.add_argument("--segment-seconds", type=float, nargs="+", default=[5, 15, 30])
+    parser.add_argument("--repeat", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (생략 시 출력만)")
+    args = parser.parse_args()
+
+    # whisper_stt 는 import 시점에 설정을 읽으므로 먼저 환경 변수로 전달
+    os.environ["STT_DEVICE"] = args.device
+    if args.threads:
+        os.environ["STT_CPU_THREADS"] = str(args.threads)
+    if args.no_quantize:
+        os.environ["STT_CPU_QUANTIZE"] = "0"
+
+    import whisper_stt
+    from common import model_registry
+
+    if args.audio:
+        audio = load_audio(args.audio)
+    else:
+        audio = synthetic_audio(max(args.segment_seconds) * args.repeat)
+
+    model_registry.warmup(["whisper"])
+    report = {
+        "device": whisper_stt.device,
+        "threads": torch.get_num_threads(),
+        "quantized": whisper_stt.device == "cpu" and whisper_stt.STT_CPU_QUANTIZE,
+        "load": model_registry.load_timings().get("whisper"),
+        "rtf": bench_rtf(audio, args.segment_seconds, args.repeat, args.batch_size),
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
@@ -1,21 +1,40 @@
 import os
+import sys
 import torch
 from dotenv import load_dotenv
 from pyannote.audio import Pipeline
 
+import metrics
+
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import model_registry
+
 load_dotenv()
 HF_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
 
-diarization_pipeline = Pipeline.from_pretrained(
-    "pyannote/speaker-diarization-3.1",
-    use_auth_token=HF_TOKEN
-)
+# 파이프라인은 첫 사용 시점에 1회만 로딩 (model_registry 가 공유)
+def load_diarization_pipeline():
+    diarization_pipeline = Pipeline.from_pretrained(
+        "pyannote/speaker-diarization-3.1",
+        use_auth_token=HF_TOKEN
+    )
 
-if torch.cuda.is_available():
-    diarization_pipeline.to(torch.device("cuda"))
+    # STT_DEVICE=cpu 이면 GPU 가 있어도 CPU 에서 실행 (whisper_stt 와 같은 설정)
+    if os.getenv("STT_DEVICE", "auto") != "cpu" and torch.cuda.is_available():
+        diarization_pipeline.to(torch.device("cuda"))
+    return diarization_pipeline
 
-def run_diarization(audio_path):
-    diarization = diarization_pipeline(audio_path)
+# 워밍업: 2초 무음으로 1회 실행
+def warmup_diarization_pipeline(diarization_pipeline):
+    diarization_pipeline({"waveform": torch.zeros(1, 32000), "sample_rate": 16000})
+
+model_registry.register("diarization", load_diarization_pipeline, warmup=warmup_diarization_pipeline)
+
+def get_diarization_pipeline():
+    return model_registry.get("diarization")
+
+def _to_turns(diarization):
     results = []
     for turn, _, speaker in diarization.itertracks(yield_label=True):
         results.append({
@@ -24,3 +43,29 @@ def run_diarization(audio_path):
             "end": round(turn.end, 2)
         })
     return results
+
+def run_diarization(audio_path):
+    diarization_pipeline = get_diarization_pipeline()
+    with metrics.stage("diarization"):
+        diarization = diarization_pipeline(audio_path)
+    return _to_turns(diarization)
+
+# 메모리 상의 float32 배열을 그대로 화자 분리 (WAV 저장 불필요)
+# return_embeddings=True 이면 {화자 라벨: 임베딩 벡터} 도 함께 반환
+def diarize_waveform(audio, sampling_rate=16000, return_embeddings=False):
+    diarization_pipeline = get_diarization_pipeline()
+    waveform = torch.from_numpy(audio).unsqueeze(0)
+    file = {"waveform": waveform, "sample_rate": sampling_rate}
+
+    if not return_embeddings:
+        with metrics.stage("diarization", audio=len(audio) / sampling_rate):
+            diarization = diarization_pipeline(file)
+        return _to_turns(diarization)
+
+    with metrics.stage("diarization", audio=len(audio) / sampling_rate):
+        diarization, embeddings = diarization_pipeline(file, return_embeddings=True)
+    # embeddings[k] 는 diarization.labels()[k] 화자에 대응
+    speaker_embeddings = {
+        label: embeddings[k] for k, label in enumerate(diarization.labels())
+    }
+    return _to_turns(diarization), speaker_embeddings
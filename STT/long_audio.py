@@ -0,0 +1,158 @@
+import os
+import subprocess
+import wave
+
+import numpy as np
+from pydub.utils import mediainfo
+
+from audio_utils import pcm16_to_float32, SAMPLING_RATE
+from streaming_diarization import StreamingDiarizer
+from vad import has_speech, trim_silence, vad_stats, VAD_ENABLED
+from whisper_stt import transcribe_batch
+
+# 📦 장시간 녹음 처리 설정
+LONG_AUDIO_MIN_SECONDS = float(os.getenv("STT_LONG_AUDIO_MIN_SECONDS", "600"))  # 이 길이 이상이면 윈도우 단위 처리
+LONG_AUDIO_WINDOW_SECONDS = float(os.getenv("STT_LONG_AUDIO_WINDOW_SECONDS", "120"))
+LONG_AUDIO_OVERLAP_SECONDS = float(os.getenv("STT_LONG_AUDIO_OVERLAP_SECONDS", "5"))
+# 윈도우 끝에 걸친 발화를 다음 윈도우와 이어 붙이기 위해 보관하는 최대 길이
+MAX_CARRY_SECONDS = float(os.getenv("STT_LONG_AUDIO_MAX_CARRY_SECONDS", "30"))
+BOUNDARY_EPSILON = 0.05
+
+# 전체 디코딩 없이 길이(초)만 확인 (WAV 는 헤더, 그 외는 ffprobe)
+def audio_duration(audio_path):
+    try:
+        with wave.open(audio_path, "rb") as wf:
+            return wf.getnframes() / wf.getframerate()
+    except (wave.Error, EOFError):
+        return float(mediainfo(audio_path).get("duration", 0.0))
+
+def _is_target_wav(audio_path, sampling_rate):
+    try:
+        with wave.open(audio_path, "rb") as wf:
+            return wf.getnchannels() == 1 and wf.getsampwidth() == 2 and wf.getframerate() == sampling_rate
+    except (wave.Error, EOFError):
+        return False
+
+def iter_audio_blocks(audio_path, block_seconds=LONG_AUDIO_WINDOW_SECONDS, sampling_rate=SAMPLING_RATE):
+    """파일을 block_seconds 단위의 16kHz mono float32 배열로 순서대로 읽음 (한 번에 한 블록만 메모리에 유지).
+
+    이미 16kHz mono 16-bit WAV 면 wave 로 프레임을 직접 읽고, 그 외 형식은 ffmpeg 로 스트리밍 디코딩한다.
+    """
+    block_frames = int(block_seconds * sampling_rate)
+
+    if _is_target_wav(audio_path, sampling_rate):
+        with wave.open(audio_path, "rb") as wf:
+            while True:
+                pcm = wf.readframes(block_frames)
+                if not pcm:
+                    return
+                yield pcm16_to_float32(pcm)
+
+    command = [
+        "ffmpeg", "-nostdin", "-v", "error", "-i", audio_path,
+        "-f", "s16le", "-ac", "1", "-ar", str(sampling_rate), "-",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    try:
+        block_bytes = block_frames * 2
+        buffer = b""
+        while True:
+            data = process.stdout.read(block_bytes - len(buffer))
+            if not data:
+                break
+            buffer += data
+            if len(buffer) >= block_bytes:
+                yield pcm16_to_float32(buffer)
+                buffer = b""
+        if len(buffer) >= 2:
+            yield pcm16_to_float32(buffer[:len(buffer) - len(buffer) % 2])
+    finally:
+        process.stdout.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg 디코딩 실패: {audio_path}")
+
+def transcribe_long_audio(audio_path, window_seconds=LONG_AUDIO_WINDOW_SECONDS,
+                          overlap_seconds=LONG_AUDIO_OVERLAP_SECONDS, sampling_rate=SAMPLING_RATE, diarizer=None):
+    """장시간 녹음을 겹치는 윈도우로 화자 분리 + 전사하여 {"speaker", "start", "end", "text"} 를 순서대로 yield.
+
+    화자 ID 는 StreamingDiarizer 가 임베딩 중심으로 윈도우 간에 이어 주고,
+    윈도우 끝에 걸린 발화는 오디오를 보관해 두었다가 다음 윈도우의 같은 화자 첫 구간과 합쳐 한 번에 전사한다.
+    메모리에는 현재 윈도우 + overlap tail + 보관 중인 발화(최대 MAX_CARRY_SECONDS) 만 유지된다.
+    """
+    diarizer = diarizer or StreamingDiarizer(sampling_rate=sampling_rate, overlap_seconds=overlap_seconds)
+    max_carry = int(MAX_CARRY_SECONDS * sampling_rate)
+    carry = None  # 이전 윈도우 끝에 걸린 발화: {"speaker", "start", "end", "audio"}
+
+    for block in iter_audio_blocks(audio_path, window_seconds, sampling_rate):
+        # 말소리가 없는 윈도우는 건너뜀 (넘겨받은 발화는 이어질 수 없으므로 단독으로 전사)
+        if VAD_ENABLED:
+            vad_stats.add(total=len(block) / sampling_rate)
+            if not has_speech(block, sampling_rate):
+                vad_stats.add(skipped=len(block) / sampling_rate, skipped_windows=1)
+                diarizer.skip(block)
+                if carry is not None:
+                    yield from _transcribe_items([carry], sampling_rate)
+                    carry = None
+                continue
+
+        window, segments, window_start = diarizer.process(block)
+        window_end = len(window) / sampling_rate
+        tail_seconds = (len(window) - len(block)) / sampling_rate
+
+        items = []
+        for segment in segments:
+            start = int(segment["start"] * sampling_rate)
+            end = min(len(window), int(segment["end"] * sampling_rate))
+            if end <= start:
+                continue
+            items.append({
+                "speaker": segment["speaker"],
+                "start": window_start + segment["start"],
+                "end": window_start + segment["end"],
+                "audio": window[start:end],
+            })
+
+        # 이전 윈도우에서 넘어온 발화: 이어지는 같은 화자 구간이 있으면 합치고, 없으면 단독으로 전사
+        if carry is not None:
+            if items and items[0]["speaker"] == carry["speaker"] and items[0]["start"] - window_start <= tail_seconds + BOUNDARY_EPSILON:
+                first = items[0]
+                first["audio"] = np.concatenate([carry["audio"], first["audio"]])
+                first["start"] = carry["start"]
+            else:
+                items.insert(0, carry)
+            carry = None
+
+        # 윈도우 끝까지 이어지는 마지막 발화는 다음 윈도우로 넘김
+        # (다음 윈도우의 구간은 이 윈도우 끝 시각부터 시작하므로 오디오를 그대로 이어 붙이면 됨)
+        if items and items[-1]["end"] - window_start >= window_end - BOUNDARY_EPSILON and len(items[-1]["audio"]) <= max_carry:
+            carry = items.pop()
+            carry["audio"] = carry["audio"].copy()
+
+        yield from _transcribe_items(items, sampling_rate)
+
+    if carry is not None:
+        yield from _transcribe_items([carry], sampling_rate)
+
+def _transcribe_items(items, sampling_rate):
+    if VAD_ENABLED:
+        items = _trim_items(items, sampling_rate)
+    texts = transcribe_batch([item["audio"] for item in items], sampling_rate)
+    for item, text in zip(items, texts):
+        yield {
+            "speaker": item["speaker"],
+            "start": round(item["start"], 2),
+            "end": round(item["end"], 2),
+            "text": text,
+        }
+
+# 구간 앞뒤 무음 제거 (음성이 없는 구간은 제외)
+def _trim_items(items, sampling_rate):
+    trimmed = []
+    removed = 0
+    for item in items:
+        speech = trim_silence(item["audio"], sampling_rate)
+        removed += len(item["audio"]) - len(speech)
+        if len(speech):
+            trimmed.append({**item, "audio": speech})
+    vad_stats.add(trimmed=removed / sampling_rate)
+    return trimmed
@@ -1,62 +1,93 @@
 import os
-from pydub import AudioSegment
+import sys
 from dotenv import load_dotenv
-from datasets import Dataset
 import json
-import csv
 
 # 외부에서 가져옴
-from whisper_stt import transcribe_batch
-from diarization import run_diarization
+from pipeline import run_pipeline
+from long_audio import audio_duration, transcribe_long_audio, LONG_AUDIO_MIN_SECONDS
+from vad import vad_stats, VAD_ENABLED
 
 # 환경 변수 로드
 load_dotenv()
 
-# 화자별 오디오 분할 함수
-def split_audio_by_speaker(audio_path, diarization_result, output_dir="output_chunks"):
+# 결과 저장 함수
+# json_data: [{"speaker", "text"}, ...]
+def save_results(json_data, output_dir="output_results", filename="transcription3.json"):
     os.makedirs(output_dir, exist_ok=True)
-    audio = AudioSegment.from_file(audio_path)
-    speaker_segments = []
-
-    for i, segment in enumerate(diarization_result):
-        start_ms = int(segment["start"] * 1000)
-        end_ms = int(segment["end"] * 1000)
-        chunk = audio[start_ms:end_ms]
-        filename = f"{output_dir}/speaker_{segment['speaker']}_segment_{i}.wav"
-        chunk.export(filename, format="wav")
-        speaker_segments.append((segment["speaker"], filename))
 
-    return speaker_segments
+    # 3. .json 저장
+    json_path = os.path.join(output_dir, filename)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(json_data, f, ensure_ascii=False, indent=2)
 
-# 결과 저장 함수
-def save_results(speaker_segments, transcriptions, output_dir="output_results"):
+# 장시간 녹음용: 결과를 받는 대로 JSON 배열에 한 항목씩 기록 (전체 결과를 메모리에 모으지 않음)
+def save_results_stream(results, output_dir="output_results"):
     os.makedirs(output_dir, exist_ok=True)
 
-    # 3. .json 저장
     json_path = os.path.join(output_dir, "transcription3.json")
-    json_data = []
-    for (speaker, _), text in zip(speaker_segments, transcriptions):
-        json_data.append({"speaker": speaker, "text": text})
+    count = 0
     with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(json_data, f, ensure_ascii=False, indent=2)
+        f.write("[")
+        for result in results:
+            f.write(",\n  " if count else "\n  ")
+            f.write(json.dumps(result, ensure_ascii=False))
+            count += 1
+            print(f"[{result['speaker']}] ({result['start']:.1f}s) {result['text']}")
+        f.write("\n]" if count else "]")
+    return count
+
+def main_long_audio(audio_path):
+    print("장시간 녹음: 윈도우 단위로 화자 분리 + STT 실행 중...")
+    count = save_results_stream(transcribe_long_audio(audio_path))
+    print(f"✅ {count}개 구간 저장 완료")
+    if VAD_ENABLED:
+        print_vad_stats(vad_stats.summary())
 
 # 메인 실행 함수
-def main(audio_path):
-    print("1. 화자 분리 중...")
-    diarization_result = run_diarization(audio_path)
+# long_audio=None 이면 길이가 LONG_AUDIO_MIN_SECONDS 이상일 때 자동으로 윈도우 단위 처리
+def main(audio_path, long_audio=None):
+    if long_audio is None:
+        long_audio = audio_duration(audio_path) >= LONG_AUDIO_MIN_SECONDS
+    if long_audio:
+        main_long_audio(audio_path)
+        return
+
+    print("화자 분리 → STT 파이프라인 실행 중...")
+    (results,), stats = run_pipeline([audio_path])
+
+    for result in results:
+        print(f"[{result['speaker']}] {result['text']}")
+
+    save_results(results)
+    print_pipeline_stats(stats)
 
-    print("2. 화자별 오디오 분할 중...")
-    speaker_segments = split_audio_by_speaker(audio_path, diarization_result)
+# 여러 녹음: 앞 파일의 STT 와 다음 파일의 화자 분리가 겹쳐서 실행됨
+def main_many(audio_paths, output_dir="output_results"):
+    print(f"화자 분리 → STT 파이프라인 실행 중... ({len(audio_paths)}개 파일)")
+    all_results, stats = run_pipeline(audio_paths)
 
-    print("3. STT 배치 실행 중...")
-    filepaths = [path for _, path in speaker_segments]
-    transcriptions = transcribe_batch(filepaths)
+    for audio_path, results in zip(audio_paths, all_results):
+        filename = os.path.splitext(os.path.basename(audio_path))[0] + ".json"
+        save_results(results, output_dir, filename)
+        print(f"✅ {audio_path}: {len(results)}개 구간 → {filename}")
+    print_pipeline_stats(stats)
 
-    for (speaker, _), text in zip(speaker_segments, transcriptions):
-        print(f"[{speaker}] {text}")
+def print_pipeline_stats(stats):
+    diarization, asr = stats["diarization"], stats["asr"]
+    print(f"⏱️ 전체 {stats['wall_seconds']}초 (겹쳐서 절약 {stats['overlap_seconds']}초)")
+    print(f"   화자 분리: {diarization['busy_seconds']}초, 사용률 {diarization['utilization']:.0%}")
+    print(f"   STT: {asr['busy_seconds']}초, 사용률 {asr['utilization']:.0%}, 배치 {asr['calls']}회 / 구간 {asr['items']}개")
+    if VAD_ENABLED:
+        print_vad_stats(stats["vad"])
 
-    save_results(speaker_segments, transcriptions)
+def print_vad_stats(vad):
+    print(f"🔇 무음 제외: 전체 {vad['total_seconds']}초 중 건너뜀 {vad['skipped_seconds']}초 + 잘라냄 {vad['trimmed_seconds']}초 ({vad['removed_ratio']:.0%})")
 
 if __name__ == "__main__":
-    audio_path = "C:/Users/asia/Desktop/vscode/backend/situation_test_000 (4).wav"
-    main(audio_path)
\ No newline at end of file
+    audio_paths = sys.argv[1:]
+    if len(audio_paths) > 1:
+        main_many(audio_paths)
+    else:
+        audio_path = audio_paths[0] if audio_paths else "C:/Users/asia/Desktop/vscode/backend/situation_test_000 (4).wav"
+        main(audio_path)
\ No newline at end of file
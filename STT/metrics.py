@@ -0,0 +1,119 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import prometheus
+from common.prometheus import Histogram
+
+# 📦 지표 / 프로파일링 설정
+PROFILE_DIR = os.getenv("STT_PROFILE_DIR", "profiles")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+AUDIO_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0)
+RTF_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+
+stage_seconds = Histogram("stt_stage_seconds", "단계별 처리 시간(초)", LATENCY_BUCKETS)
+audio_seconds = Histogram("stt_audio_seconds", "단계별 1회 처리한 오디오 길이(초)", AUDIO_BUCKETS)
+real_time_factor = Histogram("stt_real_time_factor", "단계별 처리 시간 / 오디오 길이", RTF_BUCKETS)
+queue_wait_seconds = Histogram("stt_queue_wait_seconds", "대기열에서 기다린 시간(초)", LATENCY_BUCKETS, label="queue")
+
+# ====== 요청 단위 trace (프로파일링 훅) ======
+_local = threading.local()
+
+class Trace:
+    """한 요청 동안 실행된 단계를 (이름, 스레드, 시작, 끝) 로 모아 Chrome trace 형식으로 저장."""
+
+    def __init__(self, name):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, start, end, **args):
+        with self._lock:
+            self.spans.append({
+                "name": stage,
+                "ph": "X",
+                "pid": os.getpid(),
+                "tid": threading.current_thread().name,
+                "ts": round((start - self.origin) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "args": args,
+            })
+
+    def dump(self, output_dir=PROFILE_DIR):
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"trace_{self.name}_{int(time.time())}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.spans}, f, ensure_ascii=False)
+        return path
+
+# 다음 요청 1건만 trace 하도록 예약 (GET /metrics/profile)
+_armed = threading.Event()
+
+def arm_profiler():
+    _armed.set()
+
+def take_trace(name):
+    """예약되어 있으면 새 Trace 를 반환하고 예약을 해제, 아니면 None."""
+    if _armed.is_set():
+        _armed.clear()
+        return Trace(name)
+    return None
+
+@contextmanager
+def tracing(trace):
+    """이 스레드에서 실행되는 stage() 들을 trace 에도 기록."""
+    previous = getattr(_local, "trace", None)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+# 워커 스레드에서 실행될 함수를 trace 와 함께 감쌈
+def traced(fn, trace):
+    if trace is None:
+        return fn
+
+    def wrapper(*args):
+        with tracing(trace):
+            return fn(*args)
+    return wrapper
+
+def record(name, start, end, audio=None, trace=None):
+    """측정한 구간을 히스토그램에 반영하고, trace(없으면 이 스레드의 trace) 에도 기록."""
+    elapsed = end - start
+    stage_seconds.observe(name, elapsed)
+    if audio:
+        audio_seconds.observe(name, audio)
+        real_time_factor.observe(name, elapsed / audio)
+    trace = trace or getattr(_local, "trace", None)
+    if trace is not None:
+        trace.add(name, start, end, audio_seconds=audio)
+
+class _Stage:
+    def __init__(self, audio):
+        self.audio_seconds = audio
+
+@contextmanager
+def stage(name, audio=None):
+    """블록 처리 시간을 기록. audio(초) 를 주거나 블록 안에서 audio_seconds 를 설정하면 오디오 길이 / RTF 도 기록."""
+    current = _Stage(audio)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        record(name, start, time.perf_counter(), current.audio_seconds)
+
+def observe_queue_wait(queue_name, seconds):
+    queue_wait_seconds.observe(queue_name, seconds)
+
+# 같은 프로세스에 등록된 LLM 지표(llm_*) 까지 포함
+def render_prometheus():
+    return prometheus.render_prometheus()
@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+import time
+
+from audio_utils import load_audio, slice_segments, SAMPLING_RATE
+from diarization import diarize_waveform
+from segment_planner import consolidate_turns
+from vad import remove_long_silences, trim_segments, VadStats, VAD_ENABLED
+from whisper_stt import transcribe_batch
+
+# 📦 오프라인 파이프라인 설정
+PIPELINE_QUEUE_SIZE = int(os.getenv("STT_PIPELINE_QUEUE_SIZE", "64"))  # 화자 분리 → ASR 사이 대기 구간 수 상한
+PIPELINE_ASR_BATCH_SIZE = int(os.getenv("STT_PIPELINE_ASR_BATCH_SIZE", "8"))
+
+class StageStats:
+    """단계별 처리 시간 / 대기 시간 누적 (utilization = busy / wall)."""
+
+    def __init__(self):
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.items = 0
+        self.calls = 0
+
+    def summary(self, wall_seconds):
+        return {
+            "items": self.items,
+            "calls": self.calls,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wait_seconds": round(self.wait_seconds, 3),
+            "utilization": round(self.busy_seconds / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        }
+
+def run_pipeline(audio_paths, queue_size=PIPELINE_QUEUE_SIZE, asr_batch_size=PIPELINE_ASR_BATCH_SIZE,
+                 sampling_rate=SAMPLING_RATE):
+    """여러 녹음을 화자 분리(생산자 스레드) → ASR(현재 스레드) 로 겹쳐서 처리.
+
+    화자 분리가 끝난 파일의 구간은 바로 제한된 큐로 넘어가 ASR 이 처리하는 동안
+    다음 파일의 디코딩 / 화자 분리가 진행된다. ASR 은 큐에 쌓인 구간을 asr_batch_size 까지 모아 한 번에 전사한다.
+    반환: (파일 순서대로 [{"speaker", "text"}, ...] 목록, 단계별 통계)
+    """
+    segment_queue = queue.Queue(maxsize=queue_size)
+    diarization_stats = StageStats()
+    asr_stats = StageStats()
+    vad_run_stats = VadStats()
+    errors = []
+
+    def produce():
+        try:
+            for file_index, audio_path in enumerate(audio_paths):
+                start = time.perf_counter()
+                audio = load_audio(audio_path, sampling_rate)
+                if VAD_ENABLED:
+                    # 긴 무음은 잘라낸 오디오로 화자 분리 (결과에는 시각이 없으므로 시간 보정 불필요)
+                    vad_run_stats.add(total=len(audio) / sampling_rate)
+                    audio, skipped = remove_long_silences(audio, sampling_rate)
+                    vad_run_stats.add(skipped=skipped)
+                turns = consolidate_turns(diarize_waveform(audio, sampling_rate)) if len(audio) else []
+                speaker_segments = slice_segments(audio, turns, sampling_rate)
+                if VAD_ENABLED:
+                    speaker_segments = trim_segments(speaker_segments, sampling_rate, vad_run_stats)
+                diarization_stats.busy_seconds += time.perf_counter() - start
+                diarization_stats.calls += 1
+                diarization_stats.items += len(speaker_segments)
+
+                # 파일별 구간 수를 먼저 알려서 소비자가 파일 완료 시점을 알 수 있게 함
+                _put(segment_queue, ("file", file_index, len(speaker_segments)), diarization_stats)
+                for segment_index, (speaker, chunk) in enumerate(speaker_segments):
+                    _put(segment_queue, ("segment", file_index, segment_index, speaker, chunk), diarization_stats)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            _put(segment_queue, None, diarization_stats)
+
+    results = [None] * len(audio_paths)
+    wall_start = time.perf_counter()
+    producer = threading.Thread(target=produce, name="diarization-producer", daemon=True)
+    producer.start()
+
+    finished = False
+    while not finished:
+        wait_start = time.perf_counter()
+        item = segment_queue.get()
+        asr_stats.wait_seconds += time.perf_counter() - wait_start
+
+        # 이미 큐에 쌓여 있는 구간은 기다리지 않고 배치로 모음
+        batch = []
+        while True:
+            if item is None:
+                finished = True
+                break
+            if item[0] == "file":
+                _, file_index, count = item
+                results[file_index] = [None] * count
+            else:
+                batch.append(item)
+            if len(batch) >= asr_batch_size:
+                break
+            try:
+                item = segment_queue.get_nowait()
+            except queue.Empty:
+                break
+
+        if batch:
+            start = time.perf_counter()
+            texts = transcribe_batch([chunk for *_, chunk in batch], sampling_rate, batch_size=len(batch))
+            asr_stats.busy_seconds += time.perf_counter() - start
+            asr_stats.calls += 1
+            asr_stats.items += len(batch)
+            for (_, file_index, segment_index, speaker, _), text in zip(batch, texts):
+                results[file_index][segment_index] = {"speaker": speaker, "text": text}
+
+    producer.join()
+    if errors:
+        raise errors[0]
+
+    wall_seconds = time.perf_counter() - wall_start
+    stats = {
+        "files": len(audio_paths),
+        "wall_seconds": round(wall_seconds, 3),
+        "diarization": diarization_stats.summary(wall_seconds),
+        "asr": asr_stats.summary(wall_seconds),
+        "vad": vad_run_stats.summary(),
+        # 두 단계를 순서대로 실행했을 때 대비 겹쳐서 절약한 시간
+        "overlap_seconds": round(diarization_stats.busy_seconds + asr_stats.busy_seconds - wall_seconds, 3),
+    }
+    return results, stats
+
+# 큐가 가득 차서 막힌 시간은 생산자의 대기 시간으로 기록
+def _put(segment_queue, item, stats):
+    start = time.perf_counter()
+    segment_queue.put(item)
+    stats.wait_seconds += time.perf_counter() - start
@@ -1,17 +1,42 @@
 from fastapi import FastAPI, WebSocket
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pyngrok import ngrok
 import asyncio
 import wave
 import uuid
 import os
+import sys
 import uvicorn
 import logging
+import math
+import time
 
 # 🔧 외부 모듈
 from whisper_stt import transcribe_batch
 from diarization import run_diarization
-from audio_utils import split_audio_by_speaker, save_results
+from streaming_diarization import StreamingDiarizer
+from segment_planner import consolidate_turns
+from vad import has_speech, speech_bounds, vad_stats, VAD_ENABLED
+from audio_utils import pcm16_to_float32, export_segments, save_results, EXPORT_CHUNKS
+from worker_pool import InferencePool
+from batching import BatchScheduler
+import metrics
+
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import model_registry
+
+# LLM 생성 지표(llm_*)도 공용 레지스트리에 등록 → /metrics 한 번으로 STT / LLM 지표를 함께 수집
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "LLM"))
+import llm_metrics  # noqa: F401
+
+# EEVE 토크나이저 / 모델(+ draft 모델)도 같은 model_registry 에 등록 → /models 에 표시, STT_WARMUP=1 이면 함께 워밍업
+# (peft 등 LLM 의존성이 없는 STT 전용 환경에서는 등록하지 않음)
+try:
+    import inference  # noqa: F401
+except ImportError as e:
+    print(f"⚠️ LLM 모델을 모델 레지스트리에 등록하지 않습니다: {e}")
 
 # ▶️ FastAPI 앱 생성
 app = FastAPI()
@@ -35,50 +60,314 @@ CHUNK_RATE = 16000
 TEMP_DIR = "temp_audio"
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+# 증분 화자 분리: 세션 동안 화자 ID 유지, 이전 윈도우의 짧은 tail 만 보관
+INCREMENTAL_DIARIZATION = os.getenv("STT_INCREMENTAL_DIARIZATION", "1") == "1"
+
+# 연결별로 분석 대기 중인 윈도우 최대 개수 (가득 차면 해당 연결의 수신만 잠시 멈춤)
+MAX_PENDING_WINDOWS = int(os.getenv("STT_MAX_PENDING_WINDOWS", "3"))
+
+# 📡 결과 전송 모드 (연결별로 /ws/audio?mode=segments&window=1&partials=1 처럼 변경 가능)
+# - "window": 윈도우의 모든 구간 전사가 끝나면 [{"speaker", "text"}, ...] 목록 1번 전송
+# - "segments": 구간마다 ASR 이 끝나는 대로 {"type": "final", "seq", "start", "end", ...} 전송
+STREAM_MODES = ("window", "segments")
+STREAM_MODE = os.getenv("STT_STREAM_MODE", "window")
+MIN_WINDOW_SECONDS = float(os.getenv("STT_MIN_WINDOW_SECONDS", "0.5"))
+MAX_WINDOW_SECONDS = float(os.getenv("STT_MAX_WINDOW_SECONDS", "30"))
+# segments 모드: 윈도우가 차기 전에 지금까지 받은 오디오의 임시 전사(partial) 를 보낼지 / 보내는 간격
+PARTIALS = os.getenv("STT_PARTIALS", "0") == "1"
+PARTIAL_INTERVAL_SECONDS = float(os.getenv("STT_PARTIAL_INTERVAL_SECONDS", "1.0"))
+# partial 은 최근 N초만 전사 (윈도우가 길어져도 공용 ASR 배치에 들어가는 partial 길이를 제한)
+PARTIAL_MAX_SECONDS = float(os.getenv("STT_PARTIAL_MAX_SECONDS", "5.0"))
+
+# 🧵 추론 전용 워커 풀 (이벤트 루프를 막지 않도록 분리)
+inference_pool = InferencePool()
+# 🧺 모든 세션의 ASR 구간을 모아 배치로 실행
+asr_batcher = BatchScheduler(transcribe_batch, sampling_rate=CHUNK_RATE)
+active_connections = {}
+
+@app.get("/queue")
+def queue_status():
+    return {
+        **inference_pool.stats(),
+        "connections": len(active_connections),
+        "pending_windows": sum(q.qsize() for q in active_connections.values()),
+        "asr_batcher": asr_batcher.stats(),
+        "vad": vad_stats.summary(),
+    }
+
+# Prometheus text 형식: 단계별 지연 / 오디오 길이 / RTF / 대기 시간 + LLM 생성 지연 / tokens/sec 히스토그램
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return metrics.render_prometheus()
+
+# 다음 윈도우 1건의 단계별 실행 구간을 Chrome trace(JSON) 로 저장 (STT_PROFILE_DIR)
+@app.get("/metrics/profile")
+def profile_next_window():
+    metrics.arm_profiler()
+    return {"armed": True, "output_dir": metrics.PROFILE_DIR}
+
+@app.get("/models")
+def model_status():
+    return model_registry.load_timings()
+
+# STT_WARMUP=1 이면 첫 요청 전에 모델 로딩 + 워밍업 (이벤트 루프는 막지 않음)
+@app.on_event("startup")
+async def warmup_models():
+    if model_registry.WARMUP_ON_START:
+        loop = asyncio.get_running_loop()
+        timings = await loop.run_in_executor(inference_pool.executor, model_registry.warmup)
+        print(f"🔥 모델 워밍업 완료: {timings}")
+
+@app.on_event("shutdown")
+def shutdown_pool():
+    inference_pool.shutdown()
+    asr_batcher.close()
+
+# 🔬 윈도우 화자 분리 + 구간 슬라이싱 (워커 스레드에서 실행)
+# 반환: [{"speaker", "audio", "start", "end"}] (start / end 는 세션 시작 기준 초)
+def diarize_window(wav_path, pcm_bytes, diarizer=None, window_offset=0.0):
+    # 수신한 PCM 버퍼를 그대로 배열로 변환 → WAV 재디코딩 없이 구간 슬라이싱
+    audio = pcm16_to_float32(pcm_bytes)
+
+    # 말소리가 없는 윈도우는 화자 분리 / STT 없이 건너뜀
+    if VAD_ENABLED:
+        vad_stats.add(total=len(audio) / CHUNK_RATE)
+        if not has_speech(audio, CHUNK_RATE):
+            vad_stats.add(skipped=len(audio) / CHUNK_RATE, skipped_windows=1)
+            if diarizer is not None:
+                diarizer.skip(audio)
+            return []
+
+    if diarizer is not None:
+        window, diarization_result, window_offset = diarizer.process(audio)
+    else:
+        with metrics.stage("wav_write"):
+            with wave.open(wav_path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(CHUNK_RATE)
+                wf.writeframes(pcm_bytes)
+
+        window = audio
+        diarization_result = run_diarization(wav_path)
+
+    segments = []
+    trimmed = 0
+    for turn in consolidate_turns(diarization_result):
+        start = max(0, int(turn["start"] * CHUNK_RATE))
+        end = min(len(window), int(turn["end"] * CHUNK_RATE))
+        if end <= start:
+            continue
+        # 구간 앞뒤 무음 제거 (음성이 없는 구간은 뺌), 타임스탬프도 잘라낸 만큼 조정
+        if VAD_ENABLED:
+            speech_start, speech_end = speech_bounds(window[start:end], CHUNK_RATE)
+            trimmed += (end - start) - (speech_end - speech_start)
+            if speech_end <= speech_start:
+                continue
+            start, end = start + speech_start, start + speech_end
+        segments.append({
+            "speaker": turn["speaker"],
+            "audio": window[start:end],
+            "start": round(window_offset + start / CHUNK_RATE, 2),
+            "end": round(window_offset + end / CHUNK_RATE, 2),
+        })
+    if VAD_ENABLED:
+        vad_stats.add(trimmed=trimmed / CHUNK_RATE)
+
+    if EXPORT_CHUNKS:
+        export_segments([(seg["speaker"], seg["audio"]) for seg in segments], sampling_rate=CHUNK_RATE)
+    return segments
+
+# 📤 대기 중인 윈도우를 순서대로 분석 → 결과 전송
+async def result_sender(websocket, pending, wav_path, diarizer):
+    while True:
+        enqueued, pcm_bytes, _, window_offset = await pending.get()
+        window_start = time.perf_counter()
+        metrics.observe_queue_wait("pending_windows", window_start - enqueued)
+        window_seconds = len(pcm_bytes) / 2 / CHUNK_RATE
+        # /metrics/profile 로 예약된 경우 이 윈도우의 단계별 구간을 trace 로 저장
+        trace = metrics.take_trace(os.path.splitext(os.path.basename(wav_path))[0])
+
+        segments = await inference_pool.run(metrics.traced(diarize_window, trace), wav_path, pcm_bytes, diarizer, window_offset)
+        # ASR 은 공용 배치 스케줄러로 → 다른 세션 구간과 함께 처리
+        chunks = [segment["audio"] for segment in segments]
+        asr_start = time.perf_counter()
+        transcriptions = await asr_batcher.transcribe_async(chunks)
+        metrics.record("asr_wait", asr_start, time.perf_counter(), sum(len(c) for c in chunks) / CHUNK_RATE, trace)
+
+        results = [
+            {"speaker": segment["speaker"], "text": text}
+            for segment, text in zip(segments, transcriptions)
+        ]
+        for res in results:
+            print(f"🗣️ [speaker {res['speaker']}] {res['text']}")
+
+        send_start = time.perf_counter()
+        await websocket.send_json(results)
+        send_end = time.perf_counter()
+        metrics.record("websocket_send", send_start, send_end, trace=trace)
+        metrics.record("window_total", window_start, send_end, window_seconds, trace)
+        if trace is not None:
+            print(f"🧭 trace 저장: {trace.dump()}")
+        print(f"📤 결과 전송 완료 (대기열: {inference_pool.stats()['queued']})")
+
+# 연결별 전송: segments 모드에서는 확정 결과와 partial 이 서로 다른 태스크에서 나가므로 순서를 잠금으로 보장
+async def send_message(websocket, session, message):
+    async with session["send_lock"]:
+        start = time.perf_counter()
+        await websocket.send_json(message)
+        metrics.record("websocket_send", start, time.perf_counter())
+
+# 📤 segments 모드: 구간별 ASR 이 끝나는 대로 전송 (seq 는 세션 내 구간의 시간 순서)
+async def segment_sender(websocket, pending, wav_path, diarizer, session):
+    seq = 0
+    while True:
+        enqueued, pcm_bytes, window_id, window_offset = await pending.get()
+        window_start = time.perf_counter()
+        metrics.observe_queue_wait("pending_windows", window_start - enqueued)
+        window_seconds = len(pcm_bytes) / 2 / CHUNK_RATE
+        trace = metrics.take_trace(os.path.splitext(os.path.basename(wav_path))[0])
+
+        segments = await inference_pool.run(metrics.traced(diarize_window, trace), wav_path, pcm_bytes, diarizer, window_offset)
+        futures = {}
+        for segment in segments:
+            futures[asyncio.wrap_future(asr_batcher.submit(segment["audio"]))] = {**segment, "seq": seq}
+            seq += 1
+
+        remaining = set(futures)
+        while remaining:
+            done, remaining = await asyncio.wait(remaining, return_when=asyncio.FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: futures[f]["seq"]):
+                segment = futures[future]
+                message = {
+                    "type": "final",
+                    "seq": segment["seq"],
+                    "window": window_id,
+                    "speaker": segment["speaker"],
+                    "start": segment["start"],
+                    "end": segment["end"],
+                    "text": future.result(),
+                }
+                await send_message(websocket, session, message)
+                # 윈도우가 분석 대기열에 들어간 뒤 이 구간 결과가 나가기까지
+                metrics.record("segment_final", enqueued, time.perf_counter(), segment["end"] - segment["start"], trace)
+                print(f"🗣️ [{segment['seq']}] [speaker {segment['speaker']}] {message['text']}")
+
+        # 이 윈도우의 확정 결과는 모두 전송됨 → 클라이언트는 이 윈도우의 partial 을 지움
+        async with session["send_lock"]:
+            session["final_window"] = window_id
+            await websocket.send_json({"type": "window_end", "window": window_id, "segments": len(segments)})
+        metrics.record("window_total", window_start, time.perf_counter(), window_seconds, trace)
+        if trace is not None:
+            print(f"🧭 trace 저장: {trace.dump()}")
+
+# 📝 segments 모드 partial: 아직 윈도우가 차지 않은 오디오의 최근 구간을 화자 분리 없이 임시 전사
+# start_seconds: pcm_bytes 시작 시각 (세션 시작 기준, 초)
+async def send_partial(websocket, session, window_id, start_seconds, pcm_bytes):
+    try:
+        audio = pcm16_to_float32(pcm_bytes)
+        if VAD_ENABLED and not has_speech(audio, CHUNK_RATE):
+            return
+        text = (await asr_batcher.transcribe_async([audio]))[0]
+        async with session["send_lock"]:
+            # 그 사이 윈도우가 확정되었으면 보내지 않음
+            if session["final_window"] >= window_id:
+                return
+            await websocket.send_json({
+                "type": "partial",
+                "window": window_id,
+                "start": round(start_seconds, 2),
+                "end": round(start_seconds + len(audio) / CHUNK_RATE, 2),
+                "text": text,
+            })
+    except Exception as e:
+        print(f"⚠️ partial 전송 실패: {e}")
+
+# 연결별 설정: 쿼리 파라미터(mode / window / partials) 가 없으면 환경 변수 기본값
+def stream_options(query_params):
+    mode = query_params.get("mode", STREAM_MODE)
+    if mode not in STREAM_MODES:
+        raise ValueError(f"알 수 없는 전송 모드: {mode}")
+    window_seconds = float(query_params.get("window", BUFFER_TIME_SECONDS))
+    if not math.isfinite(window_seconds):
+        raise ValueError(f"잘못된 윈도우 길이: {window_seconds}")
+    window_seconds = min(max(window_seconds, MIN_WINDOW_SECONDS), MAX_WINDOW_SECONDS)
+    partials = mode == "segments" and query_params.get("partials", "1" if PARTIALS else "0") == "1"
+    return {"mode": mode, "window_seconds": window_seconds, "partials": partials}
+
+# 수신/대기 중에도 분석 태스크의 에러를 바로 전파
+async def wait_with_sender(coro, sender):
+    task = asyncio.create_task(coro)
+    done, _ = await asyncio.wait({task, sender}, return_when=asyncio.FIRST_COMPLETED)
+    if task not in done:
+        task.cancel()
+        sender.result()
+        raise RuntimeError("결과 전송 태스크가 종료되었습니다.")
+    return task.result()
+
 @app.websocket("/ws/audio")
 async def websocket_endpoint(websocket: WebSocket):
+    try:
+        options = stream_options(websocket.query_params)
+    except ValueError as e:
+        print(f"❌ 잘못된 연결 설정: {e}")
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
-    print("✅ 클라이언트 WebSocket 연결됨")
+    print(f"✅ 클라이언트 WebSocket 연결됨 ({options})")
 
     audio_buffer = bytearray()
     file_id = str(uuid.uuid4())
     wav_path = os.path.join(TEMP_DIR, f"{file_id}.wav")
+    window_bytes = int(options["window_seconds"] * CHUNK_RATE) * 2
+    partial_bytes = int(PARTIAL_INTERVAL_SECONDS * CHUNK_RATE) * 2
+    partial_max_bytes = int(PARTIAL_MAX_SECONDS * CHUNK_RATE) * 2
+    window_id = 0
+    window_offset = 0.0  # 세션 시작부터 현재 윈도우 시작까지(초)
+    partial_mark = 0
+
+    pending = asyncio.Queue(maxsize=MAX_PENDING_WINDOWS)
+    active_connections[file_id] = pending
+    # 윈도우는 연결별로 순서대로 처리되므로 diarizer 상태를 동시에 건드리지 않음
+    diarizer = StreamingDiarizer(sampling_rate=CHUNK_RATE) if INCREMENTAL_DIARIZATION else None
+    session = {"send_lock": asyncio.Lock(), "final_window": -1, "partial_task": None}
+    if options["mode"] == "segments":
+        sender = asyncio.create_task(segment_sender(websocket, pending, wav_path, diarizer, session))
+    else:
+        sender = asyncio.create_task(result_sender(websocket, pending, wav_path, diarizer))
 
     try:
         while True:
-            data = await websocket.receive_bytes()
+            data = await wait_with_sender(websocket.receive_bytes(), sender)
             print(f"🎙️ {len(data)}바이트 오디오 수신됨")
             audio_buffer.extend(data)
 
-            if len(audio_buffer) >= CHUNK_RATE * 2 * BUFFER_TIME_SECONDS:
-                print(f"📦 {BUFFER_TIME_SECONDS}초 분량 수신 → 저장 및 분석")
-
-                with wave.open(wav_path, "wb") as wf:
-                    wf.setnchannels(1)
-                    wf.setsampwidth(2)
-                    wf.setframerate(CHUNK_RATE)
-                    wf.writeframes(audio_buffer)
-
-                diarization_result = run_diarization(wav_path)
-                speaker_segments = split_audio_by_speaker(wav_path, diarization_result)
-                filepaths = [path for _, path in speaker_segments]
-                transcriptions = transcribe_batch(filepaths)
-
-                results = [
-                    {"speaker": speaker, "text": text}
-                    for (speaker, _), text in zip(speaker_segments, transcriptions)
-                ]
-
-                for res in results:
-                    print(f"🗣️ [speaker {res['speaker']}] {res['text']}")
-
-                await websocket.send_json(results)
-                print("📤 결과 전송 완료")
+            if len(audio_buffer) >= window_bytes:
+                print(f"📦 {len(audio_buffer) / 2 / CHUNK_RATE:.1f}초 분량 수신 → 분석 대기열에 추가")
+                # 대기열이 가득 차면 여기서 기다림 → 이 연결에만 backpressure
+                item = (time.perf_counter(), bytes(audio_buffer), window_id, window_offset)
+                await wait_with_sender(pending.put(item), sender)
+                window_offset += len(audio_buffer) / 2 / CHUNK_RATE
+                window_id += 1
+                partial_mark = 0
                 audio_buffer.clear()
+            elif (options["partials"] and len(audio_buffer) - partial_mark >= partial_bytes
+                    and (session["partial_task"] is None or session["partial_task"].done())):
+                # 이전 partial 이 끝났을 때만 새로 요청 (연결당 1개)
+                partial_mark = len(audio_buffer)
+                tail_start = max(0, len(audio_buffer) - partial_max_bytes)
+                session["partial_task"] = asyncio.create_task(send_partial(
+                    websocket, session, window_id, window_offset + tail_start / 2 / CHUNK_RATE, bytes(audio_buffer[tail_start:])
+                ))
 
     except Exception as e:
         print(f"❌ 에러 발생: {e}")
         await websocket.close()
+    finally:
+        sender.cancel()
+        if session["partial_task"] is not None:
+            session["partial_task"].cancel()
+        active_connections.pop(file_id, None)
 
 # 🟢 서버 실행 + ngrok 통합
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+import os
+
+# 📦 구간 정리 설정
+MERGE_GAP_SECONDS = float(os.getenv("STT_MERGE_GAP_SECONDS", "0.5"))      # 같은 화자 구간 사이 간격이 이 이하면 합침
+MIN_SEGMENT_SECONDS = float(os.getenv("STT_MIN_SEGMENT_SECONDS", "0.3"))  # 이보다 짧은 조각은 이웃에 붙이거나 버림
+MAX_SEGMENT_SECONDS = float(os.getenv("STT_MAX_SEGMENT_SECONDS", "30"))   # Whisper 입력 창(30초)을 넘지 않도록 제한
+
+def consolidate_turns(turns, max_gap=MERGE_GAP_SECONDS, min_duration=MIN_SEGMENT_SECONDS, max_duration=MAX_SEGMENT_SECONDS):
+    """화자 분리 결과({"speaker", "start", "end"}) 를 ASR 에 넘기기 좋은 구간 목록으로 정리.
+
+    1. 시간순으로 같은 화자의 연속 구간은 간격이 max_gap 이하이고 합친 길이가 max_duration 이하이면 합친다.
+    2. min_duration 보다 짧은 조각은 max_gap 안에 있는 앞(없으면 뒤) 구간에 붙이고, 붙일 곳이 없으면 버린다.
+    """
+    merged = []
+    for turn in sorted(turns, key=lambda t: (t["start"], t["end"])):
+        last = merged[-1] if merged else None
+        if (last is not None and last["speaker"] == turn["speaker"]
+                and turn["start"] - last["end"] <= max_gap
+                and max(last["end"], turn["end"]) - last["start"] <= max_duration):
+            last["end"] = max(last["end"], turn["end"])
+        else:
+            merged.append(dict(turn))
+
+    segments = []
+    for i, segment in enumerate(merged):
+        if segment["end"] - segment["start"] >= min_duration:
+            segments.append(segment)
+            continue
+
+        previous = segments[-1] if segments else None
+        following = merged[i + 1] if i + 1 < len(merged) else None
+        if (previous is not None and segment["start"] - previous["end"] <= max_gap
+                and segment["end"] - previous["start"] <= max_duration):
+            previous["end"] = max(previous["end"], segment["end"])
+        elif (following is not None and following["start"] - segment["end"] <= max_gap
+                and following["end"] - segment["start"] <= max_duration):
+            following["start"] = min(following["start"], segment["start"])
+    return segments
+
+def bucket_by_length(lengths, batch_size):
+    """길이 순으로 정렬한 인덱스를 batch_size 개씩 나눈 배치 목록 (비슷한 길이끼리 묶어 패딩 낭비를 줄임)."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
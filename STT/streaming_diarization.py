@@ -0,0 +1,107 @@
+import os
+import numpy as np
+
+from diarization import diarize_waveform
+
+# 📦 증분 화자 분리 설정
+OVERLAP_SECONDS = float(os.getenv("STT_DIARIZATION_OVERLAP_SECONDS", "2.0"))
+SPEAKER_MATCH_THRESHOLD = float(os.getenv("STT_SPEAKER_MATCH_THRESHOLD", "0.5"))  # 코사인 유사도
+MAX_SPEAKERS = int(os.getenv("STT_MAX_SPEAKERS", "8"))
+UNKNOWN_SPEAKER = "SPEAKER_UNK"
+
+class StreamingDiarizer:
+    """세션 단위 증분 화자 분리.
+
+    윈도우마다 (이전 윈도우의 짧은 tail + 새 오디오) 만 분리하고, 윈도우 내 라벨은
+    세션에 캐시된 화자 임베딩 중심(centroid)과의 코사인 유사도로 세션 화자 ID 에 매칭한다.
+    보관하는 상태는 tail 오디오와 화자별 centroid 뿐이므로 세션이 길어져도 윈도우당 비용이 일정하다.
+    """
+
+    def __init__(self, sampling_rate=16000, overlap_seconds=OVERLAP_SECONDS,
+                 threshold=SPEAKER_MATCH_THRESHOLD, max_speakers=MAX_SPEAKERS, diarize_fn=diarize_waveform):
+        self.sampling_rate = sampling_rate
+        self.overlap_samples = int(overlap_seconds * sampling_rate)
+        self.threshold = threshold
+        self.max_speakers = max_speakers
+        self.diarize_fn = diarize_fn
+
+        self.centroids = []  # 화자별 단위 벡터 평균
+        self.counts = []
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.elapsed = 0.0  # 세션 시작부터 tail 시작까지의 시간(초)
+
+    def _match_speaker(self, embedding, used):
+        vector = embedding / np.linalg.norm(embedding)
+
+        best_id, best_sim = None, -1.0
+        for speaker_id, centroid in enumerate(self.centroids):
+            if speaker_id in used:
+                continue
+            sim = float(np.dot(vector, centroid) / np.linalg.norm(centroid))
+            if sim > best_sim:
+                best_id, best_sim = speaker_id, sim
+
+        if best_id is None or (best_sim < self.threshold and len(self.centroids) < self.max_speakers):
+            if len(self.centroids) >= self.max_speakers:
+                return None
+            self.centroids.append(vector)
+            self.counts.append(1)
+            return len(self.centroids) - 1
+
+        # 기존 화자 → 중심 갱신 (누적 평균)
+        n = self.counts[best_id]
+        self.centroids[best_id] = (self.centroids[best_id] * n + vector) / (n + 1)
+        self.counts[best_id] = n + 1
+        return best_id
+
+    # 윈도우 라벨(SPEAKER_00 ...) → 세션 화자 ID
+    def assign_speakers(self, speaker_embeddings):
+        mapping = {}
+        used = set()
+        for label, embedding in speaker_embeddings.items():
+            embedding = np.asarray(embedding, dtype=np.float32)
+            if not np.all(np.isfinite(embedding)) or not np.any(embedding):
+                mapping[label] = UNKNOWN_SPEAKER
+                continue
+            speaker_id = self._match_speaker(embedding, used)
+            if speaker_id is None:
+                mapping[label] = UNKNOWN_SPEAKER
+                continue
+            used.add(speaker_id)
+            mapping[label] = f"SPEAKER_{speaker_id:02d}"
+        return mapping
+
+    # 음성이 없어 건너뛴 오디오: 시간만 진행시키고 tail 은 비움 (다음 윈도우와 이어지지 않으므로)
+    def skip(self, audio):
+        self.elapsed += (len(self.tail) + len(audio)) / self.sampling_rate
+        self.tail = np.zeros(0, dtype=np.float32)
+
+    def process(self, audio):
+        """새 오디오(float32) 를 처리하여 (윈도우 오디오, 구간 목록, 윈도우 시작 시각) 반환.
+
+        구간의 start/end 는 윈도우 기준 초 단위이며, 이전 윈도우에서 이미 내보낸
+        tail 구간은 잘라낸다. 세션 기준 시각은 윈도우 시작 시각 + start.
+        """
+        window = np.concatenate([self.tail, audio]) if len(self.tail) else audio
+        window_start = self.elapsed
+        tail_seconds = len(self.tail) / self.sampling_rate
+
+        turns, speaker_embeddings = self.diarize_fn(window, self.sampling_rate, return_embeddings=True)
+        mapping = self.assign_speakers(speaker_embeddings)
+
+        segments = []
+        for turn in turns:
+            start = max(turn["start"], tail_seconds)
+            if turn["end"] <= start:
+                continue
+            segments.append({
+                "speaker": mapping.get(turn["speaker"], UNKNOWN_SPEAKER),
+                "start": round(start, 2),
+                "end": turn["end"],
+            })
+
+        # 다음 윈도우를 위해 마지막 overlap 구간만 보관
+        keep = min(self.overlap_samples, len(window))
+        self.tail = window[len(window) - keep:].copy()
+        self.elapsed = window_start + (len(window) - keep) / self.sampling_rate
+        return window, segments, window_start
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# STT 폴더의 모듈을 스크립트와 같은 방식(최상위 import)으로 불러옴
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -0,0 +1,35 @@
+import pytest
+
+from batching import BatchScheduler
+
+
+def test_batches_segments_and_preserves_order():
+    calls = []
+
+    def transcribe_fn(chunks, sampling_rate, batch_size):
+        calls.append(batch_size)
+        return [f"t{chunk}" for chunk in chunks]
+
+    scheduler = BatchScheduler(transcribe_fn, max_batch_size=4, max_wait_ms=50)
+    try:
+        assert scheduler.transcribe([1, 2, 3]) == ["t1", "t2", "t3"]
+        stats = scheduler.stats()
+        assert stats["segments"] == 3
+        assert stats["batches"] == len(calls)
+    finally:
+        scheduler.close()
+
+
+def test_failed_batch_does_not_stop_the_thread():
+    def transcribe_fn(chunks, sampling_rate, batch_size):
+        if chunks == ["bad"]:
+            raise RuntimeError("boom")
+        return [f"t{chunk}" for chunk in chunks]
+
+    scheduler = BatchScheduler(transcribe_fn, max_batch_size=1, max_wait_ms=0)
+    try:
+        with pytest.raises(RuntimeError):
+            scheduler.submit("bad").result(timeout=5)
+        assert scheduler.submit("ok").result(timeout=5) == "tok"
+    finally:
+        scheduler.close()
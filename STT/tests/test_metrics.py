@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+import metrics
+
+LLM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "LLM")
+
+@pytest.fixture(scope="module")
+def llm_metrics():
+    sys.path.append(LLM_DIR)
+    import llm_metrics
+    return llm_metrics
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_histogram_seconds", "테스트", (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe("a", value)
+    text = histogram.render()
+    assert 'test_histogram_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_histogram_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'test_histogram_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_histogram_seconds_count{stage="a"} 3' in text
+
+def test_render_includes_stt_and_llm_series(llm_metrics):
+    metrics.record("diarization", 0.0, 0.5, audio=10.0)
+    llm_metrics.record_generation("generate", 2.0, 64)
+    text = metrics.render_prometheus()
+    assert 'stt_stage_seconds_count{stage="diarization"}' in text
+    assert 'llm_stage_seconds_count{stage="generate"}' in text
+    assert 'llm_tokens_per_second_bucket{stage="generate",le="50"}' in text
+
+def test_metrics_endpoint_includes_llm_series(llm_metrics):
+    testclient = pytest.importorskip("fastapi.testclient")
+    realtime = pytest.importorskip("realtime")
+
+    llm_metrics.record_generation("generate_batch", 1.0, 32)
+    response = testclient.TestClient(realtime.app).get("/metrics")
+    assert response.status_code == 200
+    assert 'llm_stage_seconds_count{stage="generate_batch"}' in response.text
+    assert "stt_stage_seconds" in response.text
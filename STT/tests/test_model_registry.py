@@ -0,0 +1,27 @@
+from common import model_registry
+
+
+def test_loads_once_and_reregister_replaces_loaded_model():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    model_registry.register("test_registry_model", loader)
+    first = model_registry.get("test_registry_model")
+    assert model_registry.get("test_registry_model") is first
+    assert len(calls) == 1
+
+    # stand-in 으로 덮어쓰면 이미 로딩된 모델 대신 새 로더의 결과를 사용
+    model_registry.register("test_registry_model", lambda: "stub")
+    assert not model_registry.is_loaded("test_registry_model")
+    assert model_registry.get("test_registry_model") == "stub"
+
+def test_warmup_records_timings():
+    warmed = []
+    model_registry.register("test_registry_warm", lambda: "model", warmup=warmed.append)
+    timings = model_registry.warmup(["test_registry_warm"])
+    assert warmed == ["model"]
+    assert timings["test_registry_warm"]["loaded"] is True
+    assert "warmup_seconds" in timings["test_registry_warm"]
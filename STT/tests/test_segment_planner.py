@@ -0,0 +1,48 @@
+from segment_planner import bucket_by_length, consolidate_turns
+
+def turn(speaker, start, end):
+    return {"speaker": speaker, "start": start, "end": end}
+
+def spans(segments):
+    return [(s["speaker"], s["start"], s["end"]) for s in segments]
+
+def test_merges_same_speaker_within_gap():
+    turns = [turn("A", 0.0, 1.0), turn("A", 1.3, 2.0), turn("B", 2.1, 3.0), turn("A", 3.2, 4.0)]
+    assert spans(consolidate_turns(turns, max_gap=0.5, min_duration=0.0)) == [
+        ("A", 0.0, 2.0), ("B", 2.1, 3.0), ("A", 3.2, 4.0),
+    ]
+
+def test_does_not_merge_across_long_gap_or_max_duration():
+    turns = [turn("A", 0.0, 1.0), turn("A", 2.0, 3.0)]
+    assert len(consolidate_turns(turns, max_gap=0.5, min_duration=0.0)) == 2
+
+    turns = [turn("A", 0.0, 20.0), turn("A", 20.2, 35.0)]
+    assert spans(consolidate_turns(turns, max_gap=0.5, min_duration=0.0, max_duration=30)) == [
+        ("A", 0.0, 20.0), ("A", 20.2, 35.0),
+    ]
+
+def test_unsorted_input_and_input_not_modified():
+    turns = [turn("A", 1.2, 2.0), turn("A", 0.0, 1.0)]
+    assert spans(consolidate_turns(turns, min_duration=0.0)) == [("A", 0.0, 2.0)]
+    assert turns[1] == turn("A", 0.0, 1.0)
+
+def test_short_fragment_attaches_to_previous_then_following():
+    # 짧은 B 조각: 앞 구간(A)에 붙음
+    turns = [turn("A", 0.0, 2.0), turn("B", 2.1, 2.2), turn("A", 5.0, 6.0)]
+    assert spans(consolidate_turns(turns, max_gap=0.5, min_duration=0.3)) == [("A", 0.0, 2.2), ("A", 5.0, 6.0)]
+
+    # 앞 구간이 멀면 뒤 구간에 붙음
+    turns = [turn("A", 0.0, 1.0), turn("B", 3.0, 3.1), turn("A", 3.3, 5.0)]
+    assert spans(consolidate_turns(turns, max_gap=0.5, min_duration=0.3)) == [("A", 0.0, 1.0), ("A", 3.0, 5.0)]
+
+def test_isolated_short_fragment_is_dropped():
+    turns = [turn("A", 0.0, 1.0), turn("B", 3.0, 3.1), turn("A", 6.0, 7.0)]
+    assert spans(consolidate_turns(turns, max_gap=0.5, min_duration=0.3)) == [("A", 0.0, 1.0), ("A", 6.0, 7.0)]
+    assert consolidate_turns([]) == []
+
+def test_bucket_by_length_groups_similar_lengths():
+    lengths = [5.0, 1.0, 30.0, 2.0, 29.0, 4.0]
+    batches = bucket_by_length(lengths, 2)
+    assert batches == [[1, 3], [5, 0], [4, 2]]
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    assert bucket_by_length([], 4) == []
@@ -0,0 +1,42 @@
+import numpy as np
+
+from vad import VAD_FRAME_MS, VadStats, speech_bounds, trim_segments
+
+SR = 16000
+FRAME = SR * VAD_FRAME_MS // 1000
+
+def tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+def silence(seconds):
+    return np.zeros(int(seconds * SR), dtype=np.float32)
+
+def test_speech_bounds_pads_around_speech():
+    audio = np.concatenate([silence(1.0), tone(1.0), silence(1.0)])
+    start, end = speech_bounds(audio, SR, pad=0.2)
+    # 프레임 단위로 판정하므로 실제 경계에서 프레임 1개 이내
+    assert SR * 0.8 - FRAME <= start <= SR * 0.8
+    assert SR * 2.2 <= end <= SR * 2.2 + FRAME
+
+def test_speech_bounds_clamps_to_chunk():
+    audio = tone(0.5)
+    assert speech_bounds(audio, SR, pad=0.2) == (0, len(audio))
+
+def test_speech_bounds_without_speech():
+    assert speech_bounds(silence(1.0), SR) == (0, 0)
+    assert speech_bounds(silence(0.0), SR) == (0, 0)
+
+def test_trim_segments_drops_silent_and_counts_removed():
+    stats = VadStats()
+    speech = np.concatenate([silence(1.0), tone(0.5), silence(1.0)])
+    segments = [("A", speech), ("B", silence(0.7)), ("C", tone(0.4))]
+
+    trimmed = trim_segments(segments, SR, stats=stats)
+
+    assert [speaker for speaker, _ in trimmed] == ["A", "C"]
+    start, end = speech_bounds(speech, SR)
+    assert np.array_equal(trimmed[0][1], speech[start:end])
+    assert len(trimmed[1][1]) == int(0.4 * SR)
+    removed = (len(speech) - (end - start)) / SR + 0.7
+    assert abs(stats.summary()["trimmed_seconds"] - round(removed, 2)) < 1e-9
@@ -0,0 +1,117 @@
+import os
+import threading
+
+import numpy as np
+
+# 📦 음성 구간 검출(VAD) 설정 — 프레임 RMS 에너지 기준
+VAD_ENABLED = os.getenv("STT_VAD", "1") == "1"
+VAD_FRAME_MS = int(os.getenv("STT_VAD_FRAME_MS", "30"))
+VAD_THRESHOLD_DB = float(os.getenv("STT_VAD_THRESHOLD_DB", "-45"))      # 이 dBFS 이상인 프레임을 음성으로 봄
+VAD_MIN_SPEECH_SECONDS = float(os.getenv("STT_VAD_MIN_SPEECH_SECONDS", "0.3"))  # 윈도우에 이만큼 음성이 없으면 건너뜀
+VAD_PAD_SECONDS = float(os.getenv("STT_VAD_PAD_SECONDS", "0.2"))       # 앞뒤 무음 제거 시 남겨 둘 여유
+VAD_MAX_SILENCE_SECONDS = float(os.getenv("STT_VAD_MAX_SILENCE_SECONDS", "2.0"))  # 오프라인: 이보다 긴 무음만 잘라냄
+
+class VadStats:
+    """건너뛴 / 잘라낸 오디오 길이 누적 (초)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total_seconds = 0.0
+        self.skipped_seconds = 0.0   # 음성이 없어 통째로 건너뛴 윈도우
+        self.trimmed_seconds = 0.0   # 구간 앞뒤 / 긴 무음에서 잘라낸 부분
+        self.skipped_windows = 0
+
+    def add(self, total=0.0, skipped=0.0, trimmed=0.0, skipped_windows=0):
+        with self._lock:
+            self.total_seconds += total
+            self.skipped_seconds += skipped
+            self.trimmed_seconds += trimmed
+            self.skipped_windows += skipped_windows
+
+    def summary(self):
+        with self._lock:
+            removed = self.skipped_seconds + self.trimmed_seconds
+            return {
+                "total_seconds": round(self.total_seconds, 2),
+                "skipped_seconds": round(self.skipped_seconds, 2),
+                "trimmed_seconds": round(self.trimmed_seconds, 2),
+                "skipped_windows": self.skipped_windows,
+                "removed_ratio": round(removed / self.total_seconds, 3) if self.total_seconds else 0.0,
+            }
+
+# 프로세스 전체 누적 통계 (realtime 서버의 /queue 에서 확인)
+vad_stats = VadStats()
+
+def speech_frames(audio, sampling_rate=16000, frame_ms=VAD_FRAME_MS, threshold_db=VAD_THRESHOLD_DB):
+    """프레임별 음성 여부(bool 배열). 마지막 불완전 프레임은 앞 프레임과 같은 길이로 맞춰 계산."""
+    frame = max(1, int(sampling_rate * frame_ms / 1000))
+    count = -(-len(audio) // frame)
+    if count == 0:
+        return np.zeros(0, dtype=bool)
+    padded = np.zeros(count * frame, dtype=np.float32)
+    padded[:len(audio)] = audio
+    rms = np.sqrt(np.mean(padded.reshape(count, frame) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10)) >= threshold_db
+
+def has_speech(audio, sampling_rate=16000, min_speech=VAD_MIN_SPEECH_SECONDS):
+    frames = speech_frames(audio, sampling_rate)
+    return frames.sum() * VAD_FRAME_MS / 1000 >= min_speech
+
+def speech_bounds(chunk, sampling_rate=16000, pad=VAD_PAD_SECONDS):
+    """앞뒤 무음을 뺀 음성 범위 (시작, 끝) 샘플 인덱스 (음성이 전혀 없으면 (0, 0))."""
+    frames = speech_frames(chunk, sampling_rate)
+    voiced = np.flatnonzero(frames)
+    if len(voiced) == 0:
+        return 0, 0
+    frame = max(1, int(sampling_rate * VAD_FRAME_MS / 1000))
+    pad_samples = int(pad * sampling_rate)
+    start = max(0, voiced[0] * frame - pad_samples)
+    end = min(len(chunk), (voiced[-1] + 1) * frame + pad_samples)
+    return start, end
+
+def trim_silence(chunk, sampling_rate=16000, pad=VAD_PAD_SECONDS):
+    """앞뒤 무음을 잘라낸 view 반환 (음성이 전혀 없으면 길이 0)."""
+    start, end = speech_bounds(chunk, sampling_rate, pad)
+    return chunk[start:end]
+
+def trim_segments(speaker_segments, sampling_rate=16000, stats=vad_stats):
+    """(화자, 구간) 목록의 각 구간 앞뒤 무음을 제거하고, 음성이 없는 구간은 뺌."""
+    trimmed = []
+    removed = 0
+    for speaker, chunk in speaker_segments:
+        speech = trim_silence(chunk, sampling_rate)
+        removed += len(chunk) - len(speech)
+        if len(speech):
+            trimmed.append((speaker, speech))
+    stats.add(trimmed=removed / sampling_rate)
+    return trimmed
+
+def remove_long_silences(audio, sampling_rate=16000, max_silence=VAD_MAX_SILENCE_SECONDS, pad=VAD_PAD_SECONDS):
+    """max_silence 보다 긴 무음 구간을 잘라내고 이어 붙인 배열과 잘라낸 길이(초)를 반환.
+
+    짧은 쉼은 남겨 두어 화자 전환 경계가 자연스럽게 유지되도록 한다. 잘라낼 곳이 없으면 원본을 그대로 반환.
+    """
+    frames = speech_frames(audio, sampling_rate)
+    frame = max(1, int(sampling_rate * VAD_FRAME_MS / 1000))
+    max_silent_frames = int(max_silence * 1000 / VAD_FRAME_MS)
+    pad_frames = int(pad * 1000 / VAD_FRAME_MS)
+
+    keep = frames.copy()
+    silent_run = 0
+    for i, voiced in enumerate(np.append(frames, True)):
+        if not voiced:
+            silent_run += 1
+            continue
+        if 0 < silent_run <= max_silent_frames:
+            keep[i - silent_run:i] = True
+        elif silent_run > max_silent_frames:
+            # 긴 무음: 앞뒤 pad 만 남김
+            keep[i - silent_run:i - silent_run + pad_frames] = True
+            keep[max(i - pad_frames, i - silent_run):i] = True
+        silent_run = 0
+
+    if keep.all():
+        return audio, 0.0
+    mask = np.repeat(keep, frame)[:len(audio)]
+    kept = audio[mask]
+    return kept, (len(audio) - len(kept)) / sampling_rate
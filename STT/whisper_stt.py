@@ -1,33 +1,96 @@
 import torch
 from transformers import pipeline, AutoModelForSpeechSeq2Seq, AutoProcessor
+import numpy as np
 import os
-from datasets import Dataset
+import sys
 from dotenv import load_dotenv
 
+import metrics
+from segment_planner import bucket_by_length
+
+# STT / LLM 공용 모듈(common 패키지)은 저장소 루트에 있음
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import model_registry
+
 load_dotenv()
 HF_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
+# 추론 장치: "auto"(CUDA 있으면 사용) / "cuda" / "cpu"
+STT_DEVICE = os.getenv("STT_DEVICE", "auto")
+# CPU 백엔드: 연산 스레드 수 (0 이면 torch 기본값), Linear 레이어 동적 int8 양자화 여부
+STT_CPU_THREADS = int(os.getenv("STT_CPU_THREADS", "0"))
+STT_CPU_QUANTIZE = os.getenv("STT_CPU_QUANTIZE", "1") == "1"
+
+if STT_DEVICE == "auto":
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+else:
+    device = STT_DEVICE
 
 model_id = "openai/whisper-large-v3-turbo"
-model = AutoModelForSpeechSeq2Seq.from_pretrained(
-    model_id,
-    torch_dtype=torch.float16 if device == "cuda" else torch.float32,
-    token=HF_TOKEN
-).to(device)
-
-processor = AutoProcessor.from_pretrained(model_id)
-
-asr_pipeline = pipeline(
-    "automatic-speech-recognition",
-    model=model,
-    tokenizer=processor.tokenizer,
-    feature_extractor=processor.feature_extractor,
-    device=0 if device == "cuda" else -1,
-    return_timestamps=False
-)
-
-def transcribe_batch(filepaths):
-    dataset = Dataset.from_dict({"audio": filepaths})
-    results = asr_pipeline(dataset["audio"])
-    return [r["text"] for r in results]
+
+# transcribe_batch 에서 batch_size 를 주지 않았을 때 한 번에 처리할 구간 수
+ASR_BATCH_SIZE = int(os.getenv("STT_ASR_BATCH_SIZE", "8"))
+
+# CPU 에서는 스레드 수를 고정하고 Linear 가중치를 int8 로 동적 양자화 (활성값은 실행 시 양자화)
+def prepare_cpu_model(model, threads=STT_CPU_THREADS, quantize=STT_CPU_QUANTIZE):
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if quantize:
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+# 모델은 import 시점이 아니라 첫 사용 시점에 1회만 로딩 (model_registry 가 공유)
+def load_asr_pipeline():
+    model = AutoModelForSpeechSeq2Seq.from_pretrained(
+        model_id,
+        torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+        attn_implementation="sdpa",
+        low_cpu_mem_usage=True,
+        token=HF_TOKEN
+    ).to(device)
+    model.eval()
+    if device == "cpu":
+        model = prepare_cpu_model(model)
+
+    processor = AutoProcessor.from_pretrained(model_id)
+
+    return pipeline(
+        "automatic-speech-recognition",
+        model=model,
+        tokenizer=processor.tokenizer,
+        feature_extractor=processor.feature_extractor,
+        device=0 if device == "cuda" else -1,
+        return_timestamps=False
+    )
+
+# 워밍업: 1초 무음으로 1회 추론
+def warmup_asr_pipeline(asr_pipeline):
+    asr_pipeline({"raw": np.zeros(16000, dtype=np.float32), "sampling_rate": 16000})
+
+model_registry.register("whisper", load_asr_pipeline, warmup=warmup_asr_pipeline)
+
+def get_asr_pipeline():
+    return model_registry.get("whisper")
+
+# 입력: 파일 경로 또는 16kHz float32 배열(화자별 구간 view)
+# 배열은 길이가 비슷한 것끼리 batch_size 개씩 묶어 파이프라인이 패딩하여 처리하고, 결과는 입력 순서로 복원
+def transcribe_batch(inputs, sampling_rate=16000, batch_size=None):
+    if len(inputs) == 0:
+        return []
+    asr_pipeline = get_asr_pipeline()
+    batch_size = batch_size or ASR_BATCH_SIZE
+
+    # 파일 경로는 길이를 알 수 없으므로 입력 순서 그대로 처리
+    if any(isinstance(x, str) for x in inputs):
+        with metrics.stage("asr"):
+            return [r["text"] for r in asr_pipeline(list(inputs), batch_size=batch_size)]
+
+    texts = [None] * len(inputs)
+    with metrics.stage("asr", audio=sum(len(x) for x in inputs) / sampling_rate):
+        for bucket in bucket_by_length([len(x) for x in inputs], batch_size):
+            # 파이프라인이 dict를 수정하므로 호출마다 새 dict로 감싸서 전달
+            audio_inputs = [{"raw": inputs[i], "sampling_rate": sampling_rate} for i in bucket]
+            results = asr_pipeline(audio_inputs, batch_size=len(bucket))
+            for i, result in zip(bucket, results):
+                texts[i] = result["text"]
+    return texts
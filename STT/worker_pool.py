@@ -0,0 +1,78 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# 📦 추론 워커 설정
+INFERENCE_WORKERS = int(os.getenv("STT_INFERENCE_WORKERS", "2"))
+MAX_QUEUED_JOBS = int(os.getenv("STT_MAX_QUEUED_JOBS", "32"))
+
+class InferencePool:
+    """화자 분리 / ASR 같은 무거운 동기 작업을 이벤트 루프 밖의 스레드 풀에서 실행.
+
+    대기 + 실행 중인 작업 수는 max_queued 로 제한되며, 가득 차면 submit 을
+    호출한 코루틴만 대기하므로 다른 연결의 수신은 계속된다.
+    """
+
+    def __init__(self, max_workers=INFERENCE_WORKERS, max_queued=MAX_QUEUED_JOBS):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt-infer")
+        self._slots = asyncio.Semaphore(max_queued)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def run(self, fn, *args):
+        async with self._slots:
+            with self._lock:
+                self.queued += 1
+            job = {"dequeued": False, "submitted": time.perf_counter()}
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self.executor, self._call, job, fn, args)
+            except asyncio.CancelledError:
+                # 연결이 끊겨 취소된 작업은 대기열 카운트에서 제외
+                self._dequeue(job)
+                raise
+
+    def _dequeue(self, job):
+        with self._lock:
+            if not job["dequeued"]:
+                job["dequeued"] = True
+                self.queued -= 1
+
+    def _call(self, job, fn, args):
+        self._dequeue(job)
+        metrics.observe_queue_wait("inference_pool", time.perf_counter() - job["submitted"])
+        with self._lock:
+            self.running += 1
+        try:
+            return fn(*args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queued": self.max_queued,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "STT"), os.path.join(ROOT, "LLM")]
+
+from synthetic import make_recordings, SAMPLING_RATE
+import stubs
+
+# ====== 측정 도구 ======
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def latency_summary(seconds):
+    return {
+        "count": len(seconds),
+        "p50_ms": round(percentile(seconds, 50) * 1000, 2),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 2),
+        "p99_ms": round(percentile(seconds, 99) * 1000, 2),
+        "max_ms": round(max(seconds) * 1000, 2) if seconds else 0.0,
+    }
+
+# 프로세스 최대 RSS (단계를 순서대로 실행하므로 각 단계 종료 시점까지의 누적 최대값)
+# resource 모듈이 없는 Windows 에서는 측정하지 않음 (None)
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+# ====== 1. 오프라인 STT (main.py 와 같은 파이프라인) ======
+def bench_offline(recordings):
+    from pipeline import run_pipeline
+
+    # 파일 1개씩 처리할 때의 지연
+    latencies = []
+    for recording in recordings:
+        start = time.perf_counter()
+        run_pipeline([recording["path"]])
+        latencies.append(time.perf_counter() - start)
+
+    # 여러 파일을 한 번에 처리할 때의 처리량 (화자 분리 / ASR 겹침 포함)
+    start = time.perf_counter()
+    results, stats = run_pipeline([r["path"] for r in recordings])
+    elapsed = time.perf_counter() - start
+    audio_seconds = sum(r["seconds"] for r in recordings)
+
+    return {
+        "files": len(recordings),
+        "segments": sum(len(r) for r in results),
+        "seconds": round(elapsed, 3),
+        "files_per_sec": round(len(recordings) / elapsed, 3),
+        "audio_seconds_per_sec": round(audio_seconds / elapsed, 2),
+        "rtf": round(elapsed / audio_seconds, 4),
+        "latency_per_file": latency_summary(latencies),
+        "pipeline": stats,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+# ====== 2. 실시간 WebSocket (realtime.py 를 로컬에서 띄우고 N 세션 동시 접속) ======
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _start_server(port):
+    import uvicorn
+    from realtime import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="bench-uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+async def _run_session(url, pcm_bytes, chunk_seconds, speed, window_bytes, latencies, first_latencies):
+    import websockets
+
+    chunk_bytes = int(chunk_seconds * SAMPLING_RATE) * 2
+    # 서버와 같은 규칙(버퍼가 윈도우 크기 이상이면 비움)으로 윈도우가 분석 대기열에 들어간 시각을 기록
+    window_sent = asyncio.Queue()
+    async with websockets.connect(url, max_size=None) as ws:
+        async def receive(count):
+            # window 모드: 윈도우마다 응답 1개 / segments 모드: 구간별 final 뒤에 window_end (partial 은 무시)
+            for _ in range(count):
+                sent_at = await window_sent.get()
+                first = None
+                while True:
+                    message = json.loads(await ws.recv())
+                    if isinstance(message, list) or message.get("type") == "window_end":
+                        break
+                    if message.get("type") == "final" and first is None:
+                        first = time.perf_counter() - sent_at
+                latencies.append(time.perf_counter() - sent_at)
+                if first is not None:
+                    first_latencies.append(first)
+
+        buffered = 0
+        windows = 0
+        for offset in range(0, len(pcm_bytes), chunk_bytes):
+            buffered += len(pcm_bytes[offset:offset + chunk_bytes])
+            if buffered >= window_bytes:
+                buffered = 0
+                windows += 1
+        receiver = asyncio.create_task(receive(windows))
+
+        buffered = 0
+        for offset in range(0, len(pcm_bytes), chunk_bytes):
+            chunk = pcm_bytes[offset:offset + chunk_bytes]
+            await ws.send(chunk)
+            buffered += len(chunk)
+            if buffered >= window_bytes:
+                buffered = 0
+                window_sent.put_nowait(time.perf_counter())
+            if speed > 0:
+                await asyncio.sleep(chunk_seconds / speed)
+        await receiver
+
+async def _run_sessions(url, recordings, sessions, chunk_seconds, speed, window_bytes):
+    import wave
+
+    latencies = []
+    first_latencies = []
+    tasks = []
+    for i in range(sessions):
+        with wave.open(recordings[i % len(recordings)]["path"], "rb") as wf:
+            pcm_bytes = wf.readframes(wf.getnframes())
+        tasks.append(_run_session(url, pcm_bytes, chunk_seconds, speed, window_bytes, latencies, first_latencies))
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return latencies, first_latencies, time.perf_counter() - start
+
+def bench_realtime(recordings, sessions, chunk_seconds, speed, stream_mode="window", window_seconds=None):
+    import realtime
+
+    port = _free_port()
+    server, thread = _start_server(port)
+    window_seconds = window_seconds or realtime.BUFFER_TIME_SECONDS
+    window_bytes = int(window_seconds * realtime.CHUNK_RATE) * 2
+    url = f"ws://127.0.0.1:{port}/ws/audio?mode={stream_mode}&window={window_seconds}"
+    try:
+        latencies, first_latencies, elapsed = asyncio.run(
+            _run_sessions(url, recordings, sessions, chunk_seconds, speed, window_bytes)
+        )
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    return {
+        "sessions": sessions,
+        "stream_mode": stream_mode,
+        "window_seconds": window_seconds,
+        "windows": len(latencies),
+        "seconds": round(elapsed, 3),
+        "windows_per_sec": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "send_speed": speed,
+        "window_latency": latency_summary(latencies),
+        # segments 모드: 윈도우 전송 완료 → 첫 구간 결과 수신까지
+        "first_segment_latency": latency_summary(first_latencies),
+        "queue": realtime.queue_status(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+# ====== 3. 파싱 + 치료 계획 생성 (parsing.py / inference.py) ======
+def bench_llm(count, num_turns, seed):
+    from bench_parsing import make_transcript
+    from parsing import extract_fields_from_transcript
+    import inference
+
+    rng = random.Random(seed)
+    transcripts = [make_transcript(num_turns, rng) for _ in range(count)]
+
+    parse_latencies = []
+    total_latencies = []
+    generated = 0
+    start = time.perf_counter()
+    for transcript in transcripts:
+        item_start = time.perf_counter()
+        input_text = extract_fields_from_transcript(transcript)
+        parse_latencies.append(time.perf_counter() - item_start)
+        if input_text.strip() != inference.NO_TREATMENT_TEXT:
+            inference.postprocess(inference.generate(input_text), input_text)
+            generated += 1
+        total_latencies.append(time.perf_counter() - item_start)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "transcripts": count,
+        "generated": generated,
+        "seconds": round(elapsed, 3),
+        "transcripts_per_sec": round(count / elapsed, 2),
+        "parse_latency": latency_summary(parse_latencies),
+        "end_to_end_latency": latency_summary(total_latencies),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+# ====== 이전 결과와 비교 ======
+COMPARE_KEYS = {
+    "offline": ["audio_seconds_per_sec", "latency_per_file.p95_ms"],
+    "realtime": ["windows_per_sec", "window_latency.p95_ms"],
+    "llm": ["transcripts_per_sec", "end_to_end_latency.p95_ms"],
+}
+
+def compare(report, baseline):
+    changes = {}
+    for stage, keys in COMPARE_KEYS.items():
+        if stage not in report or stage not in baseline:
+            continue
+        for key in keys:
+            current, previous = report[stage], baseline[stage]
+            for part in key.split("."):
+                current, previous = current[part], previous[part]
+            if previous:
+                changes[f"{stage}.{key}"] = round((current - previous) / previous * 100, 1)
+    return changes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="STT / LLM 전체 파이프라인 벤치마크 (기본: 결정적 stand-in 모델)")
+    parser.add_argument("--stages", nargs="+", choices=["offline", "realtime", "llm"], default=["offline", "realtime", "llm"])
+    parser.add_argument("--real-models", action="store_true", help="stand-in 대신 실제 모델 사용")
+    parser.add_argument("--recordings", type=int, default=4)
+    parser.add_argument("--recording-seconds", type=float, default=60)
+    parser.add_argument("--speakers", type=int, default=2)
+    parser.add_argument("--sessions", type=int, default=4, help="동시 WebSocket 세션 수")
+    parser.add_argument("--chunk-seconds", type=float, default=0.5, help="클라이언트가 한 번에 보내는 오디오 길이")
+    parser.add_argument("--send-speed", type=float, default=0, help="실시간 대비 전송 속도 (0 이면 대기 없이 전송)")
+    parser.add_argument("--stream-mode", choices=["window", "segments"], default="window", help="WebSocket 결과 전송 모드")
+    parser.add_argument("--window-seconds", type=float, help="연결별 윈도우 길이 (생략 시 서버 기본값)")
+    parser.add_argument("--transcripts", type=int, default=200)
+    parser.add_argument("--transcript-turns", type=int, default=20)
+    parser.add_argument("--diarization-cost", type=float, default=0.01, help="stand-in 화자 분리: 오디오 1초당 처리 시간")
+    parser.add_argument("--asr-cost", type=float, default=0.02, help="stand-in ASR: 오디오 1초당 처리 시간")
+    parser.add_argument("--asr-overhead", type=float, default=0.01, help="stand-in ASR: 배치 1회 고정 시간")
+    parser.add_argument("--token-cost", type=float, default=0.002, help="stand-in LLM: 토큰 1개당 생성 시간")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (생략 시 출력만)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON (주요 지표 변화율 % 를 함께 출력)")
+    args = parser.parse_args()
+
+    if not args.real_models:
+        # 결과 캐시가 반복 입력을 가로채지 않도록 끔
+        os.environ.setdefault("LLM_RESULT_CACHE", "0")
+        if {"offline", "realtime"} & set(args.stages):
+            stubs.install_stt_stubs(args.diarization_cost, args.asr_cost, args.asr_overhead)
+        if "llm" in args.stages:
+            stubs.install_llm_stub(args.token_cost)
+
+    report = {
+        "config": {**vars(args), "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        recordings = []
+        if {"offline", "realtime"} & set(args.stages):
+            recordings = make_recordings(tmp, args.recordings, args.recording_seconds, args.speakers, args.seed)
+        if "offline" in args.stages:
+            report["offline"] = bench_offline(recordings)
+        if "realtime" in args.stages:
+            report["realtime"] = bench_realtime(
+                recordings, args.sessions, args.chunk_seconds, args.send_speed, args.stream_mode, args.window_seconds
+            )
+        if "llm" in args.stages:
+            report["llm"] = bench_llm(args.transcripts, args.transcript_turns, args.seed)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["change_percent"] = compare(report, json.load(f))
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,190 @@
+import time
+import types
+import wave
+
+import numpy as np
+import torch
+
+from synthetic import SAMPLING_RATE
+
+# ====== 실제 모델 대신 쓰는 결정적 stand-in ======
+# 처리 비용은 오디오 길이 / 토큰 수에 비례하는 sleep 으로 흉내 내어 CPU 만으로도 파이프라인 구조(큐, 배치, 겹침)를 측정
+
+FRAME_SECONDS = 0.1
+PITCH_BIN_HZ = 40
+EMBEDDING_DIM = 64
+SILENCE_RMS = 0.02
+
+STUB_TEXTS = [
+    "오른쪽 위 어금니가 좀 아파요",
+    "신경치료가 필요해 보이고 약 2주 정도 걸립니다",
+    "찬물 마시면 이가 시려요",
+    "레진으로 때우시면 1일이면 끝나요",
+    "잇몸에서 피가 나요",
+    "스케일링 먼저 하시고 잇몸치료 진행하겠습니다",
+]
+
+def _read_wav(path):
+    with wave.open(path, "rb") as wf:
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+
+# 프레임별 주 음높이 구간 번호 (무음이면 -1)
+def pitch_bins(audio, sampling_rate=SAMPLING_RATE):
+    frame = int(FRAME_SECONDS * sampling_rate)
+    count = len(audio) // frame
+    bins = np.full(count, -1, dtype=np.int64)
+    if count == 0:
+        return bins
+    frames = audio[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    spectrum = np.abs(np.fft.rfft(frames, axis=1))
+    freqs = np.fft.rfftfreq(frame, 1 / sampling_rate)
+    dominant = freqs[np.argmax(spectrum[:, 1:], axis=1) + 1]
+    voiced = rms >= SILENCE_RMS
+    bins[voiced] = np.minimum((dominant[voiced] // PITCH_BIN_HZ).astype(np.int64), EMBEDDING_DIM - 1)
+    return bins
+
+class StubAnnotation:
+    """pyannote Annotation 중 _to_turns 가 쓰는 부분(itertracks / labels)만 흉내."""
+
+    def __init__(self, tracks):
+        self.tracks = tracks  # [(start, end, label)]
+
+    def itertracks(self, yield_label=False):
+        for start, end, label in self.tracks:
+            segment = types.SimpleNamespace(start=start, end=end)
+            yield (segment, None, label) if yield_label else (segment, None)
+
+    def labels(self):
+        return sorted({label for _, _, label in self.tracks})
+
+class StubDiarizationPipeline:
+    """음높이 구간이 같은 연속 프레임을 한 화자 구간으로 묶는 화자 분리. 임베딩은 음높이 구간 one-hot."""
+
+    def __init__(self, seconds_per_audio_second=0.01):
+        self.cost = seconds_per_audio_second
+
+    def __call__(self, file, return_embeddings=False):
+        if isinstance(file, str):
+            audio, sampling_rate = _read_wav(file), SAMPLING_RATE
+        else:
+            audio, sampling_rate = file["waveform"].numpy()[0], file["sample_rate"]
+        time.sleep(self.cost * len(audio) / sampling_rate)
+
+        tracks = []
+        labels = {}
+        current = None
+        for i, pitch_bin in enumerate(pitch_bins(audio, sampling_rate)):
+            start = i * FRAME_SECONDS
+            if pitch_bin < 0:
+                current = None
+                continue
+            label = labels.setdefault(int(pitch_bin), f"SPEAKER_{len(labels):02d}")
+            if current is not None and current[2] == label and abs(current[1] - start) < 1e-6:
+                current[1] = start + FRAME_SECONDS
+            else:
+                current = [start, start + FRAME_SECONDS, label]
+                tracks.append(current)
+        annotation = StubAnnotation([tuple(track) for track in tracks])
+
+        if not return_embeddings:
+            return annotation
+        embeddings = np.zeros((len(labels), EMBEDDING_DIM), dtype=np.float32)
+        for k, label in enumerate(annotation.labels()):
+            pitch_bin = next(b for b, name in labels.items() if name == label)
+            embeddings[k, pitch_bin] = 1.0
+        return annotation, embeddings
+
+class StubAsrPipeline:
+    """HF ASR 파이프라인 호출 형식을 따르는 전사기. 문장은 구간 길이와 음높이로 결정."""
+
+    def __init__(self, seconds_per_audio_second=0.02, seconds_per_call=0.01):
+        self.cost = seconds_per_audio_second
+        self.overhead = seconds_per_call
+
+    def __call__(self, inputs, batch_size=None):
+        single = not isinstance(inputs, list)
+        inputs = [inputs] if single else inputs
+        arrays = [_read_wav(x) if isinstance(x, str) else x["raw"] for x in inputs]
+        # 배치 1회 고정 비용 + 오디오 길이 비례 비용
+        batches = -(-len(arrays) // (batch_size or 1))
+        time.sleep(self.overhead * batches + self.cost * sum(len(a) for a in arrays) / SAMPLING_RATE)
+
+        results = []
+        for audio in arrays:
+            bins = pitch_bins(audio)
+            voiced = bins[bins >= 0]
+            key = int(np.bincount(voiced).argmax()) if len(voiced) else 0
+            results.append({"text": STUB_TEXTS[(key + len(audio) // SAMPLING_RATE) % len(STUB_TEXTS)]})
+        return results[0] if single else results
+
+def install_stt_stubs(diarization_cost=0.01, asr_cost=0.02, asr_overhead=0.01):
+    """model_registry 의 화자 분리 / Whisper 로더를 stand-in 으로 교체 (모델 로딩 전에 호출)."""
+    import diarization  # noqa: F401  (실제 로더를 먼저 등록시킨 뒤 덮어씀)
+    import whisper_stt  # noqa: F401
+    from common import model_registry
+
+    model_registry.register("diarization", lambda: StubDiarizationPipeline(diarization_cost))
+    model_registry.register("whisper", lambda: StubAsrPipeline(asr_cost, asr_overhead))
+
+def make_stub_tokenizer():
+    """글자 1개 = 토큰 1개인 토크나이저 (한글 음절 + ASCII). 실제 EEVE 토크나이저와 같은 패딩 설정."""
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    vocab = {"<s>": 0, "</s>": 1, "<unk>": 2}
+    for code in [*range(0x20, 0x7F), ord("\n"), *range(0xAC00, 0xD7A4)]:
+        vocab.setdefault(chr(code), len(vocab))
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Split("", "isolated")
+    backend.decoder = decoders.Fuse()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, bos_token="<s>", eos_token="</s>", unk_token="<unk>")
+    tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
+    return tokenizer
+
+class StubLanguageModel(torch.nn.Module):
+    """model.generate 대체: 프롬프트의 Input 으로 규칙을 채운 JSON 을 출력하며 토큰당 비용만큼 대기.
+
+    inference.generate / GenerationService 의 실제 경로(규칙, 결과 캐시, prefix 캐시, JSON 디코딩 인자)는 그대로 거친다.
+    (forward hook 을 거는 AcceptanceCounter 등이 있으므로 nn.Module 로 둠)
+    """
+
+    def __init__(self, tokenizer, seconds_per_token=0.002):
+        super().__init__()
+        self.tokenizer = tokenizer
+        self.cost = seconds_per_token
+
+    # prefix KV 캐시 prefill 호출은 아무것도 하지 않음
+    def forward(self, *args, **kwargs):
+        return None
+
+    def completion(self, prompt):
+        from treatment_rules import apply_rules, render_rules
+        from json_decoding import SCHEMA_KEYS
+
+        input_text = prompt.split("Input:")[-1].split("Output:")[0].strip()
+        rules = apply_rules(input_text)
+        values = {key: rules.get(key, "") for key in SCHEMA_KEYS}
+        values["메모(메시지)"] = "치료 계획을 안내해 드렸습니다."
+        return render_rules(values)
+
+    def generate(self, input_ids, attention_mask=None, max_new_tokens=512, **kwargs):
+        rows = []
+        for ids in input_ids:
+            prompt = self.tokenizer.decode(ids, skip_special_tokens=True)
+            new_ids = self.tokenizer.encode(self.completion(prompt), add_special_tokens=False)[:max_new_tokens]
+            rows.append(ids.tolist() + new_ids + [self.tokenizer.eos_token_id])
+        # 배치 전체가 가장 긴 행만큼 생성한 것으로 보고 대기 (한글 기준 대략 2글자 = 1토큰)
+        width = max(len(row) for row in rows)
+        time.sleep(self.cost * (width - input_ids.shape[1]) / 2)
+        return torch.tensor([row + [self.tokenizer.pad_token_id] * (width - len(row)) for row in rows])
+
+def install_llm_stub(seconds_per_token=0.002):
+    """model_registry 의 EEVE 토크나이저 / 모델 로더를 stand-in 으로 교체 (모델 로딩 전에 호출)."""
+    import inference  # noqa: F401  (실제 로더를 먼저 등록시킨 뒤 덮어씀)
+    from common import model_registry
+
+    tokenizer = make_stub_tokenizer()
+    model_registry.register("llm_tokenizer", lambda: tokenizer)
+    model_registry.register("llm_model", lambda: StubLanguageModel(tokenizer, seconds_per_token))
@@ -0,0 +1,55 @@
+import os
+import wave
+
+import numpy as np
+
+SAMPLING_RATE = 16000
+
+# 화자별 기본 음높이 (Hz). 화자 구분은 음높이로만 이루어지므로 stub 화자 분리도 결정적으로 동작
+SPEAKER_PITCHES = [140.0, 210.0, 290.0, 370.0]
+
+def synth_voice(seconds, pitch, rng, sampling_rate=SAMPLING_RATE):
+    """기본음 + 배음에 4Hz 안팎의 음절 단위 진폭 변조를 건 발화 흉내."""
+    t = np.arange(int(seconds * sampling_rate), dtype=np.float32) / sampling_rate
+    wave_ = np.sin(2 * np.pi * pitch * t) + 0.4 * np.sin(2 * np.pi * 2 * pitch * t) + 0.2 * np.sin(2 * np.pi * 3 * pitch * t)
+    syllable_rate = rng.uniform(3.0, 5.0)
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * syllable_rate * t + rng.uniform(0, 2 * np.pi))
+    noise = 0.01 * rng.standard_normal(len(t))
+    return (0.2 * wave_ * envelope + noise).astype(np.float32)
+
+def make_conversation(seconds, num_speakers, rng, sampling_rate=SAMPLING_RATE):
+    """화자가 번갈아 말하는 합성 대화 (발화 1~6초, 쉼 0.2~1.5초, 가끔 긴 무음). 반환: (오디오, 정답 구간)."""
+    audio = np.zeros(int(seconds * sampling_rate), dtype=np.float32)
+    turns = []
+    position = rng.uniform(0.2, 1.0)
+    speaker = 0
+    while position < seconds - 1.0:
+        length = min(rng.uniform(1.0, 6.0), seconds - position)
+        start = int(position * sampling_rate)
+        voice = synth_voice(length, SPEAKER_PITCHES[speaker], rng, sampling_rate)
+        audio[start:start + len(voice)] += voice[:len(audio) - start]
+        turns.append({"speaker": f"SPEAKER_{speaker:02d}", "start": round(position, 2), "end": round(position + length, 2)})
+
+        position += length + (rng.uniform(4.0, 12.0) if rng.random() < 0.05 else rng.uniform(0.2, 1.5))
+        speaker = (speaker + int(rng.integers(1, num_speakers))) % num_speakers if num_speakers > 1 else 0
+    return audio, turns
+
+def write_wav(path, audio, sampling_rate=SAMPLING_RATE):
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sampling_rate)
+        wf.writeframes(pcm.tobytes())
+
+def make_recordings(output_dir, count, seconds, num_speakers, seed):
+    """합성 녹음 count 개를 WAV 로 저장하고 [{"path", "seconds", "turns"}] 반환 (같은 seed 면 같은 파일)."""
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    recordings = []
+    for i in range(count):
+        audio, turns = make_conversation(seconds, num_speakers, rng)
+        path = os.path.join(output_dir, f"synthetic_{i:03d}.wav")
+        write_wav(path, audio)
+        recordings.append({"path": path, "seconds": seconds, "turns": turns})
+    return recordings
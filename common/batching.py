@@ -0,0 +1,89 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """여러 호출자의 요청을 모아 한 번에 처리하는 백그라운드 배치 스레드 (ASR / LLM 생성 공용).
+
+    첫 요청이 들어온 뒤 max_batch_size 개가 모이거나 max_wait_ms 가 지나면 process_fn(items) 를 한 번 호출하고,
+    입력과 같은 순서의 결과 목록을 각 요청의 Future 에 돌려준다.
+    취소된 요청(연결 끊김 등)은 배치에서 빼고, 배치 하나가 실패해도 스레드는 계속 동작한다.
+    on_wait(seconds) 가 있으면 요청마다 대기열에서 기다린 시간을 넘긴다.
+    """
+
+    def __init__(self, process_fn, max_batch_size, max_wait_ms, name="micro-batcher", on_wait=None):
+        self.process_fn = process_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.on_wait = on_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _loop(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                print(f"❌ {self.name} 배치 처리 중 오류: {e}")
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        if self.on_wait is not None:
+            for _, _, submitted in batch:
+                self.on_wait(started - submitted)
+        # 취소된 요청은 제외 (이후 결과를 넣지 않음)
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = self.process_fn([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def close(self):
+        self._queue.put(None)
@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+
+# STT(Whisper / 화자 분리) 와 LLM(EEVE 토크나이저 / 모델 / draft 모델) 이 함께 쓰는 모델 레지스트리
+
+# 서버 시작 시 모든 모델을 미리 로딩 + 워밍업할지 여부
+WARMUP_ON_START = os.getenv("STT_WARMUP", "0") == "1"
+
+# 이름 → 로더 / 워밍업 함수 / 로딩된 모델 / 소요 시간
+_loaders = {}
+_warmups = {}
+_models = {}
+_timings = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+def register(name, loader, warmup=None):
+    """모델 로더 등록. 실제 로딩은 get(name) 첫 호출 시 1회만 수행.
+
+    같은 이름으로 다시 등록하면 로더를 교체하고, 이미 로딩된 모델은 버려 다음 get 에서 새 로더로 로딩한다.
+    """
+    with _registry_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        _loaders[name] = loader
+        _warmups.pop(name, None)
+        if warmup is not None:
+            _warmups[name] = warmup
+        _models.pop(name, None)
+        _timings.pop(name, None)
+
+def get(name):
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    with _locks[name]:
+        # 다른 스레드가 먼저 로딩했을 수 있으므로 다시 확인
+        if name not in _models:
+            print(f"⏳ 모델 로딩: {name}")
+            start = time.perf_counter()
+            _models[name] = _loaders[name]()
+            elapsed = time.perf_counter() - start
+            _timings.setdefault(name, {})["load_seconds"] = round(elapsed, 3)
+            print(f"✅ 모델 로딩 완료: {name} ({elapsed:.1f}초)")
+    return _models[name]
+
+def is_loaded(name):
+    return name in _models
+
+def warmup(names=None):
+    """모델을 로딩하고 등록된 워밍업(더미 입력 1회 추론)을 실행."""
+    for name in names or list(_loaders):
+        model = get(name)
+        if name in _warmups:
+            start = time.perf_counter()
+            _warmups[name](model)
+            _timings[name]["warmup_seconds"] = round(time.perf_counter() - start, 3)
+    return load_timings()
+
+def load_timings():
+    return {
+        name: {"loaded": name in _models, **_timings.get(name, {})}
+        for name in _loaders
+    }
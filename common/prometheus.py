@@ -0,0 +1,47 @@
+import threading
+
+# 프로세스 공용 지표 레지스트리: 이름 → 히스토그램 (STT / LLM 지표를 한 번에 출력)
+_registry = {}
+_registry_lock = threading.Lock()
+
+class Histogram:
+    """라벨별 누적 히스토그램 (Prometheus text 형식으로 출력). 생성 시 공용 레지스트리에 등록."""
+
+    def __init__(self, name, help_text, buckets, label="stage"):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label = label
+        self._series = {}  # 라벨 값 → [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry[name] = self
+
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.setdefault(label_value, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                label = f'{self.label}="{label_value}"'
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series[-1]}')
+                lines.append(f"{self.name}_sum{{{label}}} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{{{label}}} {series[-1]}")
+        return "\n".join(lines)
+
+def histograms():
+    with _registry_lock:
+        return list(_registry.values())
+
+def render_prometheus():
+    """이 프로세스에 등록된 모든 히스토그램 (stt_* / llm_*)."""
+    return "\n".join(h.render() for h in histograms()) + "\n"